@@ -1,10 +1,7 @@
-from flask import Flask, render_template
+from flask import Flask
 from app.models import db
-from flask_migrate import Migrate
 import os
 
-migrate = Migrate()
-
 def create_app(config_name='default'):
     """Factory function to create Flask application instance."""
     from config.config import config
@@ -21,9 +18,26 @@ def create_app(config_name='default'):
     if hasattr(config[config_name], 'init_app'):
         config[config_name].init_app(app)
     
+    from app import (archive, assets, cache, compression, database, events, group_commit,
+                     metrics, replicas, serialization, slow_queries)
+    database.configure_engine(app)
+    
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    
+    database.init_app(app)
+    replicas.init_app(app)
+    cache.init_app(app)
+    events.init_app(app)
+    group_commit.init_app(app)
+    archive.init_app(app)
+    serialization.init_app(app)
+    metrics.init_app(app)
+    slow_queries.init_app(app)
+    # Registered last so it runs first: the hooks above see the compressed response
+    compression.init_app(app)
+    # Wraps the static view compression installed
+    assets.init_app(app)
     
     # Create instance directory if it doesn't exist
     os.makedirs(app.instance_path, exist_ok=True)
@@ -32,12 +46,19 @@ def create_app(config_name='default'):
     from app.routes import api_bp
     app.register_blueprint(api_bp)
     
+    # Register CLI commands
+    from app.cli import tasks_cli, MigrateGroup
+    app.cli.add_command(tasks_cli)
+    # Flask-Migrate is only imported when a "flask db" command runs
+    app.cli.add_command(MigrateGroup(app))
+    
     # Add main route
     @app.route('/')
     def index():
+        from app.pages import render_index
         try:
             app.logger.info('Attempting to render index template')
-            return render_template('index.html')
+            return render_index()
         except Exception as e:
             app.logger.error(f"Template error: {e}")
             return f"Template error: {e}", 500
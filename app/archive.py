@@ -0,0 +1,119 @@
+"""Moving old completed tasks out of the tasks table.
+
+Completed tasks nobody has touched for ARCHIVE_AFTER_DAYS are moved to
+tasks_archive, which keeps the tasks table and its indexes down to the
+working set that listing and filtering scan. Archived tasks keep their
+ids, are still counted by the statistics and are read back by
+``GET /api/tasks`` and ``GET /api/tasks/<id>`` with ``include_archived=1``.
+
+The mover works in batches of ARCHIVE_BATCH_SIZE tasks, one short
+transaction each, and sleeps ARCHIVE_BATCH_PAUSE seconds between them so
+it never holds the write lock for long or crowds out request traffic.
+It runs from ``flask tasks archive``, or with ARCHIVE_INTERVAL set, from a
+background thread in every process.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models import db
+from app.writes import archive_tasks
+
+
+class TaskArchiver:
+    """Moves completed tasks older than ``after_days`` to the archive, batch by batch."""
+
+    def __init__(self, app, after_days=30, batch_size=500, pause=0.2, interval=0):
+        self.app = app
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def cutoff(self):
+        """Tasks last modified before this time are due for archiving."""
+        return datetime.utcnow() - timedelta(days=self.after_days)
+
+    def run(self, cutoff=None, progress=None):
+        """Archive every task due, returning how many were moved.
+
+        ``progress`` is called with the running total after each batch.
+        """
+        cutoff = cutoff or self.cutoff()
+        moved = 0
+        while True:
+            try:
+                archived = archive_tasks(db.session, cutoff, self.batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            moved += len(archived)
+            if progress is not None and archived:
+                progress(moved)
+            if len(archived) < self.batch_size:
+                return moved
+            time.sleep(self.pause)
+
+    def _running(self):
+        # A thread started before a fork does not exist in the child
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def ensure_running(self):
+        """Start this process's background mover unless it is already running."""
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name='task-archiver', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background mover, waiting for a run in progress to finish."""
+        self._stopping.set()
+        if self._running():
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stopping.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    moved = self.run()
+                    if moved:
+                        self.app.logger.info('Archived %d completed tasks', moved)
+                except Exception:
+                    self.app.logger.exception('Archiving tasks failed')
+                finally:
+                    db.session.remove()
+
+
+def get_task_archiver():
+    return current_app.extensions['task_archiver']
+
+
+def init_app(app):
+    """Create the app's archiver, running it in the background when ARCHIVE_INTERVAL is set.
+
+    The thread is started by the first request rather than here, so an
+    app created before gunicorn forks its workers starts one per worker.
+    """
+    archiver = TaskArchiver(
+        app,
+        after_days=app.config['ARCHIVE_AFTER_DAYS'],
+        batch_size=app.config['ARCHIVE_BATCH_SIZE'],
+        pause=app.config['ARCHIVE_BATCH_PAUSE'],
+        interval=app.config['ARCHIVE_INTERVAL']
+    )
+    app.extensions['task_archiver'] = archiver
+    if archiver.interval > 0:
+        app.before_request(archiver.ensure_running)
@@ -0,0 +1,116 @@
+"""Content-hashed static asset URLs with long-lived caching.
+
+At startup every static file is hashed into a manifest mapping its name
+to a fingerprinted one (``js/app.js`` -> ``js/app.3f2a1b9c0d4e.js``).
+Templates link assets through ``asset_url``, and the static view serves
+fingerprinted names with a one-year immutable Cache-Control: a changed
+file gets a new URL, so browsers never need to revalidate the old one.
+
+Fingerprinted names with an outdated hash, as requested by pages rendered
+before a deploy, still get the current file, but with the default caching.
+"""
+import hashlib
+import os
+import re
+
+from flask import url_for
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 12
+
+_FINGERPRINTED = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<suffix>\.[^./]+)$' % HASH_LENGTH)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(filename, digest):
+    """``css/styles.css`` with the hash inserted before its extension."""
+    stem, suffix = os.path.splitext(filename)
+    return f'{stem}.{digest}{suffix}'
+
+
+class AssetManifest:
+    """Static filenames and their fingerprinted names."""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.assets = {}
+        self.originals = {}
+        self._mtimes = {}
+
+    def build(self):
+        """Hash every file of the static folder."""
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                self._add(os.path.relpath(path, self.static_folder).replace(os.sep, '/'), path)
+        return self
+
+    def _add(self, filename, path):
+        previous = self.assets.get(filename)
+        if previous is not None:
+            self.originals.pop(previous, None)
+        fingerprinted = fingerprinted_name(filename, file_hash(path))
+        self.assets[filename] = fingerprinted
+        self.originals[fingerprinted] = filename
+        self._mtimes[filename] = os.path.getmtime(path)
+
+    def refresh(self, filename):
+        """Rehash a file changed since the manifest was built (used when debugging)."""
+        path = os.path.join(self.static_folder, filename)
+        if filename in self.assets and os.path.getmtime(path) != self._mtimes[filename]:
+            self._add(filename, path)
+
+    def resolve(self, filename):
+        """Return the static file a requested name refers to, and whether its hash is current."""
+        original = self.originals.get(filename)
+        if original is not None:
+            return original, True
+        match = _FINGERPRINTED.match(filename)
+        if match:
+            original = match['stem'] + match['suffix']
+            if original in self.assets:
+                return original, False
+        return filename, False
+
+
+def init_app(app):
+    """Build the asset manifest and serve fingerprinted static files.
+
+    Wraps the current static view, so it must run after any other
+    extension that replaces it (see ``app.compression``).
+    """
+    if not app.config.get('ASSET_FINGERPRINTS') or not app.static_folder \
+            or not os.path.isdir(app.static_folder):
+        app.add_template_global(
+            lambda filename: url_for('static', filename=filename), 'asset_url')
+        return
+    manifest = AssetManifest(app.static_folder).build()
+    app.extensions['asset_manifest'] = manifest
+
+    def asset_url(filename):
+        """URL of a static file under its fingerprinted name."""
+        if app.debug:
+            manifest.refresh(filename)
+        return url_for('static', filename=manifest.assets.get(filename, filename))
+
+    app.add_template_global(asset_url, 'asset_url')
+    send_static_file = app.view_functions['static']
+
+    def static(filename):
+        original, current = manifest.resolve(filename)
+        response = send_static_file(filename=original)
+        if current and response.status_code == 200:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,599 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept, MultiDict
+from werkzeug.exceptions import (BadRequest, HTTPException, NotFound, PreconditionFailed,
+                                 UnsupportedMediaType)
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from flask import current_app, g
+
+from app import cache, create_app, metrics
+from app.compression import (add_vary, choose_encoding, compress, compressor, is_compressible,
+                             weak_etag)
+from app.database import apply_sqlite_pragmas
+from app.group_commit import get_task_writer
+from app.models import db, Task, TableVersion, TASK_FIELDS, serialize_task, search_statement
+from app.etags import task_etag, list_etag, serialized_task_etag, if_match_versions
+from app.serialization import row_encoder
+from app.stats import task_stats
+from app.pagination import (encode_cursor, decode_cursor, parse_limit,
+                            encode_offset_cursor, decode_offset_cursor)
+from app.queries import (task_list_statement, task_modified_statement, task_fields_statement,
+                         existing_ids_statement)
+from app.writes import (add_task, update_task_by_id, delete_task_by_id, apply_bulk_changes,
+                        load_tasks)
+from app.validation import (VALID_STATUSES, new_task_values, task_changes, parse_fields,
+                            parse_flag, bulk_payload_error, bulk_referenced_ids,
+                            validate_bulk, bulk_error_results)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+
+class AsyncTaskSession(Session):
+    """Sync session class behind the async API's AsyncSessions.
+
+    A subclass of its own so the task cache can listen to it without also
+    seeing every other Session in the process.
+    """
+
+
+def async_database_url(url):
+    """Swap the driver of a database URL for its asyncio counterpart."""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No asyncio driver configured for {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(settings, url):
+    """Engine options for the async engine, adapted from the sync ones."""
+    options = settings.engine_options(url.render_as_string(hide_password=False))
+    options.pop('connect_args', None)
+    if url.get_backend_name() == 'postgresql' and settings.statement_timeout_ms:
+        options['connect_args'] = {
+            'server_settings': {'statement_timeout': str(settings.statement_timeout_ms)}
+        }
+    if url.get_backend_name() == 'sqlite' and 'pool_size' in options:
+        # aiosqlite defaults to opening a new connection (and thread) per checkout
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+
+class AsyncAPI:
+    """asyncio variant of the ``/api`` task routes.
+
+    Serves the same responses as ``app.routes`` from an async SQLAlchemy
+    engine on the same database. Handlers run inside the Flask app's
+    context, so config, the JSON provider and the task cache are shared
+    with the WSGI stack. Writes reuse the sync helpers in ``app.writes``
+    through ``AsyncSession.run_sync``.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        settings = flask_app.config['ENGINE_SETTINGS']
+        with flask_app.app_context():
+            url = async_database_url(db.engine.url)
+        options = metrics.timed_pool_options(flask_app, async_engine_options(settings, url),
+                                             asyncio=True)
+        self.engine = create_async_engine(url, **options)
+        apply_sqlite_pragmas(self.engine.sync_engine, settings)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False,
+                                           sync_session_class=AsyncTaskSession)
+        cache.track_session(AsyncTaskSession)
+
+    def routes(self, prefix='/api'):
+        """Starlette routes for the API under ``prefix``."""
+        return [
+            Route(prefix + path, self._endpoint(handler, _flask_rule(prefix + path)),
+                  methods=[method])
+            for path, method, handler in [
+                ('/tasks', 'GET', self.get_tasks),
+                ('/tasks', 'POST', self.create_task),
+                ('/tasks/search', 'GET', self.search_tasks),
+                ('/tasks/stats', 'GET', self.get_task_stats),
+                ('/tasks/bulk', 'POST', self.bulk_tasks),
+                ('/tasks/{task_id:int}', 'GET', self.get_task),
+                ('/tasks/{task_id:int}', 'PUT', self.update_task),
+                ('/tasks/{task_id:int}', 'PATCH', self.update_task),
+                ('/tasks/{task_id:int}', 'DELETE', self.delete_task),
+            ]
+        ]
+
+    def _endpoint(self, handler, rule):
+        async def endpoint(request):
+            with self.flask_app.app_context():
+                # Route of the statements run, for the slow query log
+                g.route = f'{request.method} {rule}'
+                metrics.start_request()
+                try:
+                    response = await handler(request, **request.path_params)
+                except HTTPException as e:
+                    # Same error pages as the Flask routes' abort()
+                    response = Response(e.get_body(), status_code=e.code,
+                                        headers=dict(e.get_headers()))
+                response = _compress(request, response)
+                body = getattr(response, 'body', None)
+                metrics.finish_request(request.method, rule, response.status_code,
+                                       int(request.headers.get('content-length') or 0),
+                                       len(body) if body is not None else 0)
+                return response
+        return endpoint
+
+    async def get_tasks(self, request):
+        """Get tasks with optional status filter and keyset pagination."""
+        args = _args(request)
+        status = args.get('status')
+
+        try:
+            limit = parse_limit(args.get('limit'), current_app.config['TASKS_MAX_PAGE_SIZE'])
+            cursor = args.get('cursor')
+            position = decode_cursor(cursor) if cursor else None
+            fields = parse_fields(args.get('fields'))
+        except ValueError as e:
+            return _json({
+                'success': False,
+                'error': str(e)
+            }, 400)
+        include_archived = parse_flag(args.get('include_archived'))
+
+        stream = _wants_ndjson(request, args)
+        mimetype = NDJSON_MIMETYPE if stream else 'application/json'
+
+        task_cache = None if stream else cache.get_task_cache()
+        cache_key = ('list', status if status in VALID_STATUSES else None,
+                     limit, position, fields, include_archived)
+
+        async with self.sessions() as session:
+            version = await _tasks_version(session)
+            etag = list_etag(version, args, mimetype)
+            if _if_none_match(request).contains_weak(etag):
+                return _not_modified(etag)
+
+            if task_cache is not None:
+                tag = (cache.read_source(), version)
+                body = task_cache.get(cache_key, tag)
+                if body is not None:
+                    return _cached_response(body, etag)
+                generation = task_cache.generation
+
+            fields = fields or TASK_FIELDS
+            statement = task_list_statement(fields, status, position, include_archived)
+            encode = row_encoder(fields)
+
+            if stream:
+                if limit is not None:
+                    statement = statement.limit(limit)
+                return _with_etag(self._stream_tasks(statement, encode), etag)
+
+            next_cursor = None
+            if limit is None:
+                rows = (await session.execute(statement)).all()
+            else:
+                # Fetch one extra row to learn whether another page exists
+                rows = (await session.execute(statement.limit(limit + 1))).all()
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    next_cursor = encode_cursor(rows[-1])
+
+        response = _json({
+            'success': True,
+            'tasks': [encode(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+        if task_cache is not None:
+            task_cache.set(cache_key, response.body, len(response.body), generation, tag)
+        return _with_etag(response, etag)
+
+    def _stream_tasks(self, statement, encode):
+        """Stream the statement's rows as one JSON object per line."""
+        batch_size = current_app.config['TASKS_STREAM_BATCH_SIZE']
+        dumps = current_app.json.dumps
+
+        async def generate():
+            # The response outlives the handler, so the stream has its own session
+            async with self.sessions() as session:
+                result = await session.stream(statement.execution_options(yield_per=batch_size))
+                async for row in result:
+                    yield dumps(encode(row)) + '\n'
+
+        return StreamingResponse(generate(), media_type=NDJSON_MIMETYPE)
+
+    async def search_tasks(self, request):
+        """Full-text search over task titles and descriptions, best match first."""
+        args = _args(request)
+        text = args.get('q', '').strip()
+
+        try:
+            if not text:
+                raise ValueError('Search text is required')
+            limit = parse_limit(args.get('limit'), current_app.config['TASKS_MAX_PAGE_SIZE'])
+            limit = limit or current_app.config['TASKS_SEARCH_PAGE_SIZE']
+            cursor = args.get('cursor')
+            offset = decode_offset_cursor(cursor) if cursor else 0
+            fields = parse_fields(args.get('fields'))
+        except ValueError as e:
+            return _json({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        task_cache = cache.get_task_cache()
+        cache_key = ('list', 'search', text, limit, offset, fields)
+
+        async with self.sessions() as session:
+            version = await _tasks_version(session)
+            etag = list_etag(version, args, 'application/json')
+            if _if_none_match(request).contains_weak(etag):
+                return _not_modified(etag)
+
+            if task_cache is not None:
+                tag = (cache.read_source(), version)
+                body = task_cache.get(cache_key, tag)
+                if body is not None:
+                    return _cached_response(body, etag)
+                generation = task_cache.generation
+
+            fields = fields or TASK_FIELDS
+            encode = row_encoder(fields)
+            statement = search_statement(text, [Task.__table__.c[name] for name in fields],
+                                         self.engine.dialect.name)
+            rows = []
+            if statement is not None:
+                # Fetch one extra row to learn whether another page exists
+                rows = (await session.execute(statement.limit(limit + 1).offset(offset))).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_offset_cursor(offset + limit)
+
+        response = _json({
+            'success': True,
+            'tasks': [encode(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+        if task_cache is not None:
+            task_cache.set(cache_key, response.body, len(response.body), generation, tag)
+        return _with_etag(response, etag)
+
+    async def get_task_stats(self, request):
+        """Task counts per status, completion rate and tasks created per day."""
+        max_days = current_app.config['TASKS_STATS_MAX_DAYS']
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = 30
+        if not 1 <= days <= max_days:
+            return _json({
+                'success': False,
+                'error': f'days must be between 1 and {max_days}'
+            }, 400)
+
+        async with self.sessions() as session:
+            stats = await session.run_sync(lambda sync_session: task_stats(days, sync_session))
+        return _json({
+            'success': True,
+            'stats': stats
+        })
+
+    async def get_task(self, request, task_id):
+        """Get a specific task by ID."""
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except ValueError as e:
+            return _json({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        include_archived = parse_flag(request.query_params.get('include_archived'))
+        if_none_match = _if_none_match(request)
+        task_cache = cache.get_task_cache()
+        cache_key = ('task', task_id, fields, include_archived)
+
+        async with self.sessions() as session:
+            if task_cache is not None or if_none_match:
+                # Check the client's copy, and the cached one, against the
+                # modification time alone before loading and serializing the full row
+                modified = (await session.execute(
+                    task_modified_statement(task_id, include_archived))).first()
+                if modified is None:
+                    raise NotFound()
+                etag = task_etag(task_id, *modified, fields=fields)
+                if if_none_match.contains_weak(etag):
+                    return _not_modified(etag)
+
+            if task_cache is not None:
+                # Entries are only served while the task is unchanged, so writes
+                # committed by other worker processes show straight away
+                tag = (cache.read_source(), *modified)
+                body = task_cache.get(cache_key, tag)
+                if body is not None:
+                    return _cached_response(body, etag)
+                generation = task_cache.generation
+
+            if fields is None and not include_archived:
+                task = await session.get(Task, task_id)
+            else:
+                # Rows of the tasks and archive union are serialized like Task.to_dict
+                task = (await session.execute(
+                    task_fields_statement(task_id, fields or TASK_FIELDS, include_archived))).first()
+            if task is None:
+                raise NotFound()
+
+        etag = task_etag(task_id, task.created_at, task.updated_at, fields=fields)
+        task_dict = task.to_dict() if isinstance(task, Task) else serialize_task(
+            task, fields or TASK_FIELDS)
+        response = _json({
+            'success': True,
+            'task': task_dict
+        })
+        if task_cache is not None:
+            task_cache.set(cache_key, response.body, len(response.body), generation, tag)
+        return _with_etag(response, etag)
+
+    async def create_task(self, request):
+        """Create a new task."""
+        data = await _get_json(request)
+
+        try:
+            values = new_task_values(data)
+        except ValueError as e:
+            return _json({
+                'success': False,
+                'error': str(e)
+            }, 400)
+
+        writer = get_task_writer()
+        if writer is not None:
+            task_dict = await asyncio.wrap_future(writer.enqueue(values))
+        else:
+            async with self.sessions() as session:
+                task_dict = await session.run_sync(add_task, values)
+                await session.commit()
+
+        return _json({
+            'success': True,
+            'task': task_dict
+        }, 201)
+
+    async def update_task(self, request, task_id):
+        """Update an existing task, if it still matches the If-Match header."""
+        versions = if_match_versions(_if_match(request), task_id)
+        async with self.sessions() as session:
+            data = await _get_json(request, silent=True)
+            if not isinstance(data, dict):
+                # Let the missing task or the unreadable body fail as they always have
+                if await session.get(Task, task_id) is None:
+                    raise NotFound()
+                data = await _get_json(request)
+
+            task_dict = await session.run_sync(update_task_by_id, task_id, task_changes(data),
+                                               versions)
+            if task_dict is None:
+                await _no_match(session, task_id, versions)
+            await session.commit()
+
+        response = _json({
+            'success': True,
+            'task': task_dict
+        })
+        response.headers['ETag'] = quote_etag(serialized_task_etag(task_dict))
+        return response
+
+    async def delete_task(self, request, task_id):
+        """Delete a task, if it still matches the If-Match header."""
+        versions = if_match_versions(_if_match(request), task_id)
+        async with self.sessions() as session:
+            if not await session.run_sync(delete_task_by_id, task_id, versions):
+                await _no_match(session, task_id, versions)
+            await session.commit()
+
+        return _json({
+            'success': True,
+            'message': f'Task {task_id} deleted successfully'
+        })
+
+    async def bulk_tasks(self, request):
+        """Create, update and delete many tasks in a single transaction."""
+        data = await _get_json(request)
+
+        error = bulk_payload_error(data, current_app.config['TASKS_BULK_MAX_ITEMS'])
+        if error:
+            return _json({
+                'success': False,
+                'error': error
+            }, 400)
+
+        async with self.sessions() as session:
+            referenced_ids = bulk_referenced_ids(data)
+            existing_ids = set(await session.scalars(
+                existing_ids_statement(referenced_ids)
+            )) if referenced_ids else set()
+
+            errors, creates, updates, deletes = validate_bulk(data, existing_ids)
+
+            if any(error is not None for op_errors in errors.values() for error in op_errors):
+                return _json({
+                    'success': False,
+                    'error': 'One or more items are invalid; no changes were applied',
+                    'results': bulk_error_results(errors)
+                }, 400)
+
+            created = await session.run_sync(apply_bulk_changes, creates, updates, deletes)
+            await session.commit()
+
+            updated = {}
+            if updates:
+                updated = await session.run_sync(
+                    load_tasks, [task_id for task_id, _ in updates])
+
+        return _json({
+            'success': True,
+            'results': {
+                'create': [{'success': True, 'task': task} for task in created],
+                'update': [{'success': True, 'task': updated[task_id].to_dict()}
+                           for task_id, _ in updates],
+                'delete': [{'success': True, 'id': task_id} for task_id in deletes]
+            }
+        })
+
+
+async def _tasks_version(session):
+    return await session.run_sync(
+        lambda sync_session: TableVersion.current('tasks', session=sync_session))
+
+
+def _flask_rule(path):
+    """The Flask rule matching a Starlette path, so both stacks share metric labels."""
+    return re.sub(r'\{(\w+):(\w+)\}', r'<\2:\1>', path)
+
+
+def _args(request):
+    """The query string as a werkzeug MultiDict, as Flask's request.args."""
+    return MultiDict(request.query_params.multi_items())
+
+
+def _wants_ndjson(request, args):
+    """Whether the client asked for the streaming NDJSON representation."""
+    if args.get('stream') in ('1', 'true'):
+        return True
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    return accept.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _if_none_match(request):
+    return parse_etags(request.headers.get('if-none-match'))
+
+
+def _if_match(request):
+    return parse_etags(request.headers.get('if-match'))
+
+
+async def _no_match(session, task_id, versions):
+    """Raise for a write that matched no task: 412 if it exists at another version, else 404."""
+    if versions is not None and await session.scalar(existing_ids_statement([task_id])) is not None:
+        raise PreconditionFailed()
+    raise NotFound()
+
+
+async def _get_json(request, silent=False):
+    """Parse a JSON body the way Flask's request.get_json() does.
+
+    With ``silent`` an unreadable body gives None instead of an error.
+    """
+    mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if not (mimetype == 'application/json'
+            or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+        if silent:
+            return None
+        raise UnsupportedMediaType(
+            'Did not attempt to load JSON data because the request Content-Type '
+            "was not 'application/json'.")
+    try:
+        return current_app.json.loads(await request.body())
+    except ValueError as e:
+        if silent:
+            return None
+        raise BadRequest(f'Failed to decode JSON object: {e}')
+
+
+def _json(data, status=200):
+    """JSON response with the same body Flask's jsonify would produce."""
+    body = current_app.json.response(data).get_data()
+    return Response(body, status_code=status, media_type='application/json')
+
+
+def _compress(request, response):
+    """Compress the response like the Flask app's compression hook does."""
+    config = current_app.config
+    if not config['COMPRESSION_ENABLED'] or not is_compressible(
+            response.media_type, response.status_code, response.headers):
+        return response
+    add_vary(response.headers)
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    level = config['COMPRESSION_LEVEL']
+    if isinstance(response, StreamingResponse):
+        response.body_iterator = _compress_stream(response.body_iterator, encoding, level)
+        if 'Content-Length' in response.headers:
+            del response.headers['Content-Length']
+    else:
+        if len(response.body) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.body = compress(response.body, encoding, level)
+        response.headers['Content-Length'] = str(len(response.body))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = weak_etag(response.headers['ETag'])
+    return response
+
+
+async def _compress_stream(chunks, encoding, level):
+    stream = compressor(encoding, level)
+    async for chunk in chunks:
+        data = stream.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield stream.flush()
+
+
+def _cached_response(body, etag):
+    """Rebuild a JSON response from a cached body."""
+    return _with_etag(Response(body, media_type='application/json'), etag)
+
+
+def _not_modified(etag):
+    """Empty 304 response carrying the matched ETag."""
+    return _with_etag(Response(status_code=304), etag)
+
+
+def _with_etag(response, etag):
+    """Attach an ETag and ask clients to revalidate before reusing the response."""
+    response.headers['ETag'] = quote_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def create_asgi_app(config_name='default', flask_app=None):
+    """Create the ASGI application.
+
+    The task API under ``/api`` is served by the asyncio routes; every
+    other path, including the SSE change feed, falls through to the Flask
+    app running in a thread pool.
+    """
+    flask_app = flask_app or create_app(config_name)
+    api = AsyncAPI(flask_app)
+
+    @asynccontextmanager
+    async def lifespan(asgi_app):
+        # The Flask hook starting it only sees the requests outside /api
+        archiver = flask_app.extensions['task_archiver']
+        if archiver.interval > 0:
+            archiver.ensure_running()
+        yield
+        await api.engine.dispose()
+
+    asgi_app = Starlette(
+        routes=api.routes() + [Mount('/', app=WSGIMiddleware(flask_app))],
+        lifespan=lifespan
+    )
+    asgi_app.state.api = api
+    return asgi_app
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from app.models import db, Task
+
+
+class TaskCache:
+    """Bounded LRU cache with a per-entry TTL for task read responses.
+
+    Entries carry a ``tag`` naming what they were read at, and lookups
+    only return entries whose tag matches theirs. The routes tag lists with
+    the database and tasks version they read, and tasks with their
+    modification time, so a hit costs one cheap query instead of loading
+    and serializing rows, and writes made by other worker processes show
+    straight away. Commits in this process also drop the affected entries
+    (a task's own entries and every list) to free their memory.
+    """
+
+    def __init__(self, max_entries=1024, ttl=5, max_entry_bytes=1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; see ``set``
+        self.generation = 0
+
+    def get(self, key, tag=None):
+        """Return the cached value for key if it was stored with ``tag``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, entry_tag, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            if entry_tag != tag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size, generation=None, tag=None):
+        """Cache value for key, tagged with ``tag``, unless it is larger than allowed.
+
+        Pass the ``generation`` read before querying the value: if a commit
+        invalidated the cache since, the value may predate it and is dropped.
+        """
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, task_ids=None):
+        """Drop list entries and the entries of the given tasks.
+
+        Passing None drops every entry.
+        """
+        with self._lock:
+            if task_ids is None:
+                stale = list(self._entries)
+            else:
+                stale = [key for key in self._entries
+                         if key[0] == 'list' or (key[0] == 'task' and key[1] in task_ids)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self.generation += 1
+
+    def stats(self):
+        """Return the cache counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def get_task_cache():
+    """Return the current app's task cache, or None when caching is disabled."""
+    return current_app.extensions.get('task_cache')
+
+
+def get_read_cache():
+    """Return the task cache for the current request's reads, or None.
+
+    Requests kept on the primary because they or their client just wrote
+    (see ``app.replicas``) bypass the cache, whose entries may come from a
+    replica that has not caught up with that write yet.
+    """
+    router = current_app.extensions.get('replica_router')
+    if router is not None and (g.get('db_wrote') or g.get('db_read_primary')
+                               or router.sticky(request)):
+        return None
+    return get_task_cache()
+
+
+def read_source(session=None):
+    """The database ``session`` reads tasks from, part of every cache entry's tag."""
+    return str((session or db.session).get_bind(Task).url)
+
+
+def _pending(session):
+    return session.info.setdefault('task_cache_pending', set())
+
+
+def _track_flush(session, flush_context):
+    """Remember which tasks a flush touched so the commit can invalidate them."""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Task):
+            _pending(session).add(obj.id)
+
+
+def _track_bulk(orm_execute_state):
+    """Bulk INSERT/UPDATE/DELETE statements bypass the flush.
+
+    Statements naming the tasks they touch in the ``task_cache_ids``
+    execution option invalidate those; any other invalidates everything.
+    """
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Task:
+        task_ids = orm_execute_state.execution_options.get('task_cache_ids')
+        _pending(orm_execute_state.session).update(task_ids if task_ids is not None else [None])
+
+
+def _invalidate_on_commit(session):
+    pending = session.info.pop('task_cache_pending', None)
+    if not pending:
+        return
+    cache = get_task_cache()
+    if cache is not None:
+        cache.invalidate(None if None in pending else pending)
+
+
+def _discard_on_rollback(session):
+    session.info.pop('task_cache_pending', None)
+
+
+def track_session(target):
+    """Invalidate cached entries on commits made through ``target``.
+
+    ``target`` is a Session class, sessionmaker or scoped session.
+    """
+    if not event.contains(target, 'after_commit', _invalidate_on_commit):
+        event.listen(target, 'after_flush', _track_flush)
+        event.listen(target, 'do_orm_execute', _track_bulk)
+        event.listen(target, 'after_commit', _invalidate_on_commit)
+        event.listen(target, 'after_rollback', _discard_on_rollback)
+
+
+def init_app(app):
+    """Create the app's task cache when TASK_CACHE_ENABLED is set."""
+    if not app.config['TASK_CACHE_ENABLED']:
+        return
+    app.extensions['task_cache'] = TaskCache(
+        max_entries=app.config['TASK_CACHE_MAX_ENTRIES'],
+        ttl=app.config['TASK_CACHE_TTL'],
+        max_entry_bytes=app.config['TASK_CACHE_MAX_ENTRY_BYTES']
+    )
+    track_session(db.session)
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+
+from app.models import db, TableVersion, TaskEvent
+
+
+def changed_fields(task_dict, changes):
+    """The subset of a serialized task that an update touched."""
+    fields = {'id': task_dict['id'], 'updated_at': task_dict['updated_at']}
+    fields.update((column, task_dict[column]) for column in changes)
+    return fields
+
+
+def record_task_changes(created=(), updated=(), deleted=(), session=None, archived=(),
+                        reset=False):
+    """Record writes to the tasks table in the current transaction.
+
+    ``created`` takes serialized tasks, ``updated`` takes dicts holding the
+    task id and the fields that changed, and ``deleted`` and ``archived``
+    take task ids. ``reset`` logs a single event telling clients to reload
+    their whole list, for writes too large to log task by task.
+    Bumps the tasks table version and appends the changes to the event log,
+    so both commit or roll back together with the write itself.
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    events = [
+        {'task_id': task['id'], 'kind': 'created', 'data': json.dumps(task), 'created_at': now}
+        for task in created
+    ]
+    events += [
+        {'task_id': task['id'], 'kind': 'updated', 'data': json.dumps(task), 'created_at': now}
+        for task in updated
+    ]
+    events += [
+        {'task_id': task_id, 'kind': 'deleted', 'data': json.dumps({'id': task_id}),
+         'created_at': now}
+        for task_id in deleted
+    ]
+    events += [
+        {'task_id': task_id, 'kind': 'archived', 'data': json.dumps({'id': task_id}),
+         'created_at': now}
+        for task_id in archived
+    ]
+    if reset:
+        events.append({'task_id': 0, 'kind': 'reset', 'data': '{}', 'created_at': now})
+    
+    TableVersion.bump('tasks', session=session)
+    if events:
+        session.execute(db.insert(TaskEvent), events)
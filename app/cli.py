@@ -0,0 +1,217 @@
+import json
+import sys
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+
+from app.archive import TaskArchiver, get_task_archiver
+from app.models import db
+from app.transfer import FORMATS, Checkpoint, detect_format, export_tasks, import_tasks, read_items
+from app.slow_queries import get_slow_query_log
+from app.stats import rebuild_stats, stats_differences
+
+tasks_cli = AppGroup('tasks', help='Task maintenance commands.')
+
+
+class MigrateGroup(click.Group):
+    """The ``flask db`` group, importing Flask-Migrate and Alembic when it is used.
+
+    They take a large share of an app's import time and only the CLI
+    needs them, so the web workers never load them.
+    """
+
+    def __init__(self, app):
+        super().__init__('db', help='Perform database migrations.')
+        self.app = app
+        self._group = None
+
+    def _migrate_group(self):
+        if self._group is None:
+            from flask_migrate import Migrate
+            # Registers Flask-Migrate's own "db" group in place of this one
+            Migrate(self.app, db)
+            self._group = self.app.cli.commands['db']
+        return self._group
+
+    def list_commands(self, ctx):
+        return self._migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_group().get_command(ctx, name)
+
+
+@tasks_cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the task statistics tables from the tasks and archive tables."""
+    by_status, by_day = rebuild_stats()
+    click.echo(f'Rebuilt counts for {len(by_status)} statuses and {len(by_day)} days.')
+
+
+@tasks_cli.command('check-stats')
+def check_stats_command():
+    """Verify the task statistics tables match the tasks and archive tables."""
+    differences = stats_differences()
+    if not differences:
+        click.echo('Task statistics are consistent.')
+        return
+    for kind, key, stored, live in differences:
+        click.echo(f'{kind} {key}: stored {stored}, actual {live}')
+    raise click.ClickException(
+        f'{len(differences)} statistics differ; run "flask tasks rebuild-stats" to repair them.'
+    )
+
+
+@tasks_cli.command('archive')
+@click.option('--older-than-days', type=float, help='Override ARCHIVE_AFTER_DAYS.')
+@click.option('--batch-size', type=int, help='Override ARCHIVE_BATCH_SIZE.')
+@click.option('--pause', type=float, help='Override ARCHIVE_BATCH_PAUSE (seconds).')
+def archive_command(older_than_days, batch_size, pause):
+    """Move old completed tasks to the tasks_archive table."""
+    configured = get_task_archiver()
+    archiver = TaskArchiver(
+        current_app,
+        after_days=configured.after_days if older_than_days is None else older_than_days,
+        batch_size=configured.batch_size if batch_size is None else batch_size,
+        pause=configured.pause if pause is None else pause
+    )
+    started = time.perf_counter()
+    moved = archiver.run(progress=lambda total: click.echo(f'  {total} tasks archived'))
+    elapsed = time.perf_counter() - started
+    click.echo(f'Archived {moved} tasks in {elapsed:.1f} s.')
+
+
+class TransferProgress:
+    """Prints the running total and rate of an export or import to stderr."""
+
+    def __init__(self, verb, resumed_rows=0):
+        self.verb = verb
+        self.resumed_rows = resumed_rows
+        # The last total reported, i.e. the rows written (or committed) so far
+        self.rows = resumed_rows
+        self.started = time.perf_counter()
+
+    def _rate(self, rows):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return elapsed, (rows - self.resumed_rows) / elapsed
+
+    def __call__(self, rows):
+        self.rows = rows
+        click.echo(f'  {rows} tasks {self.verb}, {self._rate(rows)[1]:.0f} rows/s', err=True)
+
+    def finish(self, rows):
+        elapsed, rate = self._rate(rows)
+        click.echo(f'{self.verb.capitalize()} {rows - self.resumed_rows} tasks in '
+                   f'{elapsed:.1f} s ({rate:.0f} rows/s).', err=True)
+
+
+@tasks_cli.command('export')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS),
+              help='Output format; by default taken from the file extension.')
+@click.option('--batch-size', default=10000, show_default=True, help='Tasks read per query.')
+@click.option('--include-archived', is_flag=True, help='Export archived tasks too.')
+@click.option('--resume', is_flag=True, help='Continue an interrupted export of PATH.')
+def export_command(path, fmt, batch_size, include_archived, resume):
+    """Write every task to PATH ("-" for stdout) as CSV or NDJSON."""
+    try:
+        fmt = detect_format(path, fmt) if path != '-' else fmt or 'ndjson'
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    checkpoint = state = None
+    if path == '-':
+        out = sys.stdout.buffer
+    else:
+        checkpoint = Checkpoint(path)
+        state = checkpoint.load() if resume else None
+        if resume and state is None:
+            click.echo(f'No checkpoint for {path}; starting over.', err=True)
+        out = open(path, 'r+b' if state else 'wb')
+        if state:
+            out.truncate(state['size'])
+            out.seek(state['size'])
+    
+    progress = TransferProgress('exported', state['rows'] if state else 0)
+    try:
+        rows = export_tasks(db.session, out, fmt, batch_size=batch_size,
+                            include_archived=include_archived, checkpoint=checkpoint,
+                            state=state, progress=progress)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    if checkpoint is not None:
+        checkpoint.clear()
+    progress.finish(rows)
+
+
+@tasks_cli.command('import')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS),
+              help='Input format; by default taken from the file extension.')
+@click.option('--batch-size', default=10000, show_default=True,
+              help='Tasks inserted per statement.')
+@click.option('--commit-rows', default=100000, show_default=True,
+              help='Tasks inserted per transaction.')
+@click.option('--resume', is_flag=True, help='Skip the tasks an interrupted import committed.')
+def import_command(path, fmt, batch_size, commit_rows, resume):
+    """Insert tasks from a CSV or NDJSON file at PATH ("-" for stdin).
+
+    Tasks keep the ids they were exported with; items without one get a new id.
+    """
+    try:
+        fmt = detect_format(path, fmt) if path != '-' else fmt or 'ndjson'
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    checkpoint = Checkpoint(path) if path != '-' else None
+    state = checkpoint.load() if resume and checkpoint is not None else None
+    
+    progress = TransferProgress('imported', state['rows'] if state else 0)
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        rows = import_tasks(db.session, read_items(stream, fmt), batch_size=batch_size,
+                            commit_rows=commit_rows, checkpoint=checkpoint, state=state,
+                            progress=progress)
+    except (ValueError, IntegrityError) as e:
+        message = str(e.orig if isinstance(e, IntegrityError) else e)
+        if progress.rows == 0:
+            message += '\nNo tasks were imported.'
+        elif checkpoint is not None:
+            message += (f'\nThe first {progress.rows} rows are imported, as recorded in '
+                        f'{checkpoint.path}; fix the failing row and rerun with --resume.')
+        else:
+            message += (f'\nThe first {progress.rows} rows are imported; leave them out '
+                        'when rerunning.')
+        raise click.ClickException(message)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    if checkpoint is not None:
+        checkpoint.clear()
+    progress.finish(rows)
+
+
+@tasks_cli.command('slow-queries')
+@click.option('--limit', default=20, show_default=True, help='Number of entries to show.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the entries as JSON lines.')
+@click.option('--clear', is_flag=True, help='Empty the log after printing it.')
+def slow_queries_command(limit, as_json, clear):
+    """Show the most recent slow SQL statements, newest first."""
+    log = get_slow_query_log()
+    if log is None:
+        raise click.ClickException('The slow query log is disabled; set SLOW_QUERY_LOG_ENABLED=true.')
+    entries = log.entries(limit)
+    for entry in entries:
+        if as_json:
+            click.echo(json.dumps(entry))
+            continue
+        click.echo(f"{entry['time']}  {entry['duration_ms']:.1f} ms  {entry['route'] or '-'}")
+        click.echo(f"  {entry['statement']}")
+        click.echo(f"  parameters: {entry['parameters']}")
+        for line in entry['plan'] or []:
+            click.echo(f'  plan: {line}')
+    if not entries and not as_json:
+        click.echo('No slow queries recorded.')
+    if clear:
+        log.clear()
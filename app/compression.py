@@ -0,0 +1,208 @@
+"""gzip/deflate compression of responses and precompressed static files.
+
+Text responses (JSON, NDJSON, HTML, CSS, JavaScript) of at least
+COMPRESSION_MIN_SIZE bytes are compressed for clients that accept it,
+preferring gzip. Streamed responses are compressed chunk by chunk as
+they are generated, so memory stays flat for long NDJSON exports.
+
+Static files are compressed once at startup into the instance folder,
+and served from there, so they are never compressed per request.
+Compressed responses carry a weak ETag, like any other encoding of the
+same content; If-None-Match compares ETags weakly, so revalidation keeps
+working across encodings.
+"""
+import mimetypes
+import os
+import zlib
+
+from flask import request, send_from_directory
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+    'image/svg+xml',
+})
+ENCODINGS = ('gzip', 'deflate')
+# zlib window bits selecting each Content-Encoding's framing
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def choose_encoding(accept_encoding):
+    """Pick gzip or deflate from an Accept-Encoding header, or None.
+
+    Honours q-values (``gzip;q=0`` refuses gzip) and prefers gzip on a tie.
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    best = None
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def compressor(encoding, level=6):
+    """A zlib compressor producing the given Content-Encoding."""
+    return zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+
+
+def compress(data, encoding, level=6):
+    stream = compressor(encoding, level)
+    return stream.compress(data) + stream.flush()
+
+
+def compress_chunks(chunks, encoding, level=6):
+    """Compress an iterable of byte chunks lazily, yielding compressed data."""
+    stream = compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def is_compressible(mimetype, status_code, headers):
+    """Whether a response of this type and status may be compressed."""
+    return (mimetype in COMPRESSIBLE_MIMETYPES
+            and 200 <= status_code < 300 and status_code not in (204, 206)
+            and 'Content-Encoding' not in headers)
+
+
+def add_vary(headers):
+    vary = headers.get('Vary', '')
+    if 'accept-encoding' not in vary.lower():
+        headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+
+def weak_etag(etag):
+    """The weak form of a quoted ETag header value."""
+    if not etag or etag.startswith('W/'):
+        return etag
+    return f'W/{etag}'
+
+
+def compress_response(response, level, min_size):
+    """Compress a Flask response in place when the request accepts it."""
+    if response.direct_passthrough or not is_compressible(
+            response.mimetype, response.status_code, response.headers):
+        return response
+    add_vary(response.headers)
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        original = response.response
+        chunks = response.iter_encoded()
+
+        def stream():
+            try:
+                yield from compress_chunks(chunks, encoding, level)
+            finally:
+                # Runs the original iterable's cleanup (e.g. stream_with_context)
+                close = getattr(original, 'close', None)
+                if close is not None:
+                    close()
+
+        response.response = stream()
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = weak_etag(response.headers['ETag'])
+    return response
+
+
+def precompress_static(static_folder, target_folder, level=9, min_size=0):
+    """Write ``.gz`` copies of the compressible static files to ``target_folder``.
+
+    Copies newer than their source are kept. Returns the set of static
+    filenames (relative, with forward slashes) that have a compressed copy.
+    """
+    compressed = set()
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            source = os.path.join(root, name)
+            mimetype = mimetypes.guess_type(name)[0]
+            if mimetype not in COMPRESSIBLE_MIMETYPES or os.path.getsize(source) < min_size:
+                continue
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            target = os.path.join(target_folder, relative + '.gz')
+            if (not os.path.exists(target)
+                    or os.path.getmtime(target) < os.path.getmtime(source)):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(source, 'rb') as f:
+                    data = compress(f.read(), 'gzip', level)
+                # Write then rename, so concurrent workers never serve a partial file
+                partial = f'{target}.{os.getpid()}.tmp'
+                with open(partial, 'wb') as f:
+                    f.write(data)
+                os.replace(partial, target)
+            compressed.add(relative)
+    return compressed
+
+
+def init_app(app):
+    """Compress responses and serve precompressed static files when enabled."""
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+    level = app.config['COMPRESSION_LEVEL']
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+
+    @app.after_request
+    def compress_responses(response):
+        return compress_response(response, level, min_size)
+
+    if not app.static_folder or not os.path.isdir(app.static_folder):
+        return
+    target_folder = os.path.join(app.instance_path, 'precompressed')
+    try:
+        precompressed = precompress_static(app.static_folder, target_folder,
+                                           app.config['COMPRESSION_STATIC_LEVEL'], min_size)
+    except OSError as e:
+        app.logger.warning(f'Static files are served uncompressed: {e}')
+        return
+    send_static_file = app.view_functions['static']
+
+    def static(filename):
+        if filename not in precompressed or choose_encoding(
+                request.headers.get('Accept-Encoding')) != 'gzip':
+            response = send_static_file(filename=filename)
+        else:
+            response = send_from_directory(
+                target_folder, filename + '.gz',
+                mimetype=mimetypes.guess_type(filename)[0],
+                max_age=app.get_send_file_max_age(filename)
+            )
+            response.headers['Content-Encoding'] = 'gzip'
+        if filename in precompressed:
+            add_vary(response.headers)
+        return response
+
+    app.view_functions['static'] = static
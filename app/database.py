@@ -0,0 +1,56 @@
+from sqlalchemy import event
+
+from app.metrics import timed_pool_options
+from app.models import db
+
+
+def configure_engine(app):
+    """Validate the engine settings and turn them into engine options.
+
+    Must run before ``db.init_app``. Options already present in
+    SQLALCHEMY_ENGINE_OPTIONS take precedence over the generated ones.
+    """
+    from config.config import EngineSettings
+
+    settings = app.config.get('ENGINE_SETTINGS') or EngineSettings.from_env()
+    settings.validate()
+    app.config['ENGINE_SETTINGS'] = settings
+
+    options = timed_pool_options(app, settings.engine_options(app.config.get('SQLALCHEMY_DATABASE_URI')))
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def sqlite_pragmas(settings):
+    """Return the PRAGMA statements run on every new SQLite connection."""
+    return [
+        f'PRAGMA journal_mode={settings.sqlite_journal_mode}',
+        f'PRAGMA synchronous={settings.sqlite_synchronous}',
+        f'PRAGMA mmap_size={settings.sqlite_mmap_size}',
+        f'PRAGMA cache_size={settings.sqlite_cache_size}',
+        f'PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}',
+    ]
+
+
+def apply_sqlite_pragmas(engine, settings):
+    """Run the SQLite pragmas on each new connection of ``engine``."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(settings)
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', on_connect)
+
+
+def init_app(app):
+    """Apply per-connection SQLite pragmas to the app's engines."""
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config['ENGINE_SETTINGS'])
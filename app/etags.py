@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _micros(value):
+    """Microseconds since the epoch for a naive UTC datetime."""
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def task_etag(task_id, created_at, updated_at, fields=None):
+    """Strong ETag for one task, derived from its last modification time.
+
+    The tag has the form ``<id>-<micros>`` with the requested fields
+    appended for sparse representations, so ``parse_task_etag`` can
+    recover the version it was built from.
+    """
+    modified = updated_at or created_at
+    etag = f'{task_id}-{_micros(modified) if modified else 0}'
+    if fields is not None:
+        etag += '-' + '.'.join(fields)
+    return etag
+
+
+def serialized_task_etag(task):
+    """``task_etag`` of a task serialized by ``Task.to_dict``."""
+    created_at, updated_at = (datetime.fromisoformat(task[name]) if task[name] else None
+                              for name in ('created_at', 'updated_at'))
+    return task_etag(task['id'], created_at, updated_at)
+
+
+def parse_task_etag(etag):
+    """Return the task id and modification time a ``task_etag`` was built from.
+
+    Returns None for anything that is not a task ETag.
+    """
+    parts = etag.split('-')
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    return int(parts[0]), EPOCH + timedelta(microseconds=int(parts[1]))
+
+
+def if_match_versions(if_match, task_id):
+    """Modification times of a task that satisfy an If-Match header.
+
+    ``if_match`` is a werkzeug ETags. Returns None when any version will
+    do (no header, or ``*``), otherwise a possibly empty list. Weak tags
+    count: the only ones handed out are compressed encodings of a strong one.
+    """
+    if not if_match or if_match.star_tag:
+        return None
+    versions = []
+    for etag in if_match.as_set(include_weak=True):
+        parsed = parse_task_etag(etag)
+        if parsed is not None and parsed[0] == task_id:
+            versions.append(parsed[1])
+    return versions
+
+
+def list_etag(version, args, mimetype):
+    """Strong ETag for a list response at the given tasks table version."""
+    key = repr((sorted(args.items(multi=True)), mimetype)).encode()
+    return f'v{version}-{hashlib.sha1(key).hexdigest()[:16]}'
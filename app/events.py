@@ -0,0 +1,156 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models import db, TaskEvent
+
+
+EVENT_COLUMNS = (TaskEvent.id, TaskEvent.kind, TaskEvent.data)
+
+
+class Subscriber:
+    """An SSE client's queue of pending events."""
+
+    def __init__(self, max_pending):
+        self.events = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Fans task change events out to the SSE clients of this process.
+
+    Writes from any worker land in the task_events table. A single thread
+    per process polls it for rows newer than the last one seen and hands
+    them to every local subscriber, so the database sees one cheap indexed
+    query per poll interval no matter how many clients are connected. The
+    thread only runs while there are subscribers.
+
+    Every connected client holds a worker thread for as long as it stays
+    connected, so at most ``max_subscribers`` are accepted per process.
+    """
+
+    def __init__(self, app, poll_interval=0.5, max_pending=1000, retention=3600,
+                 max_subscribers=4):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.retention = retention
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._position = None
+        self._last_prune = 0
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber, returning it with the backlog it missed.
+
+        With ``last_event_id`` the backlog holds the events after that id;
+        otherwise the subscriber only receives events from now on. The
+        subscriber is None when this process already has ``max_subscribers``.
+        """
+        subscriber = Subscriber(self.max_pending)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None, []
+            # Without a running poller the position is stale: events written
+            # since it stopped were never delivered and are not live anymore
+            if not self._running():
+                self._position = self._latest_id()
+            position = self._position
+            self._subscribers.add(subscriber)
+            self._ensure_running()
+        
+        backlog = []
+        if last_event_id is not None and last_event_id < position:
+            backlog = db.session.execute(
+                db.select(*EVENT_COLUMNS)
+                .where(TaskEvent.id > last_event_id, TaskEvent.id <= position)
+                .order_by(TaskEvent.id)
+            ).all()
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _latest_id(self):
+        return db.session.scalar(db.select(db.func.max(TaskEvent.id))) or 0
+
+    def _running(self):
+        # A thread started before a fork does not exist in the child
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _ensure_running(self):
+        if self._running():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='task-change-feed', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                with self.app.app_context():
+                    self.poll()
+                    self._prune()
+            except Exception:
+                self.app.logger.exception('Polling the task change feed failed')
+            time.sleep(self.poll_interval)
+
+    def poll(self):
+        """Deliver events written since the last poll to every subscriber."""
+        events = db.session.execute(
+            db.select(*EVENT_COLUMNS).where(TaskEvent.id > self._position).order_by(TaskEvent.id)
+        ).all()
+        db.session.remove()
+        if not events:
+            return
+        with self._lock:
+            self._position = events[-1].id
+            for subscriber in list(self._subscribers):
+                for event in events:
+                    try:
+                        subscriber.events.put_nowait(event)
+                    except queue.Full:
+                        # Too far behind to catch up; the client has to refetch
+                        subscriber.overflowed = True
+                        self._subscribers.discard(subscriber)
+                        break
+
+    def _prune(self):
+        now = time.monotonic()
+        if now - self._last_prune < self.retention / 10:
+            return
+        self._last_prune = now
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        db.session.execute(db.delete(TaskEvent).where(TaskEvent.created_at < cutoff))
+        db.session.commit()
+
+
+def format_event(event):
+    """Render a task_events row in the text/event-stream format."""
+    return f'id: {event.id}\nevent: {event.kind}\ndata: {event.data}\n\n'
+
+
+def get_change_feed():
+    return current_app.extensions['task_feed']
+
+
+def init_app(app):
+    app.extensions['task_feed'] = ChangeFeed(
+        app,
+        poll_interval=app.config['TASK_EVENTS_POLL_INTERVAL'],
+        max_pending=app.config['TASK_EVENTS_MAX_PENDING'],
+        retention=app.config['TASK_EVENTS_RETENTION'],
+        max_subscribers=app.config['TASK_EVENTS_MAX_SUBSCRIBERS']
+    )
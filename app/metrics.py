@@ -0,0 +1,227 @@
+"""Prometheus metrics for the HTTP API and the database.
+
+Request hooks record per-route latency, request/response sizes and the
+number of SQL statements (and the time spent in them) each request ran;
+engine events count every statement and a pool subclass times how long
+each connection checkout waited. Everything is served as Prometheus text
+at ``/metrics``.
+
+With several worker processes (gunicorn, ``uvicorn --workers``) set
+``PROMETHEUS_MULTIPROC_DIR`` to a directory shared by the workers and
+empty at server start: each worker then writes its samples to its own
+files there and ``/metrics`` sums them, whichever worker serves the
+scrape. ``gunicorn.conf.py`` clears the directory on start and drops the
+gauges of workers that exit.
+"""
+import os
+import threading
+import time
+
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.cache import get_task_cache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+# Cache counters are copied into gauges at most this often per process
+CACHE_STATS_INTERVAL = 1.0
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class Metrics:
+    """The process's metric objects and how to collect them."""
+
+    def __init__(self, multiprocess_dir=None):
+        # prometheus_client picks its value storage when first imported
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = multiprocess_dir
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.multiprocess_dir = multiprocess_dir
+        self.registry = CollectorRegistry()
+        registry = self.registry
+
+        self.requests = Counter(
+            'http_requests', 'HTTP requests by route and status.',
+            ['method', 'route', 'status'], registry=registry)
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Time to build the HTTP response.',
+            ['method', 'route'], buckets=LATENCY_BUCKETS, registry=registry)
+        self.request_bytes = Counter(
+            'http_request_bytes', 'Request body bytes received.',
+            ['method', 'route'], registry=registry)
+        self.response_bytes = Counter(
+            'http_response_bytes', 'Response body bytes sent (streamed bodies excluded).',
+            ['method', 'route'], registry=registry)
+        self.request_queries = Histogram(
+            'http_request_db_queries', 'SQL statements run per request.',
+            ['method', 'route'], buckets=QUERY_COUNT_BUCKETS, registry=registry)
+        self.request_db_time = Histogram(
+            'http_request_db_seconds', 'Time spent in SQL statements per request.',
+            ['method', 'route'], buckets=DB_TIME_BUCKETS, registry=registry)
+        self.queries = Counter(
+            'db_queries', 'SQL statements run, inside requests or not.', registry=registry)
+        self.query_time = Counter(
+            'db_query_seconds', 'Time spent in SQL statements.', registry=registry)
+        self.pool_checkout = Histogram(
+            'db_pool_checkout_wait_seconds', 'Time waited for a pooled connection.',
+            buckets=CHECKOUT_BUCKETS, registry=registry)
+        self.cache_entries = Gauge(
+            'task_cache_entries', 'Entries in the task read cache.',
+            registry=registry, multiprocess_mode='livesum')
+        self.cache_events = Gauge(
+            'task_cache_events', 'Task read cache lookups and removals since start.',
+            ['event'], registry=registry, multiprocess_mode='livesum')
+        self._cache_updated = 0.0
+
+    def record_request(self, method, route, status, seconds, request_bytes, response_bytes,
+                       queries, db_seconds):
+        """Record one finished request."""
+        self.requests.labels(method, route, str(status)).inc()
+        self.latency.labels(method, route).observe(seconds)
+        if request_bytes:
+            self.request_bytes.labels(method, route).inc(request_bytes)
+        if response_bytes:
+            self.response_bytes.labels(method, route).inc(response_bytes)
+        self.request_queries.labels(method, route).observe(queries)
+        self.request_db_time.labels(method, route).observe(db_seconds)
+
+    def record_cache(self, stats):
+        """Copy the task cache counters, at most once per CACHE_STATS_INTERVAL."""
+        now = time.monotonic()
+        if now - self._cache_updated < CACHE_STATS_INTERVAL:
+            return
+        self._cache_updated = now
+        self.cache_entries.set(stats['entries'])
+        for name in ('hits', 'misses', 'evictions', 'invalidations'):
+            self.cache_events.labels(name).set(stats[name])
+
+    def exposition(self):
+        """Return ``(body, content_type)`` for a scrape."""
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+
+        registry = self.registry
+        if self.multiprocess_dir:
+            from prometheus_client import multiprocess
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=self.multiprocess_dir)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def get_metrics():
+    """Return the process's Metrics, or None before metrics are enabled."""
+    return _metrics
+
+
+class CheckoutTimer:
+    """Pool mixin recording how long each connection checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if _metrics is not None:
+                _metrics.pool_checkout.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(CheckoutTimer, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def timed_pool_options(app, options, asyncio=False):
+    """Switch sized pools in engine ``options`` to a checkout-timing pool class.
+
+    Pools without sizing (in-memory SQLite) and an explicit poolclass are
+    left alone.
+    """
+    if not app.config.get('METRICS_ENABLED') or 'pool_size' not in options:
+        return options
+    if options.get('poolclass') not in (None, QueuePool, AsyncAdaptedQueuePool):
+        return options
+    options['poolclass'] = TimedAsyncAdaptedQueuePool if asyncio else TimedQueuePool
+    return options
+
+
+def start_request():
+    """Start timing a request and counting its SQL statements."""
+    g.metrics_started = time.perf_counter()
+    g.metrics_db = [0, 0.0]
+
+
+def finish_request(method, route, status, request_bytes, response_bytes):
+    """Record the request started by ``start_request`` in this app context."""
+    started = g.pop('metrics_started', None)
+    if _metrics is None or started is None:
+        return
+    queries, db_seconds = g.pop('metrics_db')
+    _metrics.record_request(method, route, status, time.perf_counter() - started,
+                            request_bytes, response_bytes, queries, db_seconds)
+    cache = get_task_cache()
+    if cache is not None:
+        _metrics.record_cache(cache.stats())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_query_started', None)
+    if started is None or _metrics is None:
+        return
+    elapsed = time.perf_counter() - started
+    _metrics.queries.inc()
+    _metrics.query_time.inc(elapsed)
+    if has_app_context():
+        counts = g.get('metrics_db')
+        if counts is not None:
+            counts[0] += 1
+            counts[1] += elapsed
+
+
+def init_app(app):
+    """Install the request hooks, SQL listeners and the ``/metrics`` route."""
+    global _metrics
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(app.config.get('METRICS_DIR'))
+        # Listens on every engine: the primary, replicas and the async API's
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    metrics = _metrics
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def metrics_start_request():
+        start_request()
+
+    @app.after_request
+    def metrics_finish_request(response):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        # Measuring a streamed body would consume it (the SSE feed never ends)
+        size = response.content_length if response.is_streamed else response.calculate_content_length()
+        finish_request(request.method, route, response.status_code,
+                       request.content_length or 0, size or 0)
+        return response
+
+    @app.route('/metrics')
+    def metrics_view():
+        body, content_type = metrics.exposition()
+        return Response(body, content_type=content_type)
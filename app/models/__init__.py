@@ -1,3 +1,9 @@
-from app.models.task import Task, db
+from app.models.task import Task, db, TASK_FIELDS, serialize_task
+from app.models.table_version import TableVersion
+from app.models.task_archive import TaskArchive
+from app.models.task_event import TaskEvent
+from app.models.task_search import search_statement
+from app.models.task_stats import TaskStatusCount, TaskDailyCount
 
-__all__ = ['Task', 'db'] 
\ No newline at end of file
+__all__ = ['Task', 'TaskArchive', 'TableVersion', 'TaskEvent', 'TaskStatusCount',
+           'TaskDailyCount', 'db', 'TASK_FIELDS', 'serialize_task', 'search_statement']
@@ -0,0 +1,40 @@
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+READ_METHODS = frozenset(['GET', 'HEAD'])
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of GET requests to a read replica.
+
+    Replica routing applies only inside a request and only when a replica
+    router is installed (see ``app.replicas``). Flushes and DML statements
+    always go to the primary and make the rest of the request read from
+    the primary too, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            replica = self._replica_bind(clause)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_bind(self, clause):
+        if not has_request_context():
+            return None
+        router = current_app.extensions.get('replica_router')
+        if router is None:
+            return None
+        if self._flushing or getattr(clause, 'is_dml', False):
+            g.db_wrote = True
+            return None
+        if request.method not in READ_METHODS or g.get('db_wrote') or g.get('db_read_primary'):
+            return None
+        if router.sticky(request):
+            return None
+        
+        # One replica per session keeps a request's reads consistent
+        if 'replica' not in self.info:
+            self.info['replica'] = router.choose()
+        return self.info['replica']
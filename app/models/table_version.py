@@ -0,0 +1,28 @@
+from app.models.task import db
+
+class TableVersion(db.Model):
+    """Change counter for a table, bumped by every write made through the API."""
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(cls, name, session=None):
+        """Return the current version of the named table."""
+        session = session or db.session
+        version = session.scalar(db.select(cls.version).where(cls.name == name))
+        return version or 0
+
+    @classmethod
+    def bump(cls, name, session=None):
+        """Increment the version of the named table in the current transaction."""
+        session = session or db.session
+        result = session.execute(
+            db.update(cls).where(cls.name == name).values(version=cls.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(cls(name=name, version=1))
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}: {self.version}>'
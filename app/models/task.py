@@ -1,10 +1,31 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from app.models.session import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'created_at', 'updated_at')
+DATETIME_FIELDS = frozenset(['created_at', 'updated_at'])
+
+def serialize_task(obj, fields=TASK_FIELDS):
+    """Serialize the given fields of a Task or a result row to a dict."""
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        if field in DATETIME_FIELDS and value is not None:
+            value = value.isoformat()
+        data[field] = value
+    return data
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_created_at_id', 'created_at', 'id'),
+        db.Index('ix_tasks_status_created_at_id', 'status', 'created_at', 'id'),
+        # Never hand out the id of an archived task again
+        {'sqlite_autoincrement': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -13,7 +34,9 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return serialize_task(self, fields)
         return {
             'id': self.id,
             'title': self.title,
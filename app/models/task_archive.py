@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, event
+
+from app.models.task import Task, db
+
+class TaskArchive(db.Model):
+    """Completed tasks moved out of the tasks table by ``app.archive``, under their own ids."""
+    __tablename__ = 'tasks_archive'
+    __table_args__ = (
+        db.Index('ix_tasks_archive_created_at_id', 'created_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    to_dict = Task.to_dict
+
+    def __repr__(self):
+        return f'<TaskArchive {self.id}: {self.title}>'
+
+# Archived tasks still count towards the statistics: moving a task nets to
+# zero, and deleting one from the archive decrements the aggregates. The
+# same DDL is applied by the add_tasks_archive migration.
+SQLITE_DDL = [
+    """CREATE TRIGGER tasks_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+        INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + 1;
+    END""",
+    """CREATE TRIGGER tasks_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        UPDATE task_daily_counts SET created_count = created_count - 1
+        WHERE day = date(old.created_at);
+    END""",
+]
+
+# task_stats_apply() is created along with the tasks table
+POSTGRES_DDL = [
+    """CREATE TRIGGER tasks_archive_stats AFTER INSERT OR DELETE ON tasks_archive
+    FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(TaskArchive.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(TaskArchive.__table__, 'after_create',
+                 DDL(statement).execute_if(dialect='postgresql'))
@@ -0,0 +1,15 @@
+from datetime import datetime
+from app.models.task import db
+
+class TaskEvent(db.Model):
+    """Change log of task writes, polled by every worker to feed /api/tasks/events."""
+    __tablename__ = 'task_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<TaskEvent {self.id}: {self.kind} {self.task_id}>'
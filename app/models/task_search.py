@@ -0,0 +1,113 @@
+import re
+
+from sqlalchemy import DDL, event, func, literal_column, table, column
+
+from app.models.task import Task, db
+
+# Full-text index over task titles and descriptions. On SQLite this is an
+# external-content FTS5 table kept in sync by triggers; on PostgreSQL it is
+# a generated tsvector column with a GIN index. The same DDL is applied by
+# the add_task_search migration.
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+POSTGRES_DDL = [
+    """ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+# The triggers go with the tasks table, but the FTS5 table has to be dropped explicitly
+event.listen(Task.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS tasks_fts').execute_if(dialect='sqlite'))
+
+tasks_fts = table('tasks_fts', column('rowid'), column('tasks_fts'))
+
+# Schema objects the DDL above creates outside the model, which schema
+# comparisons (``flask db check`` and autogenerate) have to skip: the FTS5
+# table with its shadow tables, and the PostgreSQL column and its index
+SEARCH_TABLES = frozenset(['tasks_fts'] + [
+    f'tasks_fts_{suffix}' for suffix in ('config', 'content', 'data', 'docsize', 'idx')])
+SEARCH_COLUMNS = frozenset([('tasks', 'search_vector')])
+SEARCH_INDEXES = frozenset(['ix_tasks_search_vector'])
+
+
+def is_search_object(name, type_, table_name=None):
+    """Whether a reflected schema object belongs to the full-text index."""
+    if type_ == 'table':
+        return name in SEARCH_TABLES
+    if type_ == 'column':
+        return (table_name, name) in SEARCH_COLUMNS
+    if type_ == 'index':
+        return name in SEARCH_INDEXES
+    return False
+
+# Relative weight of title matches over description matches
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def fts5_query(text):
+    """Turn free text into an FTS5 query matching every word, the last as a prefix.
+
+    Quoting each word keeps FTS5 operators and punctuation in user input
+    from being parsed as query syntax.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_statement(text, columns, dialect_name):
+    """Build a ranked full-text search over tasks selecting the given columns.
+
+    Results are ordered best match first, ties broken by id. Returns None
+    when the text contains nothing to search for.
+    """
+    tasks = Task.__table__
+    if dialect_name == 'postgresql':
+        if not re.search(r'\w', text):
+            return None
+        query = func.websearch_to_tsquery('english', text)
+        vector = literal_column('tasks.search_vector')
+        rank = func.ts_rank_cd(vector, query)
+        return (db.select(*columns)
+                .where(vector.op('@@')(query))
+                .order_by(rank.desc(), tasks.c.id))
+    
+    match = fts5_query(text)
+    if match is None:
+        return None
+    rank = func.bm25(literal_column('tasks_fts'), TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+    return (db.select(*columns)
+            .select_from(tasks_fts.join(tasks, tasks.c.id == tasks_fts.c.rowid))
+            .where(tasks_fts.c.tasks_fts.op('MATCH')(match))
+            .order_by(rank, tasks.c.id))
@@ -0,0 +1,87 @@
+from sqlalchemy import DDL, event
+
+from app.models.task import Task, db
+
+class TaskStatusCount(db.Model):
+    """Number of tasks per status, maintained by triggers on the tasks table."""
+    __tablename__ = 'task_status_counts'
+
+    status = db.Column(db.String(20), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TaskStatusCount {self.status}: {self.task_count}>'
+
+class TaskDailyCount(db.Model):
+    """Number of tasks created per UTC day, maintained by triggers on the tasks table."""
+    __tablename__ = 'task_daily_counts'
+
+    day = db.Column(db.Date, primary_key=True)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TaskDailyCount {self.day}: {self.created_count}>'
+
+# The aggregates are kept current by triggers, so they change in the same
+# transaction as every write to tasks, whichever code path issued it. The
+# same DDL is applied by the add_task_stats migration.
+SQLITE_DDL = [
+    """CREATE TRIGGER task_stats_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+        INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + 1;
+    END""",
+    """CREATE TRIGGER task_stats_ad AFTER DELETE ON tasks BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        UPDATE task_daily_counts SET created_count = created_count - 1
+        WHERE day = date(old.created_at);
+    END""",
+    """CREATE TRIGGER task_stats_au AFTER UPDATE OF status ON tasks
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+    END""",
+]
+
+POSTGRES_DDL = [
+    """CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IS NOT NULL THEN
+            UPDATE task_status_counts SET task_count = task_count - 1
+            WHERE status = OLD.status;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IS NOT NULL THEN
+            INSERT INTO task_status_counts (status, task_count) VALUES (NEW.status, 1)
+            ON CONFLICT (status) DO UPDATE
+            SET task_count = task_status_counts.task_count + 1;
+        END IF;
+        IF TG_OP = 'INSERT' AND NEW.created_at IS NOT NULL THEN
+            INSERT INTO task_daily_counts (day, created_count) VALUES (NEW.created_at::date, 1)
+            ON CONFLICT (day) DO UPDATE
+            SET created_count = task_daily_counts.created_count + 1;
+        END IF;
+        IF TG_OP = 'DELETE' AND OLD.created_at IS NOT NULL THEN
+            UPDATE task_daily_counts SET created_count = created_count - 1
+            WHERE day = OLD.created_at::date;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER task_stats AFTER INSERT OR DELETE OR UPDATE OF status ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
@@ -0,0 +1,60 @@
+"""The index page, with the first page of tasks embedded in it.
+
+The page carries the tasks as an inline JSON bootstrap that app.js
+renders straight away, so first paint takes a single request. The
+bootstrap also holds the id of the latest change event, read before the
+tasks: app.js resumes the change feed from there, so writes made after
+the page was built, or while it sat in the cache, still reach the client.
+
+Rendered pages are kept in the task cache under a list key, so task
+writes invalidate them like any other list.
+"""
+from flask import current_app, render_template, request
+
+from app.cache import get_read_cache, read_source
+from app.models import db, TableVersion, TaskEvent, TASK_FIELDS
+from app.queries import task_list_statement
+from app.pagination import encode_cursor
+from app.serialization import row_encoder
+from app.validation import VALID_STATUSES
+
+
+def index_bootstrap(status, limit):
+    """The data app.js starts from: a first page of tasks and the feed position."""
+    last_event_id = db.session.scalar(db.select(db.func.max(TaskEvent.id))) or 0
+    rows = db.session.execute(
+        task_list_statement(TASK_FIELDS, status).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    encode = row_encoder(TASK_FIELDS)
+    return {
+        'filter': status or 'all',
+        'tasks': [encode(row) for row in rows],
+        'next_cursor': next_cursor,
+        'last_event_id': last_event_id
+    }
+
+
+def render_index():
+    """Render index.html for the ``status`` filter in the query string."""
+    status = request.args.get('status')
+    status = status if status in VALID_STATUSES else None
+
+    cache = get_read_cache()
+    cache_key = ('list', 'index', status)
+    if cache is not None:
+        # Like the API's lists, pages are only served at the version they were read at
+        tag = (read_source(), TableVersion.current('tasks'))
+        cached = cache.get(cache_key, tag)
+        if cached is not None:
+            return cached
+        generation = cache.generation
+
+    bootstrap = index_bootstrap(status, current_app.config['TASKS_INDEX_PAGE_SIZE'])
+    html = render_template('index.html', bootstrap=bootstrap)
+    if cache is not None:
+        cache.set(cache_key, html, len(html), generation, tag)
+    return html
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def _encode(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _decode(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(task):
+    """Encode the (created_at, id) position of a task as an opaque cursor."""
+    return _encode([task.created_at.isoformat(), task.id])
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (created_at, id) tuple.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        created_at, task_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def encode_offset_cursor(offset):
+    """Encode a result offset as an opaque cursor, for ranked results."""
+    return _encode({'offset': offset})
+
+
+def decode_offset_cursor(cursor):
+    """Decode an offset cursor. Raises ValueError if it is malformed."""
+    try:
+        offset = _decode(cursor)['offset']
+    except (TypeError, KeyError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def after_cursor(created_at_column, id_column, position):
+    """Keyset predicate selecting rows strictly after the given position.
+
+    The leading ``created_at >= ?`` term lets the planner seek into the
+    (created_at, id) indexes instead of scanning from the first row.
+    """
+    created_at, task_id = position
+    return and_(
+        created_at_column >= created_at,
+        or_(created_at_column > created_at, id_column > task_id)
+    )
+
+
+def parse_limit(value, max_limit):
+    """Parse the ``limit`` query parameter, clamping it to ``max_limit``.
+
+    Returns None when no limit was requested. Raises ValueError if the
+    value is not a positive integer.
+    """
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be a positive integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, max_limit)
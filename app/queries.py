@@ -0,0 +1,122 @@
+from app.models import db, Task, TaskArchive, TASK_FIELDS
+from app.pagination import after_cursor
+from app.validation import VALID_STATUSES
+
+tasks_table = Task.__table__
+archive_table = TaskArchive.__table__
+
+
+def task_source(include_archived=False):
+    """The tasks table, or its union with the archive when archived tasks are included."""
+    if not include_archived:
+        return tasks_table
+    return db.union_all(
+        db.select(*[tasks_table.c[name] for name in TASK_FIELDS]),
+        db.select(*[archive_table.c[name] for name in TASK_FIELDS])
+    ).subquery('all_tasks')
+
+
+def projection(fields, source=tasks_table):
+    """Columns to select for ``fields``, followed by any missing keyset columns."""
+    names = dict.fromkeys(fields + ('created_at', 'id'))
+    return [source.c[name] for name in names]
+
+
+def task_list_statement(fields, status=None, position=None, include_archived=False):
+    """Core select of the tasks page after ``position``, in keyset order.
+
+    Selects plain row tuples: no ORM instances or identity map, and only
+    the requested columns are read.
+    """
+    source = task_source(include_archived)
+    statement = db.select(*projection(fields, source))
+    if status and status in VALID_STATUSES:
+        statement = statement.where(source.c.status == status)
+    if position is not None:
+        statement = statement.where(after_cursor(source.c.created_at, source.c.id, position))
+    return statement.order_by(source.c.created_at, source.c.id)
+
+
+def task_modified_statement(task_id, include_archived=False):
+    """Select just the timestamps a task's ETag is derived from."""
+    source = task_source(include_archived)
+    return db.select(source.c.created_at, source.c.updated_at).where(source.c.id == task_id)
+
+
+def task_version_condition(versions):
+    """WHERE clause matching tasks last modified at one of the given times."""
+    return db.func.coalesce(Task.updated_at, Task.created_at).in_(versions)
+
+
+def task_fields_statement(task_id, fields, include_archived=False):
+    """Select the given fields of one task, plus what its ETag needs."""
+    source = task_source(include_archived)
+    return db.select(*projection(fields + ('updated_at',), source)).where(source.c.id == task_id)
+
+
+def existing_ids_statement(task_ids):
+    """Select which of the given task ids exist."""
+    return db.select(Task.id).where(Task.id.in_(task_ids))
+
+
+def bulk_insert_statement():
+    """Multi-row INSERT ... RETURNING, in the order the items were sent."""
+    return db.insert(Task).returning(Task, sort_by_parameter_order=True)
+
+
+def update_returning_statement(task_id, changes, versions=None):
+    """UPDATE ... RETURNING of one task, optionally only at the given versions.
+
+    Without changes the row is written back as it is, so the statement
+    still checks the versions and returns the task.
+    """
+    statement = db.update(Task).where(Task.id == task_id)
+    if versions is not None:
+        statement = statement.where(task_version_condition(versions))
+    statement = statement.values(**changes) if changes else statement.values(updated_at=Task.updated_at)
+    return statement.returning(Task).execution_options(
+        synchronize_session=False, populate_existing=True, task_cache_ids=(task_id,))
+
+
+def delete_returning_statement(task_id, versions=None):
+    """DELETE ... RETURNING of one task, optionally only at the given versions."""
+    statement = db.delete(Task).where(Task.id == task_id)
+    if versions is not None:
+        statement = statement.where(task_version_condition(versions))
+    return statement.returning(Task.id).execution_options(
+        synchronize_session=False, task_cache_ids=(task_id,))
+
+
+def bulk_delete_statement(task_ids):
+    """DELETE the given tasks without synchronizing the session."""
+    return db.delete(Task).where(Task.id.in_(task_ids)).execution_options(
+        synchronize_session=False)
+
+
+def archivable_condition(cutoff):
+    """WHERE clause matching completed tasks last modified before ``cutoff``."""
+    return db.and_(
+        Task.status == 'completed',
+        # Implied by the next term, but lets the planner seek the status index
+        Task.created_at < cutoff,
+        db.func.coalesce(Task.updated_at, Task.created_at) < cutoff
+    )
+
+
+def archive_candidates_statement(cutoff, limit):
+    """Select the ids of the oldest tasks due for archiving."""
+    return db.select(Task.id).where(archivable_condition(cutoff)).order_by(
+        Task.created_at, Task.id).limit(limit)
+
+
+def archive_delete_statement(task_ids, cutoff):
+    """DELETE ... RETURNING of the given tasks that are still due for archiving."""
+    return db.delete(Task).where(Task.id.in_(task_ids), archivable_condition(cutoff)).returning(
+        *[tasks_table.c[name] for name in TASK_FIELDS]
+    ).execution_options(synchronize_session=False, task_cache_ids=tuple(task_ids))
+
+
+def archive_rows_statement(task_ids, cutoff):
+    """Lock and select the given tasks that are still due for archiving."""
+    return db.select(*[tasks_table.c[name] for name in TASK_FIELDS]).where(
+        Task.id.in_(task_ids), archivable_condition(cutoff)).with_for_update()
@@ -0,0 +1,99 @@
+import itertools
+import time
+
+from flask import current_app, g
+from sqlalchemy import create_engine
+
+from app.database import apply_sqlite_pragmas
+from app.metrics import timed_pool_options
+
+STICKY_COOKIE = 'db_primary_until'
+
+
+class ReplicaRouter:
+    """Round-robin choice of read replica with failover to the primary.
+
+    A replica that cannot hand out a connection is skipped for
+    ``retry_interval`` seconds, after which it is tried again. When no
+    replica is available ``choose`` returns None and reads use the primary.
+    """
+
+    def __init__(self, engines, sticky_seconds=5, retry_interval=30):
+        self.engines = list(engines)
+        self.sticky_seconds = sticky_seconds
+        self.retry_interval = retry_interval
+        self._counter = itertools.count()
+        self._down_until = {}
+
+    def choose(self):
+        """Return the next available replica engine, or None."""
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self._down_until.get(engine, 0) > time.monotonic():
+                continue
+            if self._available(engine):
+                return engine
+            self._down_until[engine] = time.monotonic() + self.retry_interval
+        return None
+
+    def _available(self, engine):
+        # A pool checkout runs the pre-ping and reuses the connection later
+        try:
+            engine.pool.connect().close()
+        except engine.dialect.loaded_dbapi.Error as e:
+            current_app.logger.warning(f'Read replica {engine.url!r} unavailable: {e}')
+            return False
+        return True
+
+    def sticky(self, request):
+        """Whether the client wrote recently enough to read from the primary."""
+        try:
+            until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+
+def read_from_primary():
+    """Make the rest of the current request read from the primary."""
+    g.db_read_primary = True
+
+
+def init_app(app):
+    """Install the replica router when replica URLs are configured.
+
+    Replica engines are kept out of SQLALCHEMY_BINDS: they mirror the
+    primary's schema, so ``db.create_all`` and migrations must not touch them.
+    """
+    urls = app.config.get('DATABASE_REPLICA_URLS') or ()
+    if not urls:
+        return
+    
+    settings = app.config['ENGINE_SETTINGS']
+    engines = []
+    for url in urls:
+        engine = create_engine(url, **timed_pool_options(app, settings.engine_options(url)))
+        apply_sqlite_pragmas(engine, settings)
+        engines.append(engine)
+    
+    router = ReplicaRouter(
+        engines,
+        sticky_seconds=app.config.get('REPLICA_STICKY_SECONDS', 5),
+        retry_interval=app.config.get('REPLICA_RETRY_INTERVAL', 30)
+    )
+    app.extensions['replica_router'] = router
+    
+    @app.after_request
+    def mark_sticky(response):
+        # Replicas lag behind the primary, so a client that just wrote keeps
+        # reading from the primary for a while
+        if g.get('db_wrote') and router.sticky_seconds > 0:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + router.sticky_seconds),
+                max_age=int(router.sticky_seconds) or 1,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
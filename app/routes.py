@@ -1,92 +1,431 @@
-from flask import Blueprint, jsonify, request, render_template, abort
-from app.models import db, Task
+import queue
+from flask import (Blueprint, Response, jsonify, request, render_template, abort,
+                   current_app, g, stream_with_context)
+from app.models import db, Task, TableVersion, TASK_FIELDS, serialize_task, search_statement
+from app.cache import get_read_cache, read_source
+from app.events import get_change_feed, format_event
+from app.group_commit import get_task_writer
+from app.replicas import read_from_primary
+from app.stats import task_stats
+from app.etags import task_etag, list_etag, serialized_task_etag, if_match_versions
+from app.serialization import row_encoder
+from app.pagination import (encode_cursor, decode_cursor, parse_limit,
+                            encode_offset_cursor, decode_offset_cursor)
+from app.queries import (task_list_statement, task_modified_statement, task_fields_statement,
+                         existing_ids_statement)
+from app.writes import (add_task, update_task_by_id, delete_task_by_id, apply_bulk_changes,
+                        load_tasks)
+from app.validation import (VALID_STATUSES, new_task_values, task_changes, parse_fields,
+                            parse_flag, bulk_payload_error, bulk_referenced_ids,
+                            validate_bulk, bulk_error_results)
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# How long event stream clients wait before reconnecting
+EVENTS_RETRY_SECONDS = 3
+
+def _wants_ndjson():
+    """Whether the client asked for the streaming NDJSON representation."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def _serializer(fields):
+    """Return a function turning a Task or result row into a response dict."""
+    if fields is None:
+        return Task.to_dict
+    return lambda row: serialize_task(row, fields)
+
+def _cached_response(body, etag):
+    """Rebuild a JSON response from a cached body."""
+    return _with_etag(Response(body, mimetype='application/json'), etag)
+
+def _not_modified(etag):
+    """Empty 304 response carrying the matched ETag."""
+    return _with_etag(Response(status=304), etag)
+
+def _with_etag(response, etag):
+    """Attach an ETag and ask clients to revalidate before reusing the response."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _stream_tasks(statement, encode):
+    """Stream the statement's rows as one JSON object per line."""
+    batch_size = current_app.config['TASKS_STREAM_BATCH_SIZE']
+    
+    def generate():
+        # yield_per fetches in batches (server-side cursors on PostgreSQL),
+        # so memory stays flat regardless of how many rows match
+        result = db.session.execute(statement.execution_options(yield_per=batch_size))
+        dumps = current_app.json.dumps
+        for row in result:
+            yield dumps(encode(row)) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
 @api_bp.route('/tasks', methods=['GET'])
 def get_tasks():
-    """Get all tasks with optional status filter."""
+    """Get tasks with optional status filter and keyset pagination."""
     status = request.args.get('status')
     
-    if status and status in ['active', 'completed']:
-        tasks = Task.query.filter_by(status=status).all()
+    try:
+        limit = parse_limit(request.args.get('limit'),
+                            current_app.config['TASKS_MAX_PAGE_SIZE'])
+        cursor = request.args.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    include_archived = parse_flag(request.args.get('include_archived'))
+    
+    stream = _wants_ndjson()
+    mimetype = NDJSON_MIMETYPE if stream else 'application/json'
+    
+    # Read the version before querying, so a concurrent write can only
+    # make the ETag (and cache entry) older than the payload, never newer
+    version = TableVersion.current('tasks')
+    etag = list_etag(version, request.args, mimetype)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    
+    # Streams are unbounded, so only regular JSON pages are cached. Entries
+    # are only served to reads of the same database at the same version, so
+    # writes committed by other worker processes show straight away
+    cache = None if stream else get_read_cache()
+    cache_key = ('list', status if status in VALID_STATUSES else None,
+                 limit, position, fields, include_archived)
+    if cache is not None:
+        tag = (read_source(), version)
+        body = cache.get(cache_key, tag)
+        if body is not None:
+            return _cached_response(body, etag)
+        generation = cache.generation
+    
+    fields = fields or TASK_FIELDS
+    statement = task_list_statement(fields, status, position, include_archived)
+    encode = row_encoder(fields)
+    
+    if stream:
+        if limit is not None:
+            statement = statement.limit(limit)
+        return _with_etag(_stream_tasks(statement, encode), etag)
+    
+    next_cursor = None
+    if limit is None:
+        rows = db.session.execute(statement).all()
     else:
-        tasks = Task.query.all()
+        # Fetch one extra row to learn whether another page exists
+        rows = db.session.execute(statement.limit(limit + 1)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1])
+    
+    response = jsonify({
+        'success': True,
+        'tasks': [encode(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+    if cache is not None:
+        body = response.get_data()
+        cache.set(cache_key, body, len(body), generation, tag)
+    return _with_etag(response, etag)
+
+@api_bp.route('/tasks/search', methods=['GET'])
+def search_tasks():
+    """Full-text search over task titles and descriptions, best match first."""
+    text = request.args.get('q', '').strip()
+    
+    try:
+        if not text:
+            raise ValueError('Search text is required')
+        limit = parse_limit(request.args.get('limit'),
+                            current_app.config['TASKS_MAX_PAGE_SIZE'])
+        limit = limit or current_app.config['TASKS_SEARCH_PAGE_SIZE']
+        cursor = request.args.get('cursor')
+        offset = decode_offset_cursor(cursor) if cursor else 0
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    version = TableVersion.current('tasks')
+    etag = list_etag(version, request.args, 'application/json')
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    
+    cache = get_read_cache()
+    cache_key = ('list', 'search', text, limit, offset, fields)
+    if cache is not None:
+        tag = (read_source(), version)
+        body = cache.get(cache_key, tag)
+        if body is not None:
+            return _cached_response(body, etag)
+        generation = cache.generation
+    
+    fields = fields or TASK_FIELDS
+    encode = row_encoder(fields)
+    statement = search_statement(text, [Task.__table__.c[name] for name in fields],
+                                 db.engine.dialect.name)
+    rows = []
+    if statement is not None:
+        # Fetch one extra row to learn whether another page exists
+        rows = db.session.execute(statement.limit(limit + 1).offset(offset)).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_offset_cursor(offset + limit)
+    
+    response = jsonify({
+        'success': True,
+        'tasks': [encode(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+    if cache is not None:
+        body = response.get_data()
+        cache.set(cache_key, body, len(body), generation, tag)
+    return _with_etag(response, etag)
+
+@api_bp.route('/tasks/events', methods=['GET'])
+def task_events():
+    """Server-sent events stream of task creates, updates and deletes.
+    
+    Each event carries the task id and the fields that changed. Clients
+    reconnecting with Last-Event-ID first receive the events they missed;
+    a ``last_event_id`` query parameter does the same for a first connection.
+    """
+    # The feed's position must come from the primary it polls
+    read_from_primary()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    heartbeat = current_app.config['TASK_EVENTS_HEARTBEAT']
+    feed = get_change_feed()
+    subscriber, backlog = feed.subscribe(last_event_id)
+    if subscriber is None:
+        # Leave this worker's remaining threads to other requests
+        return jsonify({
+            'success': False,
+            'error': 'Too many event stream clients, retry shortly'
+        }), 503, {'Retry-After': str(EVENTS_RETRY_SECONDS)}
+    backlog = [format_event(event) for event in backlog]
+    
+    def generate():
+        try:
+            yield f'retry: {EVENTS_RETRY_SECONDS * 1000}\n\n'
+            yield from backlog
+            while not subscriber.overflowed:
+                try:
+                    event = subscriber.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Comment line keeping proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event)
+            yield 'event: reset\ndata: {}\n\n'
+        finally:
+            feed.unsubscribe(subscriber)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_bp.route('/tasks/stats', methods=['GET'])
+def get_task_stats():
+    """Task counts per status, completion rate and tasks created per day."""
+    max_days = current_app.config['TASKS_STATS_MAX_DAYS']
+    days = request.args.get('days', 30, type=int)
+    if not 1 <= days <= max_days:
+        return jsonify({
+            'success': False,
+            'error': f'days must be between 1 and {max_days}'
+        }), 400
     
     return jsonify({
         'success': True,
-        'tasks': [task.to_dict() for task in tasks]
+        'stats': task_stats(days)
     })
 
 @api_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     """Get a specific task by ID."""
-    task = db.session.get(Task, task_id)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    include_archived = parse_flag(request.args.get('include_archived'))
+    
+    cache = get_read_cache()
+    if cache is not None or request.if_none_match:
+        # Check the client's copy, and the cached one, against the
+        # modification time alone before loading and serializing the full row
+        modified = db.session.execute(
+            task_modified_statement(task_id, include_archived)).first()
+        if modified is None:
+            abort(404)
+        etag = task_etag(task_id, *modified, fields=fields)
+        if request.if_none_match.contains_weak(etag):
+            return _not_modified(etag)
+    
+    cache_key = ('task', task_id, fields, include_archived)
+    if cache is not None:
+        # Entries are only served while the task is unchanged, so writes
+        # committed by other worker processes show straight away
+        tag = (read_source(), *modified)
+        body = cache.get(cache_key, tag)
+        if body is not None:
+            return _cached_response(body, etag)
+        generation = cache.generation
+    
+    if fields is None and not include_archived:
+        task = db.session.get(Task, task_id)
+        serialize = _serializer(None)
+    else:
+        # Rows of the tasks and archive union are serialized like Task.to_dict
+        task = db.session.execute(
+            task_fields_statement(task_id, fields or TASK_FIELDS, include_archived)).first()
+        serialize = _serializer(fields or TASK_FIELDS)
     if task is None:
         abort(404)
-    return jsonify({
+    
+    etag = task_etag(task_id, task.created_at, task.updated_at, fields=fields)
+    response = jsonify({
         'success': True,
-        'task': task.to_dict()
+        'task': serialize(task)
     })
+    if cache is not None:
+        body = response.get_data()
+        cache.set(cache_key, body, len(body), generation, tag)
+    return _with_etag(response, etag)
 
 @api_bp.route('/tasks', methods=['POST'])
 def create_task():
     """Create a new task."""
     data = request.get_json()
     
-    if not data or 'title' not in data:
+    try:
+        values = new_task_values(data)
+    except ValueError as e:
         return jsonify({
             'success': False,
-            'error': 'Title is required'
+            'error': str(e)
         }), 400
     
-    new_task = Task(
-        title=data['title'],
-        description=data.get('description', '')
-    )
-    
-    db.session.add(new_task)
-    db.session.commit()
+    writer = get_task_writer()
+    if writer is not None:
+        task_dict = writer.submit(values)
+        # The writer thread's insert is invisible to the replica routing
+        g.db_wrote = True
+    else:
+        task_dict = add_task(db.session, values)
+        db.session.commit()
     
     return jsonify({
         'success': True,
-        'task': new_task.to_dict()
+        'task': task_dict
     }), 201
 
-@api_bp.route('/tasks/<int:task_id>', methods=['PUT'])
+def _no_match(task_id, versions):
+    """Abort a write that matched no task: 412 if it exists at another version, else 404."""
+    if versions is not None and db.session.scalar(existing_ids_statement([task_id])) is not None:
+        abort(412)
+    abort(404)
+
+@api_bp.route('/tasks/<int:task_id>', methods=['PUT', 'PATCH'])
 def update_task(task_id):
-    """Update an existing task."""
-    task = db.session.get(Task, task_id)
-    if task is None:
-        abort(404)
-    
-    data = request.get_json()
+    """Update an existing task.
     
-    if 'title' in data:
-        task.title = data['title']
-    if 'description' in data:
-        task.description = data['description']
-    if 'status' in data and data['status'] in ['active', 'completed']:
-        task.status = data['status']
+    Only the fields sent are changed, for PUT and PATCH alike. An If-Match
+    header makes the update conditional on the task's ETag.
+    """
+    versions = if_match_versions(request.if_match, task_id)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        # Let the missing task or the unreadable body fail as they always have
+        task = db.session.get(Task, task_id)
+        if task is None:
+            abort(404)
+        data = request.get_json()
     
+    task_dict = update_task_by_id(db.session, task_id, task_changes(data), versions)
+    if task_dict is None:
+        _no_match(task_id, versions)
     db.session.commit()
     
-    return jsonify({
+    response = jsonify({
         'success': True,
-        'task': task.to_dict()
+        'task': task_dict
     })
+    response.set_etag(serialized_task_etag(task_dict))
+    return response
 
 @api_bp.route('/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    """Delete a task."""
-    task = db.session.get(Task, task_id)
-    if task is None:
-        abort(404)
-        
-    db.session.delete(task)
+    """Delete a task, if it still matches the If-Match header when one is sent."""
+    versions = if_match_versions(request.if_match, task_id)
+    if not delete_task_by_id(db.session, task_id, versions):
+        _no_match(task_id, versions)
     db.session.commit()
     
     return jsonify({
         'success': True,
         'message': f'Task {task_id} deleted successfully'
-    }) 
\ No newline at end of file
+    }) 
+
+@api_bp.route('/tasks/bulk', methods=['POST'])
+def bulk_tasks():
+    """Create, update and delete many tasks in a single transaction.
+    
+    Expects ``{"create": [...], "update": [{"id": ..., ...}], "delete": [ids]}``.
+    Either every item is applied or, if any item is invalid, none are.
+    """
+    data = request.get_json()
+    
+    error = bulk_payload_error(data, current_app.config['TASKS_BULK_MAX_ITEMS'])
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    
+    referenced_ids = bulk_referenced_ids(data)
+    existing_ids = set(db.session.scalars(
+        existing_ids_statement(referenced_ids)
+    )) if referenced_ids else set()
+    
+    errors, creates, updates, deletes = validate_bulk(data, existing_ids)
+    
+    if any(error is not None for op_errors in errors.values() for error in op_errors):
+        return jsonify({
+            'success': False,
+            'error': 'One or more items are invalid; no changes were applied',
+            'results': bulk_error_results(errors)
+        }), 400
+    
+    created = apply_bulk_changes(db.session, creates, updates, deletes)
+    db.session.commit()
+    
+    updated = load_tasks(db.session, [task_id for task_id, _ in updates]) if updates else {}
+    
+    return jsonify({
+        'success': True,
+        'results': {
+            'create': [{'success': True, 'task': task} for task in created],
+            'update': [{'success': True, 'task': updated[task_id].to_dict()}
+                       for task_id, _ in updates],
+            'delete': [{'success': True, 'id': task_id} for task_id in deletes]
+        }
+    })
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.models.task import DATETIME_FIELDS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+@lru_cache(maxsize=64)
+def row_encoder(fields):
+    """Return a function turning a result row into a response dict.
+
+    The row's leading columns must be ``fields`` in order. The function is
+    generated once per field list, so encoding a row is a single dict
+    display over tuple indexes, with no attribute lookups or per-field
+    branching at runtime.
+    """
+    items = []
+    for index, field in enumerate(fields):
+        if field in DATETIME_FIELDS:
+            value = f'(row[{index}].isoformat() if row[{index}] is not None else None)'
+        else:
+            value = f'row[{index}]'
+        items.append(f'{field!r}: {value}')
+    source = 'def encode(row):\n    return {' + ', '.join(items) + '}\n'
+    namespace = {}
+    exec(source, namespace)
+    return namespace['encode']
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Produces the same documents as the default provider (sorted keys,
+    indented in debug mode) several times faster. Types orjson does not
+    know are handed to the default provider's fallback.
+    """
+
+    # Dates go through the default provider's fallback, which renders them
+    # as HTTP dates exactly like Flask does
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+               | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self.options
+        compact = self.compact
+        if compact is None:
+            compact = not self._app.debug
+        if not compact:
+            options |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Switch to the orjson provider when it is installed and FAST_JSON is set."""
+    if app.config['FAST_JSON'] and orjson is not None:
+        app.json = OrjsonProvider(app)
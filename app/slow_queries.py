@@ -0,0 +1,289 @@
+"""Opt-in log of SQL statements slower than a threshold.
+
+Engine events time every statement; those over SLOW_QUERY_THRESHOLD_MS
+are recorded with their normalized SQL, parameters (redacted unless
+SLOW_QUERY_REDACT_PARAMS is off), the route that ran them and how long
+they took. The first time a normalized statement turns up slow, its
+query plan is captured with EXPLAIN on the same connection.
+
+Entries go to a bounded ring buffer in memory and are appended to
+SLOW_QUERY_LOG_FILE (``instance/slow_queries.jsonl`` unless set), kept
+to the same number of entries, so every worker process and the
+``flask tasks slow-queries`` command see the same log. ``/admin/slow-queries`` serves it when
+ADMIN_TOKEN is set.
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import abort, current_app, g, has_app_context, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'with')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'(\(\?\))(?:\s*,\s*\(\?\))+')
+
+
+def normalize(statement):
+    """Reduce a SQL statement to its shape: literals and placeholders become ``?``.
+
+    IN lists and multi-row VALUES collapse to a single item, so the same
+    query with a different number of ids normalizes the same way.
+    """
+    text = ' '.join(statement.split())
+    text = _STRING.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _LIST.sub('(?)', text)
+    return _ROWS.sub(r'\1', text)
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def redact(parameters):
+    """Replace parameter values with their type names, keeping the structure."""
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f'<{type(parameters).__name__}>'
+
+
+def _jsonable(parameters):
+    if isinstance(parameters, dict):
+        return {key: _jsonable(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (bool, int, float, str)):
+        return parameters
+    return str(parameters)
+
+
+class SlowQueryLog:
+    """Bounded log of slow statements, optionally shared through a file."""
+
+    def __init__(self, threshold_ms=100, size=200, redact_params=True, path=None):
+        self.threshold = threshold_ms / 1000
+        self.size = size
+        self.redact_params = redact_params
+        self.path = path
+        self._entries = deque(maxlen=size)
+        # Plans by fingerprint; a statement is explained the first time it is slow
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, parameters, duration, route=None, plan=None):
+        """Add an entry for a statement that took ``duration`` seconds."""
+        normalized = normalize(statement)
+        entry = {
+            'time': datetime.utcnow().isoformat(timespec='milliseconds'),
+            'duration_ms': round(duration * 1000, 3),
+            'statement': normalized,
+            'fingerprint': fingerprint(normalized),
+            'parameters': redact(parameters) if self.redact_params else _jsonable(parameters),
+            'route': route,
+            'plan': plan
+        }
+        with self._lock:
+            self._entries.append(entry)
+        if self.path:
+            self._append_to_file(entry)
+        return entry
+
+    def needs_plan(self, statement):
+        """True the first time a normalized statement is seen; claims it."""
+        key = fingerprint(normalize(statement))
+        with self._lock:
+            if key in self._plans:
+                return False
+            if len(self._plans) >= self.size * 10:
+                self._plans.clear()
+            self._plans[key] = None
+            return True
+
+    def entries(self, limit=None):
+        """Recent entries, newest first, with the plan of their statement filled in."""
+        if self.path:
+            entries = self._read_file()
+        else:
+            with self._lock:
+                entries = list(self._entries)
+        plans = {entry['fingerprint']: entry['plan'] for entry in entries if entry.get('plan')}
+        entries.reverse()
+        if limit is not None:
+            entries = entries[:limit]
+        return [dict(entry, plan=entry.get('plan') or plans.get(entry['fingerprint']))
+                for entry in entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+        if self.path and os.path.exists(self.path):
+            with _LockedFile(self.path, 'r+') as f:
+                f.truncate(0)
+
+    def _append_to_file(self, entry):
+        line = json.dumps(entry, default=str) + '\n'
+        with _LockedFile(self.path, 'a+') as f:
+            f.seek(0)
+            lines = f.readlines()
+            if len(lines) >= self.size:
+                # Keep the file to the ring buffer's size
+                f.seek(0)
+                f.truncate()
+                f.writelines(lines[len(lines) - self.size + 1:])
+            f.write(line)
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            return []
+        with _LockedFile(self.path, 'r') as f:
+            lines = f.readlines()
+        entries = []
+        for line in lines[-self.size:]:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A line cut short by a crash
+                continue
+        return entries
+
+
+class _LockedFile:
+    """Open a file under a shared (read) or exclusive lock, where the OS supports it."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+
+    def __enter__(self):
+        self.file = open(self.path, self.mode)
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_SH if self.mode == 'r' else fcntl.LOCK_EX)
+        return self.file
+
+    def __exit__(self, *exc_info):
+        # Closing releases the lock
+        self.file.close()
+
+
+def explain(connection, statement, parameters, executemany):
+    """Return the query plan of a statement as a list of rows, or None."""
+    prefix = EXPLAIN_PREFIXES.get(connection.dialect.name)
+    if prefix is None or not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    if executemany and parameters:
+        parameters = parameters[0]
+    # A failed statement aborts the whole transaction on PostgreSQL
+    savepoint = connection.dialect.name == 'postgresql'
+    # A DBAPI cursor, so the EXPLAIN does not trigger the engine events
+    cursor = connection.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = [' | '.join(str(value) for value in row) for row in cursor.fetchall()]
+        except Exception as e:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            plan = [f'EXPLAIN failed: {e}']
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    finally:
+        cursor.close()
+
+
+def get_slow_query_log():
+    """Return the current app's slow query log, or None when it is disabled."""
+    return current_app.extensions.get('slow_query_log')
+
+
+def _current_route():
+    if has_request_context():
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        return f'{request.method} {rule}'
+    # The asyncio API runs its handlers in an app context only
+    return g.get('route')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['slow_query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('slow_query_started', None)
+    if started is None or not has_app_context():
+        return
+    log = current_app.extensions.get('slow_query_log')
+    if log is None:
+        return
+    duration = time.perf_counter() - started
+    if duration < log.threshold:
+        return
+    plan = explain(conn, statement, parameters, executemany) if log.needs_plan(statement) else None
+    log.record(statement, parameters, duration, _current_route(), plan)
+
+
+def slow_queries_view():
+    """Recent slow statements, newest first. Requires the admin token."""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        abort(404)
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+        abort(401)
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        'success': True,
+        'queries': get_slow_query_log().entries(limit)
+    })
+
+
+def init_app(app):
+    """Start logging slow statements when SLOW_QUERY_LOG_ENABLED is set."""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        return
+    path = app.config.get('SLOW_QUERY_LOG_FILE')
+    if path is None:
+        path = os.path.join(app.instance_path, 'slow_queries.jsonl')
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    app.extensions['slow_query_log'] = SlowQueryLog(
+        threshold_ms=app.config['SLOW_QUERY_THRESHOLD_MS'],
+        size=app.config['SLOW_QUERY_LOG_SIZE'],
+        redact_params=app.config['SLOW_QUERY_REDACT_PARAMS'],
+        path=path
+    )
+    # Listens on every engine: the primary, replicas and the async API's
+    if not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.add_url_rule('/admin/slow-queries', 'slow_queries', slow_queries_view)
@@ -4,11 +4,30 @@ document.addEventListener('DOMContentLoaded', function() {
     const tasksList = document.getElementById('tasks');
     const filterButtons = document.querySelectorAll('.filter-btn');
     
+    // The page comes with the first tasks of its filter and the change feed
+    // position they were read at
+    const bootstrap = JSON.parse(document.getElementById('bootstrap').textContent);
+    
     // Current filter state
-    let currentFilter = 'all';
+    let currentFilter = bootstrap.filter;
+    
+    // Tasks currently shown, kept in sync with the server's change feed
+    let tasks = bootstrap.tasks;
+    let changeFeed = null;
+    // Changes received while a list fetch is in flight, applied once it lands
+    let pendingChanges = null;
+    
+    renderTasks(tasks);
     
-    // Fetch all tasks on page load
-    fetchTasks();
+    // Follow changes from the position the embedded tasks were read at, so
+    // no write can fall between them and the feed
+    if (window.EventSource) {
+        subscribeToChanges(bootstrap.last_event_id);
+    }
+    // Only the first page is embedded; load the rest of a long list
+    if (bootstrap.next_cursor) {
+        fetchTasks(currentFilter);
+    }
     
     // Event Listeners
     taskForm.addEventListener('submit', createTask);
@@ -17,6 +36,8 @@ document.addEventListener('DOMContentLoaded', function() {
         button.addEventListener('click', function() {
             const filter = this.getAttribute('data-filter');
             setActiveFilter(filter);
+            // A reload renders the same filter
+            history.replaceState(null, '', filter === 'all' ? '/' : '/?status=' + filter);
             fetchTasks(filter);
         });
     });
@@ -30,14 +51,87 @@ document.addEventListener('DOMContentLoaded', function() {
             url += '?status=' + filter;
         }
         
+        const changes = [];
+        pendingChanges = changes;
+        
         fetch(url)
             .then(response => response.json())
             .then(data => {
+                if (pendingChanges === changes) {
+                    pendingChanges = null;
+                }
                 if (data.success) {
-                    renderTasks(data.tasks);
+                    tasks = data.tasks;
+                    // The list may predate changes that arrived meanwhile;
+                    // applying them again is harmless
+                    changes.forEach(([kind, change]) => applyChange(kind, change));
+                    renderTasks(tasks);
                 }
             })
-            .catch(error => console.error('Error fetching tasks:', error));
+            .catch(error => {
+                if (pendingChanges === changes) {
+                    pendingChanges = null;
+                }
+                console.error('Error fetching tasks:', error);
+            });
+    }
+    
+    function subscribeToChanges(lastEventId) {
+        // The browser reconnects on its own and resumes from the last event id
+        changeFeed = new EventSource('/api/tasks/events?last_event_id=' + lastEventId);
+        
+        ['created', 'updated', 'deleted', 'archived'].forEach(kind => {
+            changeFeed.addEventListener(kind, function(e) {
+                const data = JSON.parse(e.data);
+                if (pendingChanges) {
+                    pendingChanges.push([kind, data]);
+                }
+                applyChange(kind, data);
+                renderTasks(tasks);
+            });
+        });
+        
+        // Sent when this client fell too far behind; start over from a full list
+        changeFeed.addEventListener('reset', function() {
+            fetchTasks(currentFilter);
+        });
+    }
+    
+    function applyChange(kind, data) {
+        if (kind === 'created') {
+            if (matchesFilter(data) && !tasks.some(t => t.id === data.id)) {
+                tasks.push(data);
+            }
+        } else if (kind === 'updated') {
+            const index = tasks.findIndex(t => t.id === data.id);
+            
+            if (index === -1) {
+                // A task we don't hold may have moved into the current filter
+                if (data.status && matchesFilter(data) && !pendingChanges) {
+                    fetchTasks(currentFilter);
+                }
+                return;
+            }
+            
+            const task = Object.assign(tasks[index], data);
+            if (!matchesFilter(task)) {
+                tasks.splice(index, 1);
+            }
+        } else if (kind === 'deleted' || kind === 'archived') {
+            // Archived tasks are only listed on request, so they leave the list too
+            tasks = tasks.filter(t => t.id !== data.id);
+        }
+    }
+    
+    function matchesFilter(task) {
+        return currentFilter === 'all' || task.status === currentFilter;
+    }
+    
+    function refreshUnlessLive() {
+        // Changes arrive through the feed; only refetch when it is not connected
+        if (!changeFeed || changeFeed.readyState !== EventSource.OPEN) {
+            fetchTasks(currentFilter);
+        }
     }
     
     function createTask(e) {
@@ -65,8 +159,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 titleInput.value = '';
                 descriptionInput.value = '';
                 
-                // Refresh tasks
-                fetchTasks(currentFilter);
+                refreshUnlessLive();
             }
         })
         .catch(error => console.error('Error creating task:', error));
@@ -83,7 +176,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                fetchTasks(currentFilter);
+                refreshUnlessLive();
             }
         })
         .catch(error => console.error('Error updating task:', error));
@@ -97,7 +190,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    fetchTasks(currentFilter);
+                    refreshUnlessLive();
                 }
             })
             .catch(error => console.error('Error deleting task:', error));
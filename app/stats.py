@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from app.models import db, Task, TaskArchive, TaskStatusCount, TaskDailyCount
+from app.validation import VALID_STATUSES
+
+
+def _day(column):
+    """SQL expression for the UTC calendar day of a timestamp column."""
+    if db.engine.dialect.name == 'sqlite':
+        return db.func.date(column)
+    return db.cast(column, db.Date)
+
+
+def _as_date(value):
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def live_counts():
+    """Count tasks per status and per creation day straight from the tasks and archive tables."""
+    by_status, by_day = Counter(), Counter()
+    for model in (Task, TaskArchive):
+        by_status.update(dict(db.session.execute(
+            db.select(model.status, db.func.count())
+            .where(model.status.isnot(None))
+            .group_by(model.status)
+        ).all()))
+        day = _day(model.created_at)
+        by_day.update({_as_date(d): count for d, count in db.session.execute(
+            db.select(day, db.func.count())
+            .where(model.created_at.isnot(None))
+            .group_by(day)
+        )})
+    return dict(by_status), dict(by_day)
+
+
+def stored_counts(session=None):
+    """Read the trigger-maintained aggregates, skipping buckets that dropped to zero."""
+    session = session or db.session
+    by_status = {row.status: row.task_count
+                 for row in session.scalars(db.select(TaskStatusCount)) if row.task_count}
+    by_day = {row.day: row.created_count
+              for row in session.scalars(db.select(TaskDailyCount)) if row.created_count}
+    return by_status, by_day
+
+
+def rebuild_stats():
+    """Recompute the aggregate tables from the tasks and archive tables in one transaction."""
+    if db.engine.dialect.name == 'postgresql':
+        # Keep writers out so no trigger fires between the count and the insert
+        db.session.execute(db.text('LOCK TABLE tasks, tasks_archive IN SHARE MODE'))
+    # On SQLite the deletes take the write lock before the tasks are counted
+    db.session.execute(db.delete(TaskStatusCount))
+    db.session.execute(db.delete(TaskDailyCount))
+    by_status, by_day = live_counts()
+    if by_status:
+        db.session.execute(db.insert(TaskStatusCount), [
+            {'status': status, 'task_count': count} for status, count in by_status.items()
+        ])
+    if by_day:
+        db.session.execute(db.insert(TaskDailyCount), [
+            {'day': day, 'created_count': count} for day, count in by_day.items()
+        ])
+    db.session.commit()
+    return by_status, by_day
+
+
+def stats_differences():
+    """Compare the aggregates with live counts.
+
+    Returns a list of ``(kind, key, stored, live)`` tuples for every bucket
+    that disagrees; an empty list means the aggregates are consistent.
+    """
+    stored = stored_counts()
+    live = live_counts()
+    differences = []
+    for kind, stored_buckets, live_buckets in zip(('status', 'day'), stored, live):
+        for key in sorted(set(stored_buckets) | set(live_buckets), key=str):
+            if stored_buckets.get(key, 0) != live_buckets.get(key, 0):
+                differences.append((kind, key, stored_buckets.get(key, 0),
+                                    live_buckets.get(key, 0)))
+    return differences
+
+
+def task_stats(days, session=None):
+    """Summarize counts per status, the completion rate and recent daily creations."""
+    session = session or db.session
+    by_status, _ = stored_counts(session)
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    created_per_day = session.execute(
+        db.select(TaskDailyCount.day, TaskDailyCount.created_count)
+        .where(TaskDailyCount.day >= since, TaskDailyCount.created_count > 0)
+        .order_by(TaskDailyCount.day)
+    ).all()
+    
+    total = sum(by_status.values())
+    counts = {status: by_status.get(status, 0) for status in VALID_STATUSES}
+    counts.update(by_status)
+    return {
+        'total': total,
+        'by_status': counts,
+        'completion_rate': counts['completed'] / total if total else 0.0,
+        'created_per_day': [{'date': day.isoformat(), 'count': count}
+                            for day, count in created_per_day]
+    }
@@ -0,0 +1,345 @@
+"""Bulk export and import of tasks as CSV or NDJSON.
+
+Both directions stream in batches, so memory stays flat whatever the
+number of tasks: export reads the tasks in keyset order a batch at a
+time, and import parses, validates and writes its input a batch at a
+time.
+
+On PostgreSQL, CSV is exported with ``COPY ... TO STDOUT`` and import
+batches are loaded with ``COPY ... FROM STDIN``. Elsewhere batches are
+inserted with executemany, and commits are spaced ``commit_rows`` apart
+so SQLite syncs one large transaction instead of one per batch. Imports
+bump the tasks version and log a single "reset" change event per
+transaction, telling live clients to reload their list, instead of an
+event per task.
+
+Progress is checkpointed next to the file (``<path>.checkpoint``) after
+every written batch or committed transaction, so an interrupted run
+continues where it stopped with ``--resume``: export keeps the keyset
+position and the size of the file written so far, import the number of
+input rows already committed.
+"""
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from itertools import islice
+
+from app.changes import record_task_changes
+from app.models import db, Task, TASK_FIELDS
+from app.pagination import encode_cursor, decode_cursor
+from app.queries import task_list_statement
+from app.serialization import row_encoder
+from app.validation import VALID_STATUSES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+FORMATS = ('csv', 'ndjson')
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+tasks_table = Task.__table__
+
+
+def detect_format(path, fmt=None):
+    """The explicit format, or the one the file extension names; raises ValueError."""
+    if fmt:
+        return fmt
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f'Cannot tell the format of {path}; pass --format csv or ndjson')
+    return fmt
+
+
+class Checkpoint:
+    """Progress of a transfer, kept in a small JSON file replaced atomically."""
+
+    def __init__(self, path):
+        self.path = path + '.checkpoint'
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, **state):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_psycopg2(session):
+    return session.get_bind(Task).dialect.driver == 'psycopg2'
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerows(
+        ['' if value is None else value.isoformat() if isinstance(value, datetime) else value
+         for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows):
+    encode = row_encoder(TASK_FIELDS)
+    if orjson is not None:
+        return b''.join(orjson.dumps(encode(row)) + b'\n' for row in rows)
+    return ''.join(json.dumps(encode(row), separators=(',', ':')) + '\n'
+                   for row in rows).encode()
+
+
+def _copy_to(session, statement, out):
+    """COPY the rows of ``statement`` into the binary file ``out``, returning their count."""
+    cursor = session.connection().connection.cursor()
+    compiled = statement.compile(dialect=session.get_bind(Task).dialect)
+    query = cursor.mogrify(str(compiled), compiled.params).decode()
+    cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv)', out)
+    return cursor.rowcount
+
+
+def export_tasks(session, out, fmt, batch_size=10000, include_archived=False,
+                 checkpoint=None, state=None, progress=None):
+    """Write every task to the binary file ``out``, returning the number written.
+
+    ``state`` is a checkpoint to resume from, with ``out`` already
+    positioned at the end of its data.
+    """
+    rows = state['rows'] if state else 0
+    position = decode_cursor(state['cursor']) if state and state['cursor'] else None
+    if rows == 0 and fmt == 'csv':
+        out.write((','.join(TASK_FIELDS) + '\n').encode())
+    copy = fmt == 'csv' and _is_psycopg2(session)
+    encode = _encode_csv if fmt == 'csv' else _encode_ndjson
+
+    while True:
+        statement = task_list_statement(TASK_FIELDS, None, position, include_archived)
+        if copy:
+            # Where the batch will end, to resume after it
+            last = session.execute(
+                task_list_statement(('created_at', 'id'), None, position, include_archived)
+                .offset(batch_size - 1).limit(1)
+            ).first()
+            count = _copy_to(session, statement.limit(batch_size), out)
+        else:
+            batch = session.execute(statement.limit(batch_size)).all()
+            last, count = (batch[-1] if batch else None), len(batch)
+            out.write(encode(batch))
+        rows += count
+        if count < batch_size or last is None:
+            return rows
+        position = (last.created_at, last.id)
+        out.flush()
+        if checkpoint is not None:
+            checkpoint.save(rows=rows, cursor=encode_cursor(last), size=out.tell())
+        if progress is not None:
+            progress(rows)
+
+
+def read_items(stream, fmt):
+    """Yield the raw items of a binary CSV or NDJSON stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+        return
+    loads = orjson.loads if orjson is not None else json.loads
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield loads(line)
+            except ValueError as e:
+                raise ValueError(f'Line {number}: {e}')
+
+
+def _parse_datetime(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def import_values(item, now):
+    """Validate an imported task and return its column values.
+
+    Keeps the task's id when the item has one. Raises ValueError if the
+    item is invalid.
+    """
+    if not isinstance(item, dict) or not item.get('title'):
+        raise ValueError('Title is required')
+    status = item.get('status') or 'active'
+    if status not in VALID_STATUSES:
+        raise ValueError(f'Invalid status {status!r}')
+    try:
+        values = {
+            'title': item['title'],
+            'description': item.get('description'),
+            'status': status,
+            'created_at': _parse_datetime(item.get('created_at')) or now,
+            'updated_at': _parse_datetime(item.get('updated_at'))
+        }
+        if item.get('id') not in (None, ''):
+            values['id'] = int(item['id'])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid value: {e}')
+    return values
+
+
+def _copy_from(session, rows):
+    """Load rows sharing the same columns with COPY ... FROM STDIN."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    # \N marks NULL, so empty descriptions stay empty strings
+    writer.writerows(
+        ['\\N' if value is None else value.isoformat() if isinstance(value, datetime) else value
+         for value in row.values()]
+        for row in rows
+    )
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY tasks ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+
+# Per-row insert triggers on tasks (see app.models.task_search and
+# app.models.task_stats) cost SQLite imports most of their time. Each import
+# transaction drops them and applies their effect with one set-based
+# statement per batch instead, then creates them again before committing,
+# so no other connection ever sees the tasks table without them.
+SQLITE_DEFERRED_TRIGGERS = {
+    'tasks_fts_ai': [
+        """INSERT INTO tasks_fts(rowid, title, description)
+        SELECT id, title, description FROM tasks WHERE {where}""",
+    ],
+    'task_stats_ai': [
+        """INSERT INTO task_status_counts (status, task_count)
+        SELECT status, COUNT(*) FROM tasks WHERE {where} AND status IS NOT NULL GROUP BY status
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + excluded.task_count""",
+        """INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(created_at), COUNT(*) FROM tasks WHERE {where} AND created_at IS NOT NULL
+        GROUP BY date(created_at)
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + excluded.created_count""",
+    ],
+}
+
+
+def _begin_import(session):
+    """Start an import transaction, returning the DDL of the triggers it suspended."""
+    # Also opens the transaction: pysqlite only begins one on DML
+    record_task_changes(session=session, reset=True)
+    if session.get_bind(Task).dialect.name != 'sqlite':
+        return {}
+    suspended = dict(session.execute(
+        db.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN :names")
+        .bindparams(db.bindparam('names', expanding=True)),
+        {'names': list(SQLITE_DEFERRED_TRIGGERS)}
+    ).all())
+    for name in suspended:
+        session.execute(db.text(f'DROP TRIGGER {name}'))
+    return suspended
+
+
+def _apply_suspended(session, suspended, where, params):
+    for name in suspended:
+        for statement in SQLITE_DEFERRED_TRIGGERS[name]:
+            session.execute(db.text(statement.format(where=where)), params)
+
+
+def _sync_id_sequence(session):
+    # Explicit ids bypass the sequence; move it past them, and past the archive's ids
+    session.execute(db.text(
+        "SELECT setval(pg_get_serial_sequence('tasks', 'id'), GREATEST("
+        "(SELECT COALESCE(MAX(id), 0) FROM tasks), "
+        "(SELECT COALESCE(MAX(id), 0) FROM tasks_archive), 1))"
+    ))
+
+
+def _commit_import(session, suspended, with_ids):
+    for sql in suspended.values():
+        session.execute(db.text(sql))
+    if with_ids and session.get_bind(Task).dialect.name == 'postgresql':
+        _sync_id_sequence(session)
+    session.commit()
+
+
+def _insert_batch(session, rows, suspended):
+    # Rows with and without ids need separate statements
+    for with_id in (True, False):
+        group = [row for row in rows if ('id' in row) is with_id]
+        if not group:
+            continue
+        if _is_psycopg2(session):
+            _copy_from(session, group)
+            continue
+        if with_id:
+            session.execute(tasks_table.insert(), group)
+            where = 'id IN (SELECT value FROM json_each(:ids))'
+            params = {'ids': json.dumps([row['id'] for row in group])}
+        else:
+            # New ids all lie above the current maximum
+            params = {'last_id': session.scalar(db.select(db.func.max(Task.id))) or 0}
+            session.execute(tasks_table.insert(), group)
+            where = 'id > :last_id'
+        if suspended:
+            _apply_suspended(session, suspended, where, params)
+
+
+def import_tasks(session, items, batch_size=10000, commit_rows=100000,
+                 checkpoint=None, state=None, progress=None):
+    """Insert the tasks of an item iterator, returning how many were imported.
+
+    ``state`` is a checkpoint to resume from: its rows are skipped. On an
+    invalid item the uncommitted rows are rolled back and ValueError is
+    raised, naming the item's number in the input.
+    """
+    done = state['rows'] if state else 0
+    items = islice(items, done, None)
+    now = datetime.utcnow()
+    pending = 0
+    suspended = None
+    with_ids = False
+    try:
+        while True:
+            batch = []
+            for item in islice(items, batch_size):
+                try:
+                    batch.append(import_values(item, now))
+                except ValueError as e:
+                    raise ValueError(f'Row {done + pending + len(batch) + 1}: {e}')
+            if batch:
+                if pending == 0:
+                    suspended = _begin_import(session)
+                _insert_batch(session, batch, suspended)
+                with_ids = with_ids or any('id' in row for row in batch)
+                pending += len(batch)
+            if pending and (pending >= commit_rows or len(batch) < batch_size):
+                _commit_import(session, suspended, with_ids)
+                done += pending
+                pending = 0
+                with_ids = False
+                if checkpoint is not None:
+                    checkpoint.save(rows=done)
+                if progress is not None:
+                    progress(done)
+            if len(batch) < batch_size:
+                break
+    except Exception:
+        session.rollback()
+        raise
+    return done
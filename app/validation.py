@@ -0,0 +1,122 @@
+from app.models import TASK_FIELDS
+
+VALID_STATUSES = ('active', 'completed')
+
+
+def new_task_values(data):
+    """Validate a task creation payload and return the column values.
+
+    Raises ValueError if the payload is invalid.
+    """
+    if not data or not isinstance(data, dict) or 'title' not in data:
+        raise ValueError('Title is required')
+    return {
+        'title': data['title'],
+        'description': data.get('description', '')
+    }
+
+
+def task_changes(data):
+    """Return the column changes an update payload applies.
+
+    Unknown keys and unsupported statuses are ignored.
+    """
+    changes = {}
+    if 'title' in data:
+        changes['title'] = data['title']
+    if 'description' in data:
+        changes['description'] = data['description']
+    if 'status' in data and data['status'] in VALID_STATUSES:
+        changes['status'] = data['status']
+    return changes
+
+
+
+def parse_fields(value):
+    """Parse a ``fields`` query parameter into a tuple of field names.
+
+    Returns None when all fields were requested. Raises ValueError for
+    unknown field names.
+    """
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in TASK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def parse_flag(value):
+    """Parse a boolean query parameter such as ``include_archived=1``."""
+    return value is not None and value.lower() in ('1', 'true', 'yes')
+
+
+def bulk_payload_error(data, max_items):
+    """Return why a bulk payload cannot be processed at all, or None."""
+    if not isinstance(data, dict) or not all(
+            isinstance(data.get(op, []), list) for op in ('create', 'update', 'delete')):
+        return 'Expected lists under create, update and delete'
+    item_count = sum(len(data.get(op, [])) for op in ('create', 'update', 'delete'))
+    if item_count > max_items:
+        return f'At most {max_items} items per request'
+    return None
+
+
+def bulk_referenced_ids(data):
+    """The well-formed task ids a bulk payload updates or deletes."""
+    referenced_ids = [item.get('id') for item in data.get('update', []) if isinstance(item, dict)]
+    referenced_ids += data.get('delete', [])
+    return [i for i in referenced_ids if isinstance(i, int) and not isinstance(i, bool)]
+
+
+def validate_bulk(data, existing_ids):
+    """Validate a bulk payload, returning per-item results and the work to do.
+
+    Each result is either None (valid) or an error message.
+    """
+    creates, updates, deletes = [], [], []
+    errors = {'create': [], 'update': [], 'delete': []}
+    seen = set()
+
+    def claim(task_id):
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            return 'A task id is required'
+        if task_id in seen:
+            return f'Task {task_id} appears more than once'
+        seen.add(task_id)
+        if task_id not in existing_ids:
+            return f'Task {task_id} not found'
+        return None
+
+    for item in data.get('create', []):
+        try:
+            creates.append(new_task_values(item))
+            errors['create'].append(None)
+        except ValueError as e:
+            errors['create'].append(str(e))
+
+    for item in data.get('update', []):
+        error = claim(item.get('id')) if isinstance(item, dict) else 'A task id is required'
+        errors['update'].append(error)
+        if error is None:
+            updates.append((item['id'], task_changes(item)))
+
+    for task_id in data.get('delete', []):
+        error = claim(task_id)
+        errors['delete'].append(error)
+        if error is None:
+            deletes.append(task_id)
+
+    return errors, creates, updates, deletes
+
+
+def bulk_error_results(errors):
+    """Per-item results for a rejected bulk payload."""
+    return {
+        op: [{'success': False, 'error': error} if error else {'success': True}
+             for error in op_errors]
+        for op, op_errors in errors.items()
+    }
@@ -0,0 +1,74 @@
+"""Worker warm-up, so the first requests do not pay for connecting and compiling.
+
+``create_app`` opens no connections and starts no threads, so it can run
+once in the gunicorn master (``--preload``) before the workers fork. Each
+worker then calls ``warm_up`` from the ``post_worker_init`` hook in
+gunicorn.conf.py, before it accepts connections.
+"""
+import time
+
+from flask import request
+
+from app.models import db
+
+
+def warm_up_paths(app):
+    """Pages whose first rendering compiles templates and fills the task cache.
+
+    The task list is warmed one index page long: unbounded, it would load
+    and serialize every task before the worker could take a request.
+    """
+    return ('/', f"/api/tasks?limit={app.config['TASKS_INDEX_PAGE_SIZE']}")
+
+
+
+def app_engines(app):
+    """The app's engines: the primary (and binds) and any read replicas."""
+    with app.app_context():
+        engines = list(db.engines.values())
+    router = app.extensions.get('replica_router')
+    if router is not None:
+        engines += router.engines
+    return engines
+
+
+def dispose_inherited_connections(app):
+    """Forget pooled connections inherited from the parent process.
+
+    ``close=False`` leaves the sockets to the parent, which still owns them.
+    """
+    for engine in app_engines(app):
+        engine.dispose(close=False)
+
+
+def fill_pool(engine):
+    """Open as many connections as the pool keeps, then return them to it."""
+    size = engine.pool.size() if hasattr(engine.pool, 'size') else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.pool.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_up(app):
+    """Connect, compile and cache what the first requests need; returns the seconds taken."""
+    started = time.perf_counter()
+    dispose_inherited_connections(app)
+    for engine in app_engines(app):
+        try:
+            fill_pool(engine)
+        except engine.dialect.loaded_dbapi.Error as e:
+            # A replica that is down is handled by the router on first use
+            app.logger.warning(f'Could not connect to {engine.url!r} during warm-up: {e}')
+    for path in warm_up_paths(app):
+        # The views run without the request hooks, so warm-up requests stay out of the metrics
+        with app.test_request_context(path):
+            try:
+                app.view_functions[request.endpoint](**request.view_args)
+            except Exception as e:
+                # E.g. a database not migrated yet; the worker still starts
+                app.logger.warning(f'Warming up {path} failed: {e}')
+    return time.perf_counter() - started
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from app.changes import changed_fields, record_task_changes
+from app.models import db, Task, TaskArchive
+from app.queries import (bulk_insert_statement, bulk_delete_statement, update_returning_statement,
+                         delete_returning_statement, archive_candidates_statement,
+                         archive_delete_statement, archive_rows_statement)
+
+# Each function takes the session to write through, so the WSGI routes pass
+# db.session and the asyncio routes run them with AsyncSession.run_sync.
+
+
+def add_task(session, values):
+    """Insert a task and record its creation, returning it serialized."""
+    task = Task(**values)
+    session.add(task)
+    session.flush()
+    task_dict = task.to_dict()
+    record_task_changes(created=[task_dict], session=session)
+    return task_dict
+
+
+def apply_task_changes(session, task, changes):
+    """Apply column changes to a task and record them, returning it serialized."""
+    for column, value in changes.items():
+        setattr(task, column, value)
+    session.flush()
+    task_dict = task.to_dict()
+    record_task_changes(updated=[changed_fields(task_dict, changes)], session=session)
+    return task_dict
+
+
+def remove_task(session, task):
+    """Delete a task and record its deletion."""
+    session.delete(task)
+    record_task_changes(deleted=[task.id], session=session)
+
+
+def _version(task):
+    return task.updated_at or task.created_at
+
+
+def _dialect(session):
+    return session.get_bind(Task).dialect
+
+
+def update_task_by_id(session, task_id, changes, versions=None):
+    """Apply column changes to a task by id and record them, returning it serialized.
+
+    One UPDATE ... RETURNING where the dialect supports it; elsewhere the
+    task is loaded first. With ``versions`` (see ``if_match_versions``)
+    only a task last modified at one of those times is updated. Returns
+    None when no task matched.
+    """
+    if _dialect(session).update_returning:
+        task = session.scalars(update_returning_statement(task_id, changes, versions)).first()
+        if task is None:
+            return None
+        task_dict = task.to_dict()
+        record_task_changes(updated=[changed_fields(task_dict, changes)], session=session)
+        return task_dict
+    
+    task = session.get(Task, task_id, with_for_update=versions is not None)
+    if task is None or (versions is not None and _version(task) not in versions):
+        return None
+    return apply_task_changes(session, task, changes)
+
+
+def delete_task_by_id(session, task_id, versions=None):
+    """Delete a task by id and record its deletion; False when no task matched.
+
+    One DELETE ... RETURNING where the dialect supports it, with the same
+    ``versions`` check as ``update_task_by_id``.
+    """
+    if _dialect(session).delete_returning:
+        if session.scalar(delete_returning_statement(task_id, versions)) is None:
+            return False
+        record_task_changes(deleted=[task_id], session=session)
+        return True
+    
+    task = session.get(Task, task_id, with_for_update=versions is not None)
+    if task is None or (versions is not None and _version(task) not in versions):
+        return False
+    remove_task(session, task)
+    return True
+
+
+def apply_bulk_changes(session, creates, updates, deletes):
+    """Run validated bulk creates, updates and deletes, returning the created tasks."""
+    created = []
+    if creates:
+        created = [task.to_dict() for task in session.scalars(bulk_insert_statement(), creates)]
+    
+    updated_fields = []
+    if updates:
+        now = datetime.utcnow()
+        rows = [dict(changes, id=task_id, updated_at=now) for task_id, changes in updates]
+        # ORM bulk UPDATE by primary key, run as executemany batches
+        session.execute(db.update(Task), rows)
+        updated_fields = [dict(row, updated_at=now.isoformat()) for row in rows]
+    
+    if deletes:
+        session.execute(bulk_delete_statement(deletes))
+    
+    record_task_changes(created=created, updated=updated_fields, deleted=deletes,
+                        session=session)
+    return created
+
+
+def archive_tasks(session, cutoff, limit):
+    """Move up to ``limit`` tasks due for archiving to tasks_archive, returning their ids.
+
+    The oldest completed tasks last modified before ``cutoff`` are taken
+    out of tasks with one DELETE ... RETURNING where the dialect supports
+    it, otherwise after locking them, and inserted into the archive with
+    their ids. Tasks changed since they were picked stay where they are.
+    """
+    task_ids = session.scalars(archive_candidates_statement(cutoff, limit)).all()
+    if not task_ids:
+        return []
+    if _dialect(session).delete_returning:
+        rows = session.execute(archive_delete_statement(task_ids, cutoff)).all()
+    else:
+        rows = session.execute(archive_rows_statement(task_ids, cutoff)).all()
+        if rows:
+            session.execute(bulk_delete_statement([row.id for row in rows]))
+    if not rows:
+        return []
+    
+    now = datetime.utcnow()
+    session.execute(db.insert(TaskArchive), [dict(row._mapping, archived_at=now) for row in rows])
+    archived = [row.id for row in rows]
+    record_task_changes(archived=archived, session=session)
+    return archived
+
+
+def load_tasks(session, task_ids):
+    """Reload the given tasks from the database, keyed by id."""
+    return {task.id: task for task in session.scalars(
+        db.select(Task).where(Task.id.in_(task_ids)),
+        execution_options={'populate_existing': True}
+    )}
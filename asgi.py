@@ -0,0 +1,5 @@
+import os
+from app.async_api import create_asgi_app
+
+env = os.environ.get('FLASK_ENV', 'production')
+app = create_asgi_app(env)
@@ -0,0 +1,140 @@
+"""Deterministic task datasets for the load benchmarks."""
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.models import db, Task, TableVersion
+from app.pagination import encode_cursor
+from app.etags import task_etag
+
+WORDS = ('groceries', 'kitchen', 'report', 'invoice', 'garden', 'meeting', 'dentist',
+         'laundry', 'budget', 'review', 'deploy', 'backup', 'garage', 'birthday',
+         'passport', 'insurance', 'taxes', 'painting', 'recipe', 'workout')
+START = datetime(2024, 1, 1)
+
+
+def _word(seed, i, k):
+    """The k-th word of row i: a cheap integer hash, so any row range is reproducible."""
+    h = (seed * 1000003 ^ i * 2654435761 ^ k * 40503) & 0xFFFFFFFF
+    h = ((h ^ (h >> 16)) * 0x45D9F3B) & 0xFFFFFFFF
+    return WORDS[(h ^ (h >> 16)) % len(WORDS)]
+
+
+def task_rows(start, stop, seed=0):
+    """Rows ``start`` to ``stop`` of the dataset; the same seed gives the same rows."""
+    for i in range(start, stop):
+        yield {
+            'title': f'{_word(seed, i, 0)} {_word(seed, i, 1)} {_word(seed, i, 2)} {i}',
+            'description': ' '.join(_word(seed, i, k) for k in range(3, 15)) if i % 4 else None,
+            'status': 'completed' if i % 3 == 0 else 'active',
+            'created_at': START + timedelta(seconds=i),
+            'updated_at': START + timedelta(seconds=i, minutes=5) if i % 2 else None
+        }
+
+
+def seed(rows, batch_size=10000, seed_value=0, progress=print):
+    """Replace the database contents with ``rows`` generated tasks."""
+    db.drop_all()
+    db.create_all()
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        batch = list(task_rows(start, min(start + batch_size, rows), seed_value))
+        db.session.execute(db.insert(Task), batch)
+        db.session.commit()
+        if progress and (start // batch_size) % 10 == 9:
+            progress(f'  seeded {start + len(batch):,} / {rows:,}')
+    TableVersion.bump('tasks')
+    db.session.commit()
+    analyze()
+    elapsed = time.perf_counter() - started
+    if progress:
+        progress(f'seeded {rows:,} tasks in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)')
+
+
+def analyze():
+    """Refresh planner statistics after a bulk load."""
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE tasks'))
+    else:
+        db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def restore(ids, seed_value=0):
+    """Put the given seeded tasks back to their generated values.
+
+    Run after the write scenarios so the next run reads the same data.
+    """
+    values = [dict(next(task_rows(task_id - 1, task_id, seed_value)), id=task_id)
+              for task_id in ids]
+    if values:
+        db.session.execute(db.update(Task), values)
+    TableVersion.bump('tasks')
+    db.session.commit()
+
+
+def _is_seeded(rows, seed_value=0):
+    """Cheap check that the tasks hold an unmodified dataset of ``rows`` tasks.
+
+    Writes set ``updated_at`` to the current time, well after any seeded
+    value, and updates usually change the status counts; the first title
+    tells the seed apart.
+    """
+    count, completed, last_update = db.session.execute(db.select(
+        db.func.count(),
+        db.func.count().filter(Task.status == 'completed'),
+        db.func.max(Task.updated_at)
+    )).one()
+    if count != rows or completed != (rows + 2) // 3:
+        return False
+    first_title = db.session.scalar(db.select(Task.title).where(Task.id == 1))
+    if rows and first_title != next(task_rows(0, 1, seed_value))['title']:
+        return False
+    return last_update is None or last_update <= START + timedelta(seconds=rows, minutes=5)
+
+
+def ensure_dataset(rows, seed_value=0, reseed=False, progress=print):
+    """Seed ``rows`` tasks unless the database already holds that dataset.
+
+    Reusing an existing dataset keeps large runs cheap to repeat. The
+    benchmark deletes the tasks it creates and restores the ones it
+    updates; a run that stopped before doing so leaves changes behind,
+    which makes the next run seed again.
+    """
+    seeded = False
+    if not reseed:
+        try:
+            seeded = _is_seeded(rows, seed_value)
+        except (OperationalError, ProgrammingError):
+            # No tasks table yet
+            db.session.rollback()
+    if seeded:
+        if progress:
+            progress(f'reusing existing dataset of {rows:,} tasks')
+        return
+    seed(rows, seed_value=seed_value, progress=progress)
+
+
+def sample(count, seed_value=0):
+    """Pick existing tasks for the scenarios to address.
+
+    Returns ids, the list cursors positioned at them, their ETags and the
+    search words.
+    """
+    rng = random.Random(seed_value)
+    low, high = db.session.execute(db.select(db.func.min(Task.id), db.func.max(Task.id))).one()
+    if low is None:
+        raise RuntimeError('The dataset is empty')
+    picks = sorted({rng.randint(low, high) for _ in range(count)})
+    rows = db.session.execute(
+        db.select(Task.id, Task.created_at, Task.updated_at).where(Task.id.in_(picks))
+    ).all()
+    return {
+        'ids': [row.id for row in rows],
+        'cursors': [encode_cursor(row) for row in rows],
+        'etags': [(row.id, task_etag(row.id, row.created_at, row.updated_at)) for row in rows],
+        'words': list(WORDS),
+        'created_ids': []
+    }
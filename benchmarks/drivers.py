@@ -0,0 +1,99 @@
+"""Clients the load benchmarks send requests through.
+
+Each driver hands out one client per worker thread; ``client.request``
+returns the status code and body of a response.
+"""
+import threading
+
+
+class WSGIDriver:
+    """Calls the Flask app in-process through its test client.
+
+    Measures the application and database without any network or server
+    overhead; worker threads behave like a gthread worker's threads.
+    """
+
+    name = 'wsgi'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = _FlaskClient(self.app.test_client())
+        return self._local.client
+
+    def close(self):
+        pass
+
+
+class _FlaskClient:
+    def __init__(self, client):
+        self._client = client
+
+    def request(self, method, path, body=None, headers=None):
+        response = self._client.open(path, method=method, data=body, headers=headers,
+                                     content_type='application/json' if body else None)
+        data = response.get_data()
+        response.close()
+        return response.status_code, data
+
+
+class ASGIDriver:
+    """Calls the asyncio API in-process through Starlette's test client.
+
+    All workers share one client and so one event loop, as under an ASGI
+    server; the async engine's pool must not be shared between loops.
+    """
+
+    name = 'asgi'
+
+    def __init__(self, app):
+        from starlette.testclient import TestClient
+        from app.async_api import create_asgi_app
+        self._test_client = TestClient(create_asgi_app(flask_app=app))
+        self._test_client.__enter__()
+        self._client = _HTTPXClient(self._test_client)
+
+    def client(self):
+        return self._client
+
+    def close(self):
+        self._test_client.__exit__(None, None, None)
+
+
+class HTTPDriver:
+    """Sends real HTTP requests to a running server, one keep-alive connection per worker."""
+
+    name = 'http'
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+        self._clients = []
+
+    def client(self):
+        if not hasattr(self._local, 'client'):
+            import httpx
+            client = httpx.Client(base_url=self.base_url, timeout=self.timeout)
+            self._clients.append(client)
+            self._local.client = _HTTPXClient(client)
+        return self._local.client
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+
+
+class _HTTPXClient:
+    def __init__(self, client):
+        self._client = client
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if body:
+            headers['Content-Type'] = 'application/json'
+        response = self._client.request(method, path, content=body, headers=headers)
+        return response.status_code, response.content
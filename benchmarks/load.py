@@ -0,0 +1,212 @@
+"""Load benchmark for the task API routes.
+
+Seeds a deterministic dataset (reused when the database already holds
+it unchanged), drives every endpoint with concurrent clients and
+reports throughput and p50/p95/p99 latency per endpoint. Results can be
+saved as JSON and compared with a stored baseline; any metric that got
+worse by more than the threshold makes the command exit with status 1.
+
+Usage::
+
+    python -m benchmarks.load --rows 100000 --requests 2000 --concurrency 8 \\
+        --output baseline.json
+    # ...later, after a change
+    python -m benchmarks.load --rows 100000 --requests 2000 --concurrency 8 \\
+        --baseline baseline.json
+
+    # Against a running server (gunicorn or uvicorn) using the same database
+    python -m benchmarks.load --driver http --url http://127.0.0.1:8000 \\
+        --database-url postgresql://localhost/tasks_bench
+
+The database is dropped and re-created when it has to be seeded, so point
+``--database-url`` at a database used only for benchmarking.
+"""
+import argparse
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import create_app
+from app.models import db
+from benchmarks import report
+from benchmarks.dataset import ensure_dataset, restore, sample
+from benchmarks.drivers import ASGIDriver, HTTPDriver, WSGIDriver
+from benchmarks.scenarios import SCENARIOS, SCENARIO_NAMES
+from config.config import ProductionConfig
+
+BASEDIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(BASEDIR, 'instance', 'bench.db')}"
+
+
+def run_scenario(driver, scenario, samples, count, concurrency, warmup=0, seed=0):
+    """Send ``count`` requests for one scenario and summarize them.
+
+    Warm-up requests (reads only) run first on the same workers and are
+    not measured.
+    """
+    rng = random.Random(f'{seed}:{scenario.name}')
+    warmup = 0 if scenario.writes else warmup
+    planned = scenario.requests(rng, samples, warmup + count)
+    warm, measured = planned[:warmup], planned[warmup:]
+
+    def send(request):
+        path, body, headers = request
+        client = driver.client()
+        started = time.perf_counter()
+        status, data = client.request(scenario.method, path, body, headers)
+        return time.perf_counter() - started, status, data
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, warm))
+        started = time.perf_counter()
+        outcomes = list(pool.map(send, measured))
+        wall_time = time.perf_counter() - started
+
+    latencies, errors, response_bytes = [], 0, 0
+    for latency, status, data in outcomes:
+        latencies.append(latency)
+        response_bytes += len(data)
+        if status not in scenario.expected:
+            errors += 1
+        elif scenario.collect is not None:
+            scenario.collect(data, samples)
+    return report.summarize(latencies, wall_time, errors, response_bytes)
+
+
+def run_benchmark(app, driver, scenarios, requests, concurrency, warmup=0, seed=0,
+                  sample_size=1000, progress=print):
+    """Run the scenarios in order against a seeded app, returning per-endpoint results.
+
+    Seeded tasks changed by the write scenarios are restored afterwards.
+    """
+    with app.app_context():
+        samples = sample(sample_size, seed)
+    results = {}
+    try:
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(driver, scenario, samples, requests,
+                                                  concurrency, warmup, seed)
+            if progress:
+                stats = results[scenario.name]
+                progress(f"  {scenario.name:<22} {stats['throughput_rps']:>10,.1f} req/s  "
+                         f"p95 {stats['p95_ms']:.2f} ms")
+    finally:
+        if any(scenario.writes for scenario in scenarios):
+            with app.app_context():
+                # Update scenarios only address sampled tasks
+                restore(samples['ids'], seed)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASEDIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='dataset size, e.g. 1000 to 10000000 (default: %(default)s)')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='measured requests per endpoint (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='concurrent clients (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=20,
+                        help='unmeasured requests per read endpoint (default: %(default)s)')
+    parser.add_argument('--driver', choices=['wsgi', 'asgi', 'http'], default='wsgi',
+                        help='in-process Flask, in-process asyncio API, or a live server')
+    parser.add_argument('--url', default='http://127.0.0.1:8000',
+                        help='server URL for the http driver (default: %(default)s)')
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='benchmark database (default: instance/bench.db)')
+    parser.add_argument('--endpoints', default=','.join(SCENARIO_NAMES),
+                        help='comma-separated subset of: ' + ', '.join(SCENARIO_NAMES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--reseed', action='store_true', help='always re-create the dataset')
+    parser.add_argument('--no-cache', action='store_true', help='disable the in-process read cache')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative change counted as a regression (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIO_NAMES))
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(unknown)}")
+    scenarios = [scenario for scenario in SCENARIOS if scenario.name in names]
+
+    ProductionConfig.SQLALCHEMY_DATABASE_URI = args.database_url
+    ProductionConfig.TASK_CACHE_ENABLED = not args.no_cache
+    app = create_app('production')
+    os.makedirs(os.path.join(BASEDIR, 'instance'), exist_ok=True)
+    with app.app_context():
+        ensure_dataset(args.rows, args.seed, reseed=args.reseed)
+        database = db.engine.dialect.name
+
+    if args.driver == 'http':
+        driver = HTTPDriver(args.url)
+    elif args.driver == 'asgi':
+        driver = ASGIDriver(app)
+    else:
+        driver = WSGIDriver(app)
+
+    print(f'{len(scenarios)} endpoints, {args.requests} requests each, '
+          f'concurrency {args.concurrency}, {args.driver} driver, {database}')
+    try:
+        endpoints = run_benchmark(app, driver, scenarios, args.requests, args.concurrency,
+                                  args.warmup, args.seed)
+    finally:
+        driver.close()
+
+    results = {
+        'settings': {
+            'rows': args.rows,
+            'driver': args.driver,
+            'database': database,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'cache': not args.no_cache
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat()
+        },
+        'endpoints': endpoints
+    }
+    print()
+    print(report.format_table(results))
+
+    if args.output:
+        report.save(results, args.output)
+        print(f'\nresults written to {args.output}')
+
+    if args.baseline:
+        regressions, mismatched = report.compare(results, report.load(args.baseline),
+                                                 args.threshold)
+        if mismatched:
+            print(f"\nwarning: baseline was run with different {', '.join(mismatched)}")
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+            for endpoint, metric, before, after, change in regressions:
+                print(f'  {endpoint:<22} {metric:<15} {before:>10.2f} -> {after:>10.2f} '
+                      f'({change:+.0%})')
+            return 1
+        print(f'\nno regressions beyond {args.threshold:.0%} against {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Latency summaries, result files and baseline comparison."""
+import json
+import math
+
+COMPARED_METRICS = (
+    # (metric, higher is better)
+    ('throughput_rps', True),
+    ('p50_ms', False),
+    ('p95_ms', False),
+    ('p99_ms', False),
+)
+# Run settings that must match for a comparison to mean anything
+COMPARABLE_SETTINGS = ('rows', 'driver', 'database', 'concurrency')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, wall_time, errors, response_bytes):
+    """Summarize one endpoint's run; latencies are in seconds."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / wall_time, 2) if wall_time else 0.0,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if count else 0.0,
+        'mean_bytes': round(response_bytes / count) if count else 0
+    }
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.10):
+    """Compare a run with a baseline run.
+
+    Returns ``(regressions, mismatched_settings)``. Each regression is a
+    ``(endpoint, metric, baseline, current, change)`` tuple for a metric
+    that got worse by more than ``threshold`` (a fraction), where change
+    is the relative difference.
+    """
+    mismatched = [name for name in COMPARABLE_SETTINGS
+                  if results['settings'].get(name) != baseline['settings'].get(name)]
+    regressions = []
+    for endpoint, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(endpoint)
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((endpoint, metric, before, after, change))
+    return regressions, mismatched
+
+
+def format_table(results):
+    """Render the per-endpoint results as a text table."""
+    header = (f"{'endpoint':<22} {'reqs':>6} {'errs':>5} {'req/s':>10} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>8}")
+    lines = [header, '-' * len(header)]
+    for name, stats in results['endpoints'].items():
+        lines.append(
+            f"{name:<22} {stats['requests']:>6} {stats['errors']:>5} "
+            f"{stats['throughput_rps']:>10,.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['mean_bytes']:>8}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,89 @@
+"""The requests each benchmarked endpoint is driven with.
+
+Every scenario builds its requests up front from a seeded generator and
+the sampled dataset, so two runs over the same dataset send the same
+requests. Read scenarios come first: writes bump the tasks table version
+and would otherwise turn the reads' cache hits into misses midway.
+"""
+import json
+
+
+class Scenario:
+    """One endpoint under load."""
+
+    def __init__(self, name, method, build, expected=(200,), writes=False, collect=None,
+                 consumes=None):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.expected = expected
+        self.writes = writes
+        # Called with each response body, to feed later scenarios
+        self.collect = collect
+        # Sample list each request uses up, bounding the request count
+        self.consumes = consumes
+
+    def requests(self, rng, samples, count):
+        """Build up to ``count`` (path, body, headers) tuples."""
+        if self.consumes is not None:
+            count = min(count, len(samples[self.consumes]))
+        return [self.build(rng, samples) for _ in range(count)]
+
+
+def _get(path):
+    return path, None, None
+
+
+def _collect_created(body, samples):
+    samples['created_ids'].append(json.loads(body)['task']['id'])
+
+
+def _not_modified(rng, samples):
+    task_id, etag = rng.choice(samples['etags'])
+    return f'/api/tasks/{task_id}', None, {'If-None-Match': f'"{etag}"'}
+
+
+def _delete_created(rng, samples):
+    return f"/api/tasks/{samples['created_ids'].pop()}", None, None
+
+
+SCENARIOS = [
+    Scenario('list_page', 'GET', lambda rng, s: _get('/api/tasks?limit=50')),
+    Scenario('list_cursor', 'GET',
+             lambda rng, s: _get(f"/api/tasks?limit=50&cursor={rng.choice(s['cursors'])}")),
+    Scenario('list_status', 'GET',
+             lambda rng, s: _get(f"/api/tasks?status={rng.choice(['active', 'completed'])}"
+                                 f"&limit=50&cursor={rng.choice(s['cursors'])}")),
+    Scenario('list_fields', 'GET',
+             lambda rng, s: _get(f"/api/tasks?fields=id,title,status&limit=200"
+                                 f"&cursor={rng.choice(s['cursors'])}")),
+    Scenario('list_stream', 'GET',
+             lambda rng, s: _get(f"/api/tasks?stream=1&limit=1000&cursor={rng.choice(s['cursors'])}")),
+    Scenario('search', 'GET',
+             lambda rng, s: _get(f"/api/tasks/search?q={rng.choice(s['words'])}"
+                                 f"+{rng.choice(s['words'])[:4]}")),
+    Scenario('stats', 'GET', lambda rng, s: _get('/api/tasks/stats?days=30')),
+    Scenario('detail', 'GET', lambda rng, s: _get(f"/api/tasks/{rng.choice(s['ids'])}")),
+    Scenario('detail_not_modified', 'GET', _not_modified, expected=(304,)),
+    Scenario('create', 'POST',
+             lambda rng, s: ('/api/tasks', json.dumps({
+                 'title': f"{rng.choice(s['words'])} benchmark",
+                 'description': 'Created by the load benchmark'
+             }), None),
+             expected=(201,), writes=True, collect=_collect_created),
+    Scenario('update', 'PUT',
+             lambda rng, s: (f"/api/tasks/{rng.choice(s['ids'])}", json.dumps({
+                 'status': rng.choice(['active', 'completed'])
+             }), None),
+             writes=True),
+    Scenario('bulk_update', 'POST',
+             lambda rng, s: ('/api/tasks/bulk', json.dumps({
+                 'update': [{'id': task_id, 'status': rng.choice(['active', 'completed'])}
+                            for task_id in rng.sample(s['ids'], min(50, len(s['ids'])))]
+             }), None),
+             writes=True),
+    # Removes what 'create' added, so the dataset can be reused by the next run
+    Scenario('delete', 'DELETE', _delete_created, writes=True, consumes='created_ids'),
+]
+
+SCENARIO_NAMES = [scenario.name for scenario in SCENARIOS]
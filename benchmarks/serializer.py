@@ -0,0 +1,103 @@
+"""Micro-benchmark for the list serialization path.
+
+Compares the original path (ORM instances, ``Task.to_dict`` and the
+standard library JSON provider) with the list endpoints' current path
+(a Core select of row tuples, the generated row encoder and the orjson
+provider when it is installed), reporting rows per second for each.
+
+Usage::
+
+    python -m benchmarks.serializer --rows 50000 --repeat 5
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.models import db, Task, TASK_FIELDS
+from app.serialization import row_encoder, OrjsonProvider, orjson
+from config.config import TestingConfig
+
+
+def seed(rows):
+    start = datetime(2024, 1, 1)
+    db.session.execute(db.insert(Task), [
+        {
+            'title': f'Task {i}',
+            'description': f'Description for task {i} ' * 4,
+            'status': 'completed' if i % 3 == 0 else 'active',
+            'created_at': start + timedelta(seconds=i),
+            'updated_at': start + timedelta(seconds=i, minutes=5) if i % 2 else None
+        }
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def orm_to_dict(provider):
+    tasks = Task.query.order_by(Task.created_at, Task.id).all()
+    body = provider.dumps({'success': True, 'tasks': [task.to_dict() for task in tasks]})
+    db.session.expunge_all()
+    return body
+
+
+def core_rows(provider):
+    table = Task.__table__
+    rows = db.session.execute(
+        db.select(*[table.c[name] for name in TASK_FIELDS])
+        .order_by(table.c.created_at, table.c.id)
+    ).all()
+    encode = row_encoder(TASK_FIELDS)
+    return provider.dumps({'success': True, 'tasks': [encode(row) for row in rows]})
+
+
+def measure(label, func, rows, repeat):
+    func()  # warm up statement caches
+    best = min(_timed(func) for _ in range(repeat))
+    print(f'{label:<44} {rows / best:>12,.0f} rows/sec  ({best * 1000:.1f} ms)')
+    return rows / best
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        TestingConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all()
+            seed(args.rows)
+            
+            stdlib = DefaultJSONProvider(app)
+            stdlib.compact = True
+            print(f'{args.rows:,} rows, best of {args.repeat}')
+            before = measure('ORM + to_dict + stdlib json', lambda: orm_to_dict(stdlib),
+                             args.rows, args.repeat)
+            after = measure('Core rows + row_encoder + stdlib json', lambda: core_rows(stdlib),
+                            args.rows, args.repeat)
+            if orjson is not None:
+                fast = OrjsonProvider(app)
+                after = measure('Core rows + row_encoder + orjson', lambda: core_rows(fast),
+                                args.rows, args.repeat)
+            else:
+                print('orjson is not installed; skipping the orjson provider')
+            print(f'speedup: {after / before:.1f}x')
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
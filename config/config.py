@@ -1,12 +1,185 @@
 import os
-from dotenv import load_dotenv
-# Load environment variables from .env file
-load_dotenv()
+from dataclasses import dataclass, field, fields
+
+# Load environment variables from the project's .env file, if there is one.
+# Looking it up by path skips python-dotenv's search up the directory tree.
+DOTENV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+if os.environ.get('LOAD_DOTENV', 'true').lower() == 'true' and os.path.exists(DOTENV_PATH):
+    from dotenv import load_dotenv
+    load_dotenv(DOTENV_PATH)
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+@dataclass(frozen=True)
+class EngineSettings:
+    """Database engine, connection pool and SQLite tuning settings.
+
+    Every field can be overridden by the environment variable named in its
+    metadata. ``from_env`` parses the values and ``validate`` checks their
+    ranges; both run in ``create_app`` so a bad setting stops the worker
+    at startup rather than on the first query.
+    """
+    pool_size: int = field(default=5, metadata={'env': 'DB_POOL_SIZE'})
+    max_overflow: int = field(default=10, metadata={'env': 'DB_MAX_OVERFLOW'})
+    pool_timeout: float = field(default=30.0, metadata={'env': 'DB_POOL_TIMEOUT'})
+    pool_recycle: int = field(default=1800, metadata={'env': 'DB_POOL_RECYCLE'})
+    pool_pre_ping: bool = field(default=True, metadata={'env': 'DB_POOL_PRE_PING'})
+    # PostgreSQL only; 0 disables the timeout
+    statement_timeout_ms: int = field(default=0, metadata={'env': 'DB_STATEMENT_TIMEOUT_MS'})
+    sqlite_journal_mode: str = field(default='WAL', metadata={'env': 'SQLITE_JOURNAL_MODE'})
+    sqlite_synchronous: str = field(default='NORMAL', metadata={'env': 'SQLITE_SYNCHRONOUS'})
+    sqlite_mmap_size: int = field(default=256 * 1024 * 1024, metadata={'env': 'SQLITE_MMAP_SIZE'})
+    # Negative values are KiB, positive values are pages
+    sqlite_cache_size: int = field(default=-64000, metadata={'env': 'SQLITE_CACHE_SIZE'})
+    sqlite_busy_timeout_ms: int = field(default=5000, metadata={'env': 'SQLITE_BUSY_TIMEOUT_MS'})
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Build settings from the environment, falling back to the defaults.
+
+        Raises ValueError naming the variable that could not be parsed.
+        """
+        environ = os.environ if environ is None else environ
+        values = {}
+        for f in fields(cls):
+            name = f.metadata['env']
+            raw = environ.get(name)
+            if raw is None or raw == '':
+                continue
+            try:
+                if f.type is bool:
+                    if raw.lower() not in ('true', 'false', '1', '0'):
+                        raise ValueError(raw)
+                    values[f.name] = raw.lower() in ('true', '1')
+                elif f.type is int:
+                    values[f.name] = int(raw)
+                elif f.type is float:
+                    values[f.name] = float(raw)
+                else:
+                    values[f.name] = raw.upper()
+            except ValueError:
+                raise ValueError(f'{name} has an invalid value: {raw!r}')
+        return cls(**values)
+
+    def validate(self):
+        """Raise ValueError if any setting is out of range."""
+        checks = [
+            (self.pool_size >= 1, 'DB_POOL_SIZE must be at least 1'),
+            (self.max_overflow >= -1, 'DB_MAX_OVERFLOW must be -1 (unlimited) or more'),
+            (self.pool_timeout > 0, 'DB_POOL_TIMEOUT must be positive'),
+            (self.pool_recycle >= -1, 'DB_POOL_RECYCLE must be -1 (never) or more'),
+            (self.statement_timeout_ms >= 0, 'DB_STATEMENT_TIMEOUT_MS must not be negative'),
+            (self.sqlite_journal_mode in SQLITE_JOURNAL_MODES,
+             f"SQLITE_JOURNAL_MODE must be one of {', '.join(SQLITE_JOURNAL_MODES)}"),
+            (self.sqlite_synchronous in SQLITE_SYNCHRONOUS_MODES,
+             f"SQLITE_SYNCHRONOUS must be one of {', '.join(SQLITE_SYNCHRONOUS_MODES)}"),
+            (self.sqlite_mmap_size >= 0, 'SQLITE_MMAP_SIZE must not be negative'),
+            (self.sqlite_busy_timeout_ms >= 0, 'SQLITE_BUSY_TIMEOUT_MS must not be negative'),
+        ]
+        for ok, message in checks:
+            if not ok:
+                raise ValueError(message)
+
+    def engine_options(self, database_uri):
+        """Keyword arguments for create_engine, as SQLALCHEMY_ENGINE_OPTIONS."""
+        options = {'pool_pre_ping': self.pool_pre_ping}
+        uri = database_uri or ''
+        # In-memory SQLite uses a single static connection without a pool to size
+        if not (uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:')):
+            options.update(
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+                pool_recycle=self.pool_recycle
+            )
+        if uri.startswith('postgres') and self.statement_timeout_ms:
+            options['connect_args'] = {
+                'options': f'-c statement_timeout={self.statement_timeout_ms}'
+            }
+        return options
 
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev_key')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Parsed from the environment by create_app when left as None
+    ENGINE_SETTINGS = None
+    # Read replicas for GET requests, as a comma-separated list of URLs
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+                             if url.strip()]
+    # Seconds a client keeps reading from the primary after a write
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    # Seconds an unreachable replica is skipped before being retried
+    REPLICA_RETRY_INTERVAL = float(os.environ.get('REPLICA_RETRY_INTERVAL', 30))
+    # Use orjson for JSON responses when it is installed
+    FAST_JSON = os.environ.get('FAST_JSON', 'true').lower() == 'true'
+    TASKS_MAX_PAGE_SIZE = int(os.environ.get('TASKS_MAX_PAGE_SIZE', 500))
+    TASKS_STREAM_BATCH_SIZE = int(os.environ.get('TASKS_STREAM_BATCH_SIZE', 1000))
+    TASKS_SEARCH_PAGE_SIZE = int(os.environ.get('TASKS_SEARCH_PAGE_SIZE', 20))
+    TASKS_STATS_MAX_DAYS = int(os.environ.get('TASKS_STATS_MAX_DAYS', 366))
+    TASKS_BULK_MAX_ITEMS = int(os.environ.get('TASKS_BULK_MAX_ITEMS', 5000))
+    # Tasks embedded in the index page; longer lists are fetched in full afterwards
+    TASKS_INDEX_PAGE_SIZE = int(os.environ.get('TASKS_INDEX_PAGE_SIZE', 100))
+
+    # Server-sent change feed at /api/tasks/events
+    TASK_EVENTS_POLL_INTERVAL = float(os.environ.get('TASK_EVENTS_POLL_INTERVAL', 0.5))
+    TASK_EVENTS_HEARTBEAT = float(os.environ.get('TASK_EVENTS_HEARTBEAT', 15))
+    TASK_EVENTS_MAX_PENDING = int(os.environ.get('TASK_EVENTS_MAX_PENDING', 1000))
+    TASK_EVENTS_RETENTION = int(os.environ.get('TASK_EVENTS_RETENTION', 3600))
+    # Each stream holds a worker thread; keep this below gunicorn's --threads so
+    # other requests still get one (gunicorn.conf.py caps it at --threads minus one)
+    TASK_EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('TASK_EVENTS_MAX_SUBSCRIBERS', 4))
+
+    # In-process read cache for task responses
+    TASK_CACHE_ENABLED = os.environ.get('TASK_CACHE_ENABLED', 'true').lower() == 'true'
+    TASK_CACHE_MAX_ENTRIES = int(os.environ.get('TASK_CACHE_MAX_ENTRIES', 1024))
+    # Hits are checked against the database's version, so the TTL only ages out idle entries
+    TASK_CACHE_TTL = float(os.environ.get('TASK_CACHE_TTL', 5))
+    TASK_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('TASK_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+
+    # Commit concurrent task creates together from a writer thread
+    TASK_GROUP_COMMIT = os.environ.get('TASK_GROUP_COMMIT', 'false').lower() == 'true'
+    TASK_GROUP_COMMIT_MAX_BATCH = int(os.environ.get('TASK_GROUP_COMMIT_MAX_BATCH', 100))
+    # How long the first create of a batch waits for others to join it
+    TASK_GROUP_COMMIT_MAX_DELAY_MS = float(os.environ.get('TASK_GROUP_COMMIT_MAX_DELAY_MS', 2))
+
+    # Completed tasks untouched for this many days move to tasks_archive
+    ARCHIVE_AFTER_DAYS = float(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    # Seconds the mover sleeps between batches, leaving the database to requests
+    ARCHIVE_BATCH_PAUSE = float(os.environ.get('ARCHIVE_BATCH_PAUSE', 0.2))
+    # Seconds between background runs in each process; 0 leaves it to "flask tasks archive"
+    ARCHIVE_INTERVAL = float(os.environ.get('ARCHIVE_INTERVAL', 0))
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Directory the worker processes share their samples through; must be empty at server start
+    METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+    # gzip/deflate for text responses; static files are compressed once at startup
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    COMPRESSION_STATIC_LEVEL = int(os.environ.get('COMPRESSION_STATIC_LEVEL', 9))
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+    # Content-hashed static URLs, cached by browsers for a year
+    ASSET_FINGERPRINTS = os.environ.get('ASSET_FINGERPRINTS', 'true').lower() == 'true'
+
+    # Connect, compile templates and fill caches in each gunicorn worker before it serves
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+
+    # Bearer token for the /admin endpoints; they are disabled without one
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+    # Log of SQL statements slower than the threshold, with their query plans
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'false').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 200))
+    SLOW_QUERY_REDACT_PARAMS = os.environ.get('SLOW_QUERY_REDACT_PARAMS', 'true').lower() == 'true'
+    # Shared by the worker processes and the CLI; defaults to instance/slow_queries.jsonl,
+    # an empty value keeps the log in memory only
+    SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE')
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -0,0 +1,43 @@
+"""Gunicorn server hooks, loaded automatically when gunicorn starts in this directory."""
+import glob
+import os
+import tempfile
+
+# Runs in the master before the app is loaded, so every worker (and a
+# --preload app) reports through the shared directory unless one is set
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus'))
+
+
+def on_starting(server):
+    """Clear metric files a previous run of the server left behind."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of an exited worker; its counters keep adding up."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Fit the worker's app to its thread count and warm it up before it accepts connections.
+
+    Also safe with ``--preload``: connections inherited from the master are
+    dropped first.
+    """
+    from flask import Flask
+
+    from app.warmup import warm_up
+    app = worker.wsgi
+    if isinstance(app, Flask) and worker.cfg.threads > 1:
+        # Event stream clients hold a thread each; always leave one for other requests
+        feed = app.extensions['task_feed']
+        feed.max_subscribers = min(feed.max_subscribers, worker.cfg.threads - 1)
+    if isinstance(app, Flask) and app.config.get('WARMUP_ENABLED'):
+        worker.log.info(f'Worker warmed up in {warm_up(app):.3f}s')
@@ -0,0 +1,135 @@
+"""Add tasks_archive for completed tasks moved out of tasks
+
+Revision ID: a6c3f8e27d19
+Revises: c2d7e5a94f60
+Create Date: 2026-10-18 16:41:09.582316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c3f8e27d19'
+down_revision = 'c2d7e5a94f60'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_ARCHIVE_TRIGGERS = [
+    """CREATE TRIGGER tasks_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+        INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + 1;
+    END""",
+    """CREATE TRIGGER tasks_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        UPDATE task_daily_counts SET created_count = created_count - 1
+        WHERE day = date(old.created_at);
+    END""",
+]
+
+# Rebuilding tasks drops its triggers, so they are created again afterwards
+SQLITE_TASK_TRIGGERS = [
+    """CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER task_stats_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+        INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + 1;
+    END""",
+    """CREATE TRIGGER task_stats_ad AFTER DELETE ON tasks BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        UPDATE task_daily_counts SET created_count = created_count - 1
+        WHERE day = date(old.created_at);
+    END""",
+    """CREATE TRIGGER task_stats_au AFTER UPDATE OF status ON tasks
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+    END""",
+]
+
+POSTGRES_ARCHIVE_TRIGGERS = [
+    """CREATE TRIGGER tasks_archive_stats AFTER INSERT OR DELETE ON tasks_archive
+    FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+]
+
+
+def _rebuild_tasks(autoincrement):
+    # SQLite reuses the highest rowid after a delete unless the table is
+    # AUTOINCREMENT, which can only be set by recreating it
+    with op.batch_alter_table('tasks', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for statement in SQLITE_TASK_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('tasks_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tasks_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_archive_created_at_id', ['created_at', 'id'], unique=False)
+
+    # ### end Alembic commands ###
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _rebuild_tasks(True)
+        triggers = SQLITE_ARCHIVE_TRIGGERS
+    elif dialect == 'postgresql':
+        triggers = POSTGRES_ARCHIVE_TRIGGERS
+    else:
+        return
+    for statement in triggers:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in ('tasks_archive_stats_ad', 'tasks_archive_stats_ai'):
+            op.execute(f'DROP TRIGGER {name}')
+        _rebuild_tasks(False)
+    elif dialect == 'postgresql':
+        op.execute('DROP TRIGGER tasks_archive_stats ON tasks_archive')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('tasks_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_archive_created_at_id')
+
+    op.drop_table('tasks_archive')
+    # ### end Alembic commands ###
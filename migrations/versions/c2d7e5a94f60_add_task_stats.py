@@ -0,0 +1,119 @@
+"""Add trigger-maintained task statistics tables
+
+Revision ID: c2d7e5a94f60
+Revises: 3f6b9d0e8a17
+Create Date: 2026-10-18 15:18:42.096315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d7e5a94f60'
+down_revision = '3f6b9d0e8a17'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER task_stats_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+        INSERT INTO task_daily_counts (day, created_count)
+        SELECT date(new.created_at), 1 WHERE new.created_at IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET created_count = created_count + 1;
+    END""",
+    """CREATE TRIGGER task_stats_ad AFTER DELETE ON tasks BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        UPDATE task_daily_counts SET created_count = created_count - 1
+        WHERE day = date(old.created_at);
+    END""",
+    """CREATE TRIGGER task_stats_au AFTER UPDATE OF status ON tasks
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE task_status_counts SET task_count = task_count - 1
+        WHERE status = old.status;
+        INSERT INTO task_status_counts (status, task_count)
+        SELECT new.status, 1 WHERE new.status IS NOT NULL
+        ON CONFLICT (status) DO UPDATE SET task_count = task_count + 1;
+    END""",
+]
+
+POSTGRES_TRIGGERS = [
+    """CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IS NOT NULL THEN
+            UPDATE task_status_counts SET task_count = task_count - 1
+            WHERE status = OLD.status;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IS NOT NULL THEN
+            INSERT INTO task_status_counts (status, task_count) VALUES (NEW.status, 1)
+            ON CONFLICT (status) DO UPDATE
+            SET task_count = task_status_counts.task_count + 1;
+        END IF;
+        IF TG_OP = 'INSERT' AND NEW.created_at IS NOT NULL THEN
+            INSERT INTO task_daily_counts (day, created_count) VALUES (NEW.created_at::date, 1)
+            ON CONFLICT (day) DO UPDATE
+            SET created_count = task_daily_counts.created_count + 1;
+        END IF;
+        IF TG_OP = 'DELETE' AND OLD.created_at IS NOT NULL THEN
+            UPDATE task_daily_counts SET created_count = created_count - 1
+            WHERE day = OLD.created_at::date;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER task_stats AFTER INSERT OR DELETE OR UPDATE OF status ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_stats_apply()""",
+]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('task_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('created_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('task_status_counts',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    # ### end Alembic commands ###
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        triggers, day = SQLITE_TRIGGERS, 'date(created_at)'
+    elif dialect == 'postgresql':
+        triggers, day = POSTGRES_TRIGGERS, 'CAST(created_at AS DATE)'
+    else:
+        return
+    for statement in triggers:
+        op.execute(statement)
+
+    # Backfill from the existing tasks
+    op.execute("""INSERT INTO task_status_counts (status, task_count)
+        SELECT status, COUNT(*) FROM tasks WHERE status IS NOT NULL GROUP BY status""")
+    op.execute(f"""INSERT INTO task_daily_counts (day, created_count)
+        SELECT {day}, COUNT(*) FROM tasks WHERE created_at IS NOT NULL GROUP BY {day}""")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in ('task_stats_au', 'task_stats_ad', 'task_stats_ai'):
+            op.execute(f'DROP TRIGGER {name}')
+    elif dialect == 'postgresql':
+        op.execute('DROP TRIGGER task_stats ON tasks')
+        op.execute('DROP FUNCTION task_stats_apply()')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('task_status_counts')
+    op.drop_table('task_daily_counts')
+    # ### end Alembic commands ###
@@ -1,7 +1,8 @@
 import pytest
 import json
 from app import create_app
-from app.models import db, Task
+from app.cache import read_source
+from app.models import db, Task, TableVersion
 
 @pytest.fixture
 def app():
@@ -203,4 +204,41 @@ def test_error_handling(client):
     
     # Test retrieving non-existent task
     get_response = client.get(f'/api/tasks/{non_existent_id}')
-    assert get_response.status_code == 404 
\ No newline at end of file
+    assert get_response.status_code == 404
+
+
+def _bootstrap(response):
+    """The JSON bootstrap embedded in an index page."""
+    html = response.get_data(as_text=True)
+    start = html.index('<script id="bootstrap" type="application/json">') + len(
+        '<script id="bootstrap" type="application/json">')
+    return json.loads(html[start:html.index('</script>', start)])
+
+def test_index_embeds_first_page_of_tasks(client, app):
+    """Test the index page carries the tasks of its filter, cached until a write."""
+    app.config['TASKS_INDEX_PAGE_SIZE'] = 2
+    for title in ['One', 'Two', '<b>Three</b>']:
+        client.post('/api/tasks', json={'title': title})
+    client.put('/api/tasks/2', json={'status': 'completed'})
+    
+    data = _bootstrap(client.get('/'))
+    assert data['filter'] == 'all'
+    assert [task['title'] for task in data['tasks']] == ['One', 'Two']
+    assert data['next_cursor']
+    assert data['last_event_id'] == 4
+    
+    response = client.get('/?status=active')
+    assert '<b>Three</b>' not in response.get_data(as_text=True)
+    data = _bootstrap(response)
+    assert [task['title'] for task in data['tasks']] == ['One', '<b>Three</b>']
+    assert data['next_cursor'] is None
+    assert 'filter-btn active" data-filter="active"' in response.get_data(as_text=True)
+    
+    # Served from the cache until a write invalidates it
+    cache = app.extensions['task_cache']
+    tag = (read_source(), TableVersion.current('tasks'))
+    assert cache.get(('list', 'index', 'active'), tag) is not None
+    client.delete('/api/tasks/1')
+    assert cache.get(('list', 'index', 'active'), tag) is None
+    assert [task['title'] for task in _bootstrap(client.get('/?status=active'))['tasks']] == [
+        '<b>Three</b>']
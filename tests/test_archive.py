@@ -0,0 +1,128 @@
+import pytest
+import json
+import time
+from datetime import datetime, timedelta
+from app import create_app
+from app.models import db, Task, TaskArchive, TaskEvent
+from app.stats import stats_differences
+from config.config import TestingConfig
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def _add_tasks(app):
+    """Tasks of which only 'Old done' is due for archiving after 30 days."""
+    old = datetime.utcnow() - timedelta(days=60)
+    with app.app_context():
+        tasks = [
+            Task(title='Old done', status='completed', created_at=old),
+            Task(title='Old active', status='active', created_at=old),
+            Task(title='Recently done', status='completed', created_at=old,
+                 updated_at=datetime.utcnow()),
+            Task(title='New done', status='completed'),
+        ]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return [task.id for task in tasks]
+
+def test_archive_command_moves_old_completed_tasks(client, app):
+    """Test "flask tasks archive" moves only old completed tasks, keeping stats and ids."""
+    ids = _add_tasks(app)
+    stats = json.loads(client.get('/api/tasks/stats').data)['stats']
+
+    result = app.test_cli_runner().invoke(args=['tasks', 'archive', '--pause', '0'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Archived 1 tasks' in result.output
+    with app.app_context():
+        assert db.session.scalars(db.select(TaskArchive.id)).all() == [ids[0]]
+        assert db.session.get(Task, ids[0]) is None
+        event = db.session.scalars(db.select(TaskEvent).order_by(TaskEvent.id.desc())).first()
+        assert (event.kind, event.task_id) == ('archived', ids[0])
+        assert stats_differences() == []
+    assert json.loads(client.get('/api/tasks/stats').data)['stats'] == stats
+
+    result = app.test_cli_runner().invoke(args=['tasks', 'archive', '--older-than-days', '0'])
+    assert 'Archived 2 tasks' in result.output
+
+def test_archive_runs_in_batches(app):
+    """Test the mover commits one batch at a time until nothing is due."""
+    old = datetime.utcnow() - timedelta(days=60)
+    with app.app_context():
+        db.session.add_all([Task(title=f'Task {i}', status='completed', created_at=old)
+                            for i in range(5)])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(
+        args=['tasks', 'archive', '--batch-size', '2', '--pause', '0'])
+
+    assert result.exit_code == 0, result.output
+    assert [line.strip() for line in result.output.splitlines()[:3]] == [
+        '2 tasks archived', '4 tasks archived', '5 tasks archived']
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(TaskArchive)) == 5
+        assert db.session.scalar(db.select(db.func.count()).select_from(Task)) == 0
+
+def test_archived_ids_are_not_reused(client, app):
+    """Test a task created after the newest one was archived gets a new id."""
+    old = datetime.utcnow() - timedelta(days=60)
+    with app.app_context():
+        task = Task(title='Done', status='completed', created_at=old)
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    app.test_cli_runner().invoke(args=['tasks', 'archive'])
+
+    response = client.post('/api/tasks', json={'title': 'Next'})
+
+    assert json.loads(response.data)['task']['id'] > task_id
+
+def test_archive_without_returning_support(app, monkeypatch):
+    """Test dialects without DELETE ... RETURNING lock and move the same tasks."""
+    ids = _add_tasks(app)
+    with app.app_context():
+        monkeypatch.setattr(db.engine.dialect, 'delete_returning', False)
+
+    result = app.test_cli_runner().invoke(args=['tasks', 'archive'])
+
+    assert 'Archived 1 tasks' in result.output
+    with app.app_context():
+        assert db.session.scalars(db.select(TaskArchive.id)).all() == [ids[0]]
+        assert stats_differences() == []
+
+def test_background_archiver(monkeypatch):
+    """Test ARCHIVE_INTERVAL runs the mover from a thread started by the first request."""
+    monkeypatch.setattr(TestingConfig, 'ARCHIVE_INTERVAL', 0.05)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    try:
+        ids = _add_tasks(app)
+        app.test_client().get('/api/tasks')
+
+        deadline = time.monotonic() + 5
+        with app.app_context():
+            while not db.session.get(TaskArchive, ids[0]) and time.monotonic() < deadline:
+                db.session.remove()
+                time.sleep(0.05)
+            assert db.session.get(TaskArchive, ids[0]) is not None
+    finally:
+        app.extensions['task_archiver'].stop()
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
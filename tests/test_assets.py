@@ -0,0 +1,66 @@
+import pytest
+import gzip
+import os
+import re
+from app import create_app
+from app.assets import file_hash
+from app.models import db
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def _static_source(app, filename):
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return f.read()
+
+def test_index_links_fingerprinted_assets(client, app):
+    """Test the index page links static files under their content hash."""
+    html = client.get('/').get_data(as_text=True)
+    digest = file_hash(os.path.join(app.static_folder, 'js', 'app.js'))
+
+    assert f'/static/js/app.{digest}.js' in html
+    assert re.search(r'/static/css/styles\.[0-9a-f]{12}\.css', html)
+
+def test_fingerprinted_assets_are_immutable(client, app):
+    """Test fingerprinted names are served for a year, compressed or not."""
+    url = '/static/' + app.extensions['asset_manifest'].assets['js/app.js']
+
+    response = client.get(url)
+    data = response.get_data()
+    response.close()
+    assert data == _static_source(app, 'js/app.js')
+    assert response.cache_control.max_age == 365 * 24 * 3600
+    assert response.cache_control.immutable
+    assert response.cache_control.public
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    data = response.get_data()
+    response.close()
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(data) == _static_source(app, 'js/app.js')
+    assert response.cache_control.immutable
+
+def test_unhashed_and_outdated_names_are_not_immutable(client, app):
+    """Test plain names and hashes from before a change keep the default caching."""
+    for url in ('/static/css/styles.css', '/static/css/styles.0123456789ab.css'):
+        response = client.get(url)
+        data = response.get_data()
+        response.close()
+        assert data == _static_source(app, 'css/styles.css')
+        assert not response.cache_control.immutable
+
+    assert client.get('/static/css/missing.0123456789ab.css').status_code == 404
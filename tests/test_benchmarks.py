@@ -0,0 +1,88 @@
+import pytest
+from app import create_app
+from app.models import db, Task
+from benchmarks import report
+from benchmarks.dataset import ensure_dataset, task_rows
+from benchmarks.drivers import WSGIDriver
+from benchmarks.load import run_benchmark
+from benchmarks.scenarios import SCENARIOS
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_dataset_is_deterministic():
+    """Test the same seed always generates the same tasks."""
+    assert list(task_rows(0, 50, seed=1)) == list(task_rows(0, 50, seed=1))
+    assert list(task_rows(0, 50, seed=1)) != list(task_rows(0, 50, seed=2))
+    # Batches line up with a single pass
+    assert list(task_rows(0, 20)) + list(task_rows(20, 40)) == list(task_rows(0, 40))
+
+def test_changed_dataset_is_seeded_again(app):
+    """Test a dataset left modified by an interrupted run is not reused."""
+    ensure_dataset(100, progress=None)
+    db.session.execute(db.update(Task).where(Task.id == 5).values(status='completed'))
+    db.session.commit()
+
+    messages = []
+    ensure_dataset(100, progress=messages.append)
+
+    assert messages[0].startswith('seeded 100 tasks')
+    assert db.session.get(Task, 5).status == 'active'
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+
+    assert report.percentile(values, 50) == 50
+    assert report.percentile(values, 95) == 95
+    assert report.percentile(values, 99) == 99
+    assert report.percentile([7], 99) == 7
+    assert report.percentile([], 50) == 0.0
+
+def test_compare_flags_regressions():
+    """Test only metrics worse than the threshold count as regressions."""
+    settings = {'rows': 1000, 'driver': 'wsgi', 'database': 'sqlite', 'concurrency': 4}
+    baseline = {'settings': settings, 'endpoints': {
+        'detail': {'throughput_rps': 1000, 'p50_ms': 2.0, 'p95_ms': 5.0, 'p99_ms': 9.0},
+        'search': {'throughput_rps': 100, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0}
+    }}
+    results = {'settings': dict(settings, concurrency=8), 'endpoints': {
+        'detail': {'throughput_rps': 950, 'p50_ms': 2.1, 'p95_ms': 7.0, 'p99_ms': 9.0},
+        'search': {'throughput_rps': 150, 'p50_ms': 8.0, 'p95_ms': 15.0, 'p99_ms': 25.0},
+        'stats': {'throughput_rps': 10, 'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0}
+    }}
+
+    regressions, mismatched = report.compare(results, baseline, threshold=0.10)
+
+    assert mismatched == ['concurrency']
+    assert [(r[0], r[1]) for r in regressions] == [('detail', 'p95_ms')]
+    assert regressions[0][4] == pytest.approx(0.4)
+
+def test_run_benchmark_drives_every_endpoint(app):
+    """Test a small run covers every scenario without errors and keeps the row count."""
+    ensure_dataset(300, progress=None)
+    driver = WSGIDriver(app)
+
+    results = run_benchmark(app, driver, SCENARIOS, requests=10, concurrency=2,
+                            warmup=2, sample_size=50, progress=None)
+
+    assert list(results) == [scenario.name for scenario in SCENARIOS]
+    for name, stats in results.items():
+        assert stats['requests'] == 10, name
+        assert stats['errors'] == 0, name
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
+    db.session.remove()
+    assert db.session.scalar(db.select(db.func.count()).select_from(Task)) == 300
+    # Updated tasks were restored, so the next run reuses the same data
+    messages = []
+    ensure_dataset(300, progress=messages.append)
+    assert messages == ['reusing existing dataset of 300 tasks']
@@ -0,0 +1,210 @@
+import pytest
+import json
+import time
+from app import create_app
+from app import cache
+from app.cache import TaskCache
+from sqlalchemy import event
+from app.models import db, Task
+from config.config import TestingConfig
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+    
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted when the cache is full."""
+    cache = TaskCache(max_entries=2, ttl=60)
+    cache.set(('task', 1, None), 'one', 3)
+    cache.set(('task', 2, None), 'two', 3)
+    cache.get(('task', 1, None))
+    cache.set(('task', 3, None), 'three', 5)
+    
+    assert cache.get(('task', 1, None)) == 'one'
+    assert cache.get(('task', 2, None)) is None
+    assert cache.get(('task', 3, None)) == 'three'
+    assert cache.stats()['evictions'] == 1
+
+def test_ttl():
+    """Test entries expire after the TTL."""
+    cache = TaskCache(max_entries=10, ttl=0.05)
+    cache.set(('list', None), 'page', 4)
+    
+    assert cache.get(('list', None)) == 'page'
+    time.sleep(0.06)
+    assert cache.get(('list', None)) is None
+    
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+def test_values_read_before_an_invalidation_are_not_cached():
+    """Test a value built before a concurrent commit's invalidation is dropped."""
+    cache = TaskCache(max_entries=10, ttl=60)
+    generation = cache.generation
+    
+    cache.invalidate({1})
+    cache.set(('task', 1, None), 'stale', 5, generation)
+    
+    assert cache.get(('task', 1, None)) is None
+    cache.set(('task', 1, None), 'fresh', 5, cache.generation)
+    assert cache.get(('task', 1, None)) == 'fresh'
+
+def test_oversized_entries_are_skipped():
+    """Test values larger than max_entry_bytes are not cached."""
+    cache = TaskCache(max_entries=10, ttl=60, max_entry_bytes=10)
+    cache.set(('list', None), 'x' * 11, 11)
+    assert cache.stats()['entries'] == 0
+
+def test_entries_are_only_served_to_matching_tags():
+    """Test a lookup with another tag misses the entry."""
+    cache = TaskCache(max_entries=10, ttl=60)
+    cache.set(('list', None), 'replica page', 12, tag='replica')
+    
+    assert cache.get(('list', None), 'primary') is None
+    assert cache.get(('list', None), 'replica') == 'replica page'
+
+def test_precise_invalidation():
+    """Test invalidating a task drops its entries and every list, but no other task."""
+    cache = TaskCache(max_entries=10, ttl=60)
+    cache.set(('task', 1, None), 'one', 3)
+    cache.set(('task', 2, None), 'two', 3)
+    cache.set(('list', None, None, None, None), 'list', 4)
+    
+    cache.invalidate({1})
+    
+    assert cache.get(('task', 1, None)) is None
+    assert cache.get(('task', 2, None)) == 'two'
+    assert cache.get(('list', None, None, None, None)) is None
+
+def test_reads_are_served_from_cache(client, app):
+    """Test repeated reads hit the cache and writes through the session invalidate it."""
+    with app.app_context():
+        task = Task(title='Cached')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    cache = app.extensions['task_cache']
+    
+    client.get('/api/tasks')
+    client.get(f'/api/tasks/{task_id}')
+    response = client.get('/api/tasks')
+    assert json.loads(response.data)['tasks'][0]['title'] == 'Cached'
+    response = client.get(f'/api/tasks/{task_id}')
+    assert 'ETag' in response.headers
+    assert cache.stats()['hits'] == 2
+    
+    # A direct ORM write outside the routes still invalidates
+    with app.app_context():
+        db.session.get(Task, task_id).title = 'Changed'
+        db.session.commit()
+    
+    response = client.get(f'/api/tasks/{task_id}')
+    assert json.loads(response.data)['task']['title'] == 'Changed'
+    response = client.get('/api/tasks')
+    assert json.loads(response.data)['tasks'][0]['title'] == 'Changed'
+
+def test_cache_hits_only_check_the_version(client, app):
+    """Test hits run one version check each and survive writes to other tasks."""
+    with app.app_context():
+        tasks = [Task(title='Kept'), Task(title='Other')]
+        db.session.add_all(tasks)
+        db.session.commit()
+        kept_id, other_id = tasks[0].id, tasks[1].id
+        engine = db.engine
+    statements = []
+    
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    client.get(f'/api/tasks/{kept_id}')
+    client.put(
+        f'/api/tasks/{other_id}',
+        data=json.dumps({'status': 'completed'}),
+        content_type='application/json'
+    )
+    client.get('/api/tasks')
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(f'/api/tasks/{kept_id}')
+        client.get('/api/tasks')
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    
+    assert json.loads(response.data)['task']['title'] == 'Kept'
+    assert app.extensions['task_cache'].stats()['hits'] == 2
+    assert len(statements) == 2
+
+def test_bulk_writes_invalidate(client, app):
+    """Test bulk statements issued by /api/tasks/bulk invalidate cached reads."""
+    response = client.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Bulk Target'}),
+        content_type='application/json'
+    )
+    task_id = json.loads(response.data)['task']['id']
+    client.get(f'/api/tasks/{task_id}')
+    
+    client.post(
+        '/api/tasks/bulk',
+        data=json.dumps({'update': [{'id': task_id, 'title': 'Bulk Updated'}]}),
+        content_type='application/json'
+    )
+    
+    assert app.extensions['task_cache'].stats()['entries'] == 0
+    response = client.get(f'/api/tasks/{task_id}')
+    assert json.loads(response.data)['task']['title'] == 'Bulk Updated'
+
+def test_writes_by_other_processes_show_at_once(monkeypatch, tmp_path):
+    """Test an app sees writes another app made to the shared database despite its cache."""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "shared.db"}')
+    reader_app = create_app('testing')
+    writer_app = create_app('testing')
+    with reader_app.app_context():
+        db.create_all()
+    reader = reader_app.test_client()
+    writer = writer_app.test_client()
+    
+    response = writer.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Before'}),
+        content_type='application/json'
+    )
+    task_id = json.loads(response.data)['task']['id']
+    for _ in range(2):
+        assert json.loads(reader.get('/api/tasks').data)['tasks'][0]['title'] == 'Before'
+        assert json.loads(reader.get(f'/api/tasks/{task_id}').data)['task']['title'] == 'Before'
+    assert reader_app.extensions['task_cache'].stats()['hits'] == 2
+    
+    writer.put(
+        f'/api/tasks/{task_id}',
+        data=json.dumps({'title': 'After'}),
+        content_type='application/json'
+    )
+    
+    assert json.loads(reader.get('/api/tasks').data)['tasks'][0]['title'] == 'After'
+    assert json.loads(reader.get(f'/api/tasks/{task_id}').data)['task']['title'] == 'After'
+    for app in (reader_app, writer_app):
+        with app.app_context():
+            db.engine.dispose()
+
+def test_cache_can_be_disabled(app):
+    """Test TASK_CACHE_ENABLED switches the cache off."""
+    app.extensions.pop('task_cache')
+    app.config['TASK_CACHE_ENABLED'] = False
+    cache.init_app(app)
+    
+    assert 'task_cache' not in app.extensions
@@ -0,0 +1,118 @@
+import pytest
+import gzip
+import json
+import os
+import zlib
+from starlette.testclient import TestClient
+from app import create_app
+from app.async_api import create_asgi_app
+from app.compression import choose_encoding
+from app.models import db, Task
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Task(title=f'Task {i}', description='Compressible ' * 10)
+                            for i in range(50)])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation honours q-values and prefers gzip."""
+    assert choose_encoding('gzip, deflate, br') == 'gzip'
+    assert choose_encoding('deflate') == 'deflate'
+    assert choose_encoding('gzip;q=0.5, deflate') == 'deflate'
+    assert choose_encoding('gzip;q=0, deflate;q=0') is None
+    assert choose_encoding('*') == 'gzip'
+    assert choose_encoding('br') is None
+    assert choose_encoding(None) is None
+
+def test_large_json_is_gzipped(client):
+    """Test list responses are compressed for clients accepting gzip."""
+    plain = client.get('/api/tasks')
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert plain.headers.get('Content-Encoding') is None
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+    # The compressed variant's ETag is weak but still revalidates
+    etag = response.headers['ETag']
+    assert etag == 'W/' + plain.headers['ETag']
+    revalidated = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+def test_deflate_and_small_responses(client):
+    """Test deflate is used when it is the only option and small bodies stay plain."""
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'deflate'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(response.data))['success'] is True
+
+    small = client.get('/api/tasks?limit=1&fields=id', headers={'Accept-Encoding': 'gzip'})
+    assert small.headers.get('Content-Encoding') is None
+    assert small.headers['Vary'] == 'Accept-Encoding'
+
+def test_streamed_ndjson_is_compressed_incrementally(client):
+    """Test generator responses are compressed chunk by chunk."""
+    response = client.get('/api/tasks?stream=1', headers={
+        'Accept': 'application/x-ndjson',
+        'Accept-Encoding': 'gzip'
+    }, buffered=False)
+    try:
+        assert response.is_streamed
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        body = b''.join(response.response)
+    finally:
+        response.close()
+
+    lines = gzip.decompress(body).decode().splitlines()
+    assert len(lines) == 50
+    assert json.loads(lines[0])['title'] == 'Task 0'
+
+def test_static_files_are_served_precompressed(client, app):
+    """Test static assets come from the copies compressed at startup."""
+    with open(os.path.join(app.static_folder, 'js', 'app.js'), 'rb') as f:
+        source = f.read()
+
+    response = client.get('/static/js/app.js', headers={'Accept-Encoding': 'gzip'})
+    data = response.get_data()
+    response.close()
+
+    assert os.path.exists(os.path.join(app.instance_path, 'precompressed', 'js', 'app.js.gz'))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    assert gzip.decompress(data) == source
+
+    plain = client.get('/static/js/app.js')
+    assert plain.get_data() == source
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+    plain.close()
+
+def test_asgi_api_compresses_responses(app):
+    """Test the asyncio API negotiates compression the same way."""
+    with TestClient(create_asgi_app(flask_app=app)) as asgi:
+        response = asgi.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+        streamed = asgi.get('/api/tasks?stream=1', headers={
+            'Accept': 'application/x-ndjson',
+            'Accept-Encoding': 'deflate'
+        })
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    assert len(response.json()['tasks']) == 50
+    assert streamed.headers['Content-Encoding'] == 'deflate'
+    assert len(streamed.text.splitlines()) == 50
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import text
+from app import create_app
+from app.models import db
+from config.config import EngineSettings
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+    
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_engine_settings_from_env():
+    """Test environment variables override and are parsed to the field types."""
+    settings = EngineSettings.from_env({
+        'DB_POOL_SIZE': '12',
+        'DB_POOL_TIMEOUT': '2.5',
+        'DB_POOL_PRE_PING': 'false',
+        'SQLITE_SYNCHRONOUS': 'full',
+        'SQLITE_CACHE_SIZE': ''
+    })
+    
+    assert settings.pool_size == 12
+    assert settings.pool_timeout == 2.5
+    assert settings.pool_pre_ping is False
+    assert settings.sqlite_synchronous == 'FULL'
+    assert settings.sqlite_cache_size == EngineSettings().sqlite_cache_size
+
+@pytest.mark.parametrize('name, value', [
+    ('DB_POOL_SIZE', 'lots'),
+    ('DB_POOL_PRE_PING', 'maybe'),
+])
+def test_engine_settings_reject_unparseable_values(name, value):
+    """Test unparseable environment values name the variable."""
+    with pytest.raises(ValueError, match=name):
+        EngineSettings.from_env({name: value})
+
+@pytest.mark.parametrize('name, value', [
+    ('DB_POOL_SIZE', '0'),
+    ('DB_POOL_TIMEOUT', '-1'),
+    ('DB_STATEMENT_TIMEOUT_MS', '-5'),
+    ('SQLITE_JOURNAL_MODE', 'fast'),
+])
+def test_create_app_validates_engine_settings(monkeypatch, name, value):
+    """Test create_app refuses out-of-range settings."""
+    monkeypatch.setenv(name, value)
+    
+    with pytest.raises(ValueError, match=name):
+        create_app('testing')
+
+def test_engine_options():
+    """Test pool sizing and statement timeouts depend on the database."""
+    settings = EngineSettings(pool_size=7, statement_timeout_ms=5000)
+    
+    memory = settings.engine_options('sqlite://')
+    assert 'pool_size' not in memory
+    assert settings.engine_options('sqlite:///:memory:') == memory
+    
+    sqlite_file = settings.engine_options('sqlite:////tmp/app.db')
+    assert sqlite_file['pool_size'] == 7
+    assert 'connect_args' not in sqlite_file
+    
+    postgres = settings.engine_options('postgresql://localhost/tasks')
+    assert postgres['pool_size'] == 7
+    assert postgres['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+def test_sqlite_pragmas_applied(app):
+    """Test every SQLite connection gets the configured pragmas."""
+    with db.engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        # NORMAL
+        assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        assert connection.execute(text('PRAGMA cache_size')).scalar() == -64000
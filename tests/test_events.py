@@ -0,0 +1,224 @@
+import pytest
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from app import create_app
+from app.models import db, TaskEvent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+    app.config['TASK_EVENTS_POLL_INTERVAL'] = 0.01
+    app.extensions['task_feed'].poll_interval = 0.01
+    
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def read_events(response, count):
+    """Read count SSE events (ignoring comments and the retry hint) from a streamed response."""
+    events = []
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('id:'):
+            lines = dict(line.split(': ', 1) for line in text.strip().split('\n'))
+            events.append((int(lines['id']), lines['event'], json.loads(lines['data'])))
+            if len(events) == count:
+                return events
+    return events
+
+def test_writes_are_logged(client, app):
+    """Test every write route appends compact change events."""
+    response = client.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Logged'}),
+        content_type='application/json'
+    )
+    task_id = json.loads(response.data)['task']['id']
+    client.put(
+        f'/api/tasks/{task_id}',
+        data=json.dumps({'status': 'completed'}),
+        content_type='application/json'
+    )
+    client.delete(f'/api/tasks/{task_id}')
+    
+    with app.app_context():
+        events = TaskEvent.query.order_by(TaskEvent.id).all()
+        assert [event.kind for event in events] == ['created', 'updated', 'deleted']
+        assert json.loads(events[0].data)['title'] == 'Logged'
+        updated = json.loads(events[1].data)
+        assert set(updated) == {'id', 'status', 'updated_at'}
+        assert updated['status'] == 'completed'
+        assert json.loads(events[2].data) == {'id': task_id}
+
+def test_event_stream_replays_missed_events(client):
+    """Test reconnecting with Last-Event-ID replays the events missed."""
+    for title in ['First', 'Second']:
+        client.post(
+            '/api/tasks',
+            data=json.dumps({'title': title}),
+            content_type='application/json'
+        )
+    
+    response = client.get('/api/tasks/events', headers={'Last-Event-ID': '1'}, buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        events = read_events(response, 1)
+    finally:
+        response.close()
+    
+    assert events[0][0] == 2
+    assert events[0][1] == 'created'
+    assert events[0][2]['title'] == 'Second'
+
+def test_event_stream_resumes_from_query_parameter(client):
+    """Test a first connection replays from the position the index page embedded."""
+    client.post('/api/tasks', json={'title': 'Before'})
+    client.post('/api/tasks', json={'title': 'After'})
+    
+    response = client.get('/api/tasks/events?last_event_id=1', buffered=False)
+    try:
+        events = read_events(response, 1)
+    finally:
+        response.close()
+    
+    assert events[0][2]['title'] == 'After'
+
+def test_event_stream_delivers_live_writes(client, app):
+    """Test writes made after connecting are pushed to the stream."""
+    response = client.get('/api/tasks/events', buffered=False)
+    try:
+        writer = app.test_client()
+        thread = threading.Timer(0.05, lambda: writer.post(
+            '/api/tasks/bulk',
+            data=json.dumps({'create': [{'title': 'Live 1'}, {'title': 'Live 2'}]}),
+            content_type='application/json'
+        ))
+        thread.start()
+        events = read_events(response, 2)
+        thread.join()
+    finally:
+        response.close()
+    
+    assert [(kind, data['title']) for _, kind, data in events] == [
+        ('created', 'Live 1'), ('created', 'Live 2')
+    ]
+
+def test_new_subscribers_skip_events_written_while_idle(client, app):
+    """Test a subscriber arriving after the poller stopped only gets new events."""
+    feed = app.extensions['task_feed']
+    subscriber, _ = feed.subscribe()
+    poller = feed._thread
+    feed.unsubscribe(subscriber)
+    poller.join(timeout=1)
+    
+    for title in ['Idle 1', 'Idle 2', 'Idle 3']:
+        client.post(
+            '/api/tasks',
+            data=json.dumps({'title': title}),
+            content_type='application/json'
+        )
+    
+    response = client.get('/api/tasks/events', buffered=False)
+    try:
+        writer = app.test_client()
+        thread = threading.Timer(0.05, lambda: writer.post(
+            '/api/tasks',
+            data=json.dumps({'title': 'Live'}),
+            content_type='application/json'
+        ))
+        thread.start()
+        events = read_events(response, 1)
+        thread.join()
+    finally:
+        response.close()
+    
+    assert [(kind, data['title']) for _, kind, data in events] == [('created', 'Live')]
+
+def test_event_stream_clients_are_capped(client, app):
+    """Test connections past the per-process limit are turned away with Retry-After."""
+    app.extensions['task_feed'].max_subscribers = 1
+    response = client.get('/api/tasks/events', buffered=False)
+    try:
+        refused = client.get('/api/tasks/events')
+    finally:
+        response.close()
+    
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '3'
+    assert refused.get_json()['success'] is False
+    assert client.get('/api/tasks/events', buffered=False).status_code == 200
+
+def test_gunicorn_serves_requests_while_streams_are_open(tmp_path):
+    """Test event streams never take a gthread worker's last thread."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ,
+               FLASK_ENV='testing',
+               PROMETHEUS_MULTIPROC_DIR=str(tmp_path / 'metrics'),
+               TEST_DATABASE_URL=f'sqlite:///{tmp_path / "events.db"}')
+    subprocess.run([sys.executable, '-c', (
+        'from app import create_app\n'
+        'from app.models import db\n'
+        "with create_app('testing').app_context():\n"
+        '    db.create_all()\n'
+    )], cwd=ROOT, env=env, check=True)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+         '--worker-class', 'gthread', '--threads', '2', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    
+    def get(path, timeout=5):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        connection.request('GET', path)
+        return connection, connection.getresponse()
+    
+    streams = []
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                get('/ping')[0].close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        
+        # The stream holds one of the two threads, the other stays free
+        connection, stream = get('/api/tasks/events')
+        streams.append(connection)
+        assert stream.status == 200
+        assert stream.readline() == b'retry: 3000\n'
+        
+        connection, refused = get('/api/tasks/events')
+        streams.append(connection)
+        assert refused.status == 503
+        assert refused.headers['Retry-After'] == '3'
+        
+        connection, ping = get('/ping')
+        streams.append(connection)
+        assert ping.status == 200
+    finally:
+        for connection in streams:
+            connection.close()
+        server.kill()
+        server.wait()
@@ -0,0 +1,84 @@
+import pytest
+import json
+import threading
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from app.models import db, Task, TaskEvent
+from config.config import TestingConfig
+
+@pytest.fixture
+def app(monkeypatch):
+    """Create an app committing task creates in groups."""
+    monkeypatch.setattr(TestingConfig, 'TASK_GROUP_COMMIT', True)
+    # Long enough for every create of a test to join the first batch
+    monkeypatch.setattr(TestingConfig, 'TASK_GROUP_COMMIT_MAX_DELAY_MS', 300)
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def _count_commits(app):
+    commits = []
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: commits.append(1))
+    return commits
+
+def test_concurrent_creates_share_a_commit(client, app):
+    """Test a burst of creates is committed together and each gets its own task."""
+    commits = _count_commits(app)
+    responses = []
+
+    def create(i):
+        responses.append(client.post('/api/tasks', json={'title': f'Burst {i}'}))
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [201] * 10
+    tasks = [json.loads(response.data)['task'] for response in responses]
+    assert len({task['id'] for task in tasks}) == 10
+    assert len(commits) < 10
+
+    with app.app_context():
+        titles = {task.id: task.title for task in db.session.scalars(db.select(Task))}
+        events = db.session.scalar(db.select(db.func.count()).select_from(TaskEvent)
+                                   .where(TaskEvent.kind == 'created'))
+    assert titles == {task['id']: task['title'] for task in tasks}
+    assert events == 10
+
+def test_created_task_is_listed_right_away(client):
+    """Test the create invalidates cached lists before responding."""
+    client.get('/api/tasks')
+
+    response = client.post('/api/tasks', json={'title': 'Grouped'})
+    listed = json.loads(client.get('/api/tasks').data)['tasks']
+
+    assert response.status_code == 201
+    assert [task['title'] for task in listed] == ['Grouped']
+
+def test_a_failing_create_only_fails_its_own_request(app):
+    """Test a batch that cannot be inserted is retried task by task."""
+    writer = app.extensions['task_writer']
+
+    good = writer.enqueue({'title': 'Valid', 'description': ''})
+    bad = writer.enqueue({'title': None, 'description': ''})
+
+    assert good.result(timeout=5)['title'] == 'Valid'
+    with pytest.raises(IntegrityError):
+        bad.result(timeout=5)
+    with app.app_context():
+        assert db.session.scalars(db.select(Task.title)).all() == ['Valid']
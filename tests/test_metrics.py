@@ -0,0 +1,126 @@
+import pytest
+import json
+import os
+import subprocess
+import sys
+from starlette.testclient import TestClient
+from app import create_app
+from app.async_api import create_asgi_app
+from app.metrics import TimedQueuePool
+from app.models import db, Task
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def sample(app, name, **labels):
+    """Current value of a metric sample in this process, 0 when not recorded yet."""
+    return app.extensions['metrics'].registry.get_sample_value(name, labels) or 0
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    """Test /metrics exposes per-route request metrics in the text format."""
+    client.get('/api/tasks')
+
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_bucket{le="0.001",method="GET",route="/api/tasks"}' in body
+    assert 'http_requests_total{method="GET",route="/api/tasks",status="200"}' in body
+    assert '# TYPE db_pool_checkout_wait_seconds histogram' in body
+
+def test_request_metrics_count_queries_and_bytes(client, app):
+    """Test each request records its latency, sizes and SQL statements."""
+    route = '/api/tasks/<int:task_id>'
+    with app.app_context():
+        task = Task(title='Measured')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+    requests = sample(app, 'http_requests_total', method='PUT', route=route, status='200')
+    queries = sample(app, 'http_request_db_queries_sum', method='PUT', route=route)
+    received = sample(app, 'http_request_bytes_total', method='PUT', route=route)
+    sent = sample(app, 'http_response_bytes_total', method='PUT', route=route)
+    body = json.dumps({'status': 'completed'})
+
+    response = client.put(f'/api/tasks/{task_id}', data=body, content_type='application/json')
+
+    assert response.status_code == 200
+    assert sample(app, 'http_requests_total', method='PUT', route=route, status='200') == requests + 1
+    assert sample(app, 'http_request_db_queries_sum', method='PUT', route=route) > queries
+    assert sample(app, 'http_request_bytes_total', method='PUT', route=route) == received + len(body)
+    assert sample(app, 'http_response_bytes_total', method='PUT', route=route) == sent + len(response.data)
+
+def test_unmatched_paths_share_one_label(client, app):
+    """Test 404s for unknown paths do not create a label per path."""
+    before = sample(app, 'http_requests_total', method='GET', route='unmatched', status='404')
+
+    client.get('/no/such/page')
+    client.get('/another/missing/page')
+
+    assert sample(app, 'http_requests_total', method='GET', route='unmatched', status='404') == before + 2
+
+def test_pool_checkout_wait_is_timed(client, app):
+    """Test file databases use the checkout-timing pool."""
+    with app.app_context():
+        assert isinstance(db.engine.pool, TimedQueuePool)
+    before = sample(app, 'db_pool_checkout_wait_seconds_count')
+
+    client.get('/api/tasks')
+
+    assert sample(app, 'db_pool_checkout_wait_seconds_count') > before
+
+def test_asgi_routes_use_flask_rule_labels(app):
+    """Test the asyncio API records its requests under the Flask route labels."""
+    route = '/api/tasks/<int:task_id>'
+    before = sample(app, 'http_requests_total', method='GET', route=route, status='404')
+
+    with TestClient(create_asgi_app(flask_app=app)) as asgi:
+        assert asgi.get('/api/tasks/999').status_code == 404
+
+    assert sample(app, 'http_requests_total', method='GET', route=route, status='404') == before + 1
+
+def test_metrics_add_up_across_worker_processes(tmp_path):
+    """Test /metrics sums the requests served by every process sharing the directory."""
+    env = dict(os.environ,
+               PROMETHEUS_MULTIPROC_DIR=str(tmp_path / 'metrics'),
+               TEST_DATABASE_URL=f'sqlite:///{tmp_path / "workers.db"}')
+    script = (
+        'import sys\n'
+        'from app import create_app\n'
+        'from app.models import db\n'
+        "app = create_app('testing')\n"
+        'with app.app_context():\n'
+        '    db.create_all()\n'
+        'client = app.test_client()\n'
+        'for _ in range(int(sys.argv[1])):\n'
+        "    client.get('/ping')\n"
+        "sys.stdout.write(client.get('/metrics').get_data(as_text=True))\n"
+    )
+
+    def worker(requests):
+        return subprocess.run([sys.executable, '-c', script, str(requests)], cwd=ROOT, env=env,
+                              capture_output=True, text=True, check=True).stdout
+
+    worker(3)
+    worker(2)
+    body = worker(0)
+
+    assert 'http_requests_total{method="GET",route="/ping",status="200"} 5.0' in body
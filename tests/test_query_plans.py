@@ -0,0 +1,180 @@
+"""Query plan regression tests.
+
+Seeds a large tasks table, drives every route with the test client while
+recording the SQL they issue, and checks that the plan for each statement
+touching ``tasks`` is served by an index rather than a full table scan.
+
+SQLite always runs. PostgreSQL runs when TEST_POSTGRES_URL points at a
+scratch database, e.g. ``postgresql://localhost/tasks_app_plans``.
+"""
+import pytest
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app
+from app.models import db, Task, TaskArchive
+from app.pagination import encode_cursor
+from config.config import TestingConfig
+
+SEED_ROWS = 20000
+ARCHIVED_ROWS = 5000
+
+DIALECTS = [
+    pytest.param(None, id='sqlite'),
+    pytest.param(os.environ.get('TEST_POSTGRES_URL'), id='postgresql',
+                 marks=pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                                          reason='TEST_POSTGRES_URL is not set')),
+]
+
+@pytest.fixture(params=DIALECTS)
+def app(request, monkeypatch):
+    """Create an app on the requested dialect with a large seeded tasks table."""
+    if request.param:
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', request.param)
+    app = create_app('testing')
+    # Every request must reach the database for its queries to be recorded
+    app.extensions.pop('task_cache', None)
+    
+    with app.app_context():
+        db.create_all()
+        start = datetime(2024, 1, 1)
+        db.session.execute(db.insert(Task), [
+            {
+                'title': f'Task {i}',
+                'description': 'Seeded for query plan tests',
+                'status': 'completed' if i % 4 == 0 else 'active',
+                'created_at': start + timedelta(seconds=i // 3)
+            }
+            for i in range(SEED_ROWS)
+        ])
+        # Completed tasks moved out before the seeded ones were created
+        db.session.execute(db.insert(TaskArchive), [
+            {
+                'id': SEED_ROWS + i + 1,
+                'title': f'Archived {i}',
+                'status': 'completed',
+                'created_at': start - timedelta(seconds=i),
+                'archived_at': start
+            }
+            for i in range(ARCHIVED_ROWS)
+        ])
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('ANALYZE')
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def record_statements(app, exercise):
+    """Run exercise() and return the (statement, parameters) it sent to the database."""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and re.search(r'\btasks(_archive)?\b', statement) \
+                and not statement.lstrip().upper().startswith('INSERT'):
+            statements.append((statement, parameters))
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        exercise()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+def table_scans(connection, statement, parameters):
+    """Return the plan steps for statement that read tasks or the archive without an index.
+
+    Full-text searches must go through the search index; their sort by
+    rank over the matches is expected.
+    """
+    search = 'tasks_fts' in statement or 'search_vector' in statement
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        steps = [row[-1] for row in rows]
+        if search and not any(step.startswith('SCAN tasks_fts VIRTUAL TABLE INDEX') for step in steps):
+            return steps
+        return [step for step in steps
+                if re.match(r'SCAN tasks(_archive)?\b(?!.*USING (COVERING )?INDEX)', step)
+                or ('USE TEMP B-TREE' in step and not search)]
+    
+    # With sequential scans priced out, PostgreSQL only falls back to one
+    # when no index can serve the statement at all
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).scalars().all()
+    if search and not any('ix_tasks_search_vector' in step for step in plan):
+        return plan
+    return [step for step in plan
+            if re.search(r'Seq Scan on tasks(_archive)?\b', step)
+            or ('Sort Key' in step and not search)]
+
+def exercise_routes(client):
+    """Issue every kind of request the task routes serve."""
+    page = json.loads(client.get('/api/tasks?limit=50').data)
+    client.get(f"/api/tasks?limit=50&cursor={page['next_cursor']}")
+    page = json.loads(client.get('/api/tasks?status=completed&limit=50').data)
+    client.get(f"/api/tasks?status=completed&limit=50&cursor={page['next_cursor']}")
+    client.get(f"/api/tasks?status=active&limit=50&fields=id,title&cursor={page['next_cursor']}")
+    client.get('/api/tasks?status=active&limit=50&stream=1').get_data()
+    page = json.loads(client.get('/api/tasks?include_archived=1&limit=50').data)
+    client.get(f"/api/tasks?include_archived=1&limit=50&cursor={page['next_cursor']}")
+    client.get('/api/tasks?status=completed&include_archived=1&limit=50')
+    page = json.loads(client.get('/api/tasks/search?q=task&limit=20').data)
+    client.get(f"/api/tasks/search?q=seeded+tas&limit=20&cursor={page['next_cursor']}")
+    client.get('/api/tasks/stats')
+    
+    response = client.get('/api/tasks/1234')
+    client.get('/api/tasks/1234', headers={'If-None-Match': response.headers['ETag']})
+    client.get('/api/tasks/1234?fields=title')
+    response = client.get(f'/api/tasks/{SEED_ROWS + 1}?include_archived=1')
+    client.get(f'/api/tasks/{SEED_ROWS + 1}?include_archived=1',
+               headers={'If-None-Match': response.headers['ETag']})
+    
+    client.put('/api/tasks/1234', data=json.dumps({'title': 'Changed'}),
+               content_type='application/json')
+    response = client.get('/api/tasks/1238')
+    client.patch('/api/tasks/1238', data=json.dumps({'status': 'completed'}),
+                 content_type='application/json', headers={'If-Match': response.headers['ETag']})
+    client.post('/api/tasks/bulk', data=json.dumps({
+        'create': [{'title': 'Bulk created'}],
+        'update': [{'id': 1235, 'status': 'completed'}, {'id': 1239, 'title': 'Bulk changed'}],
+        'delete': [1236, 1240]
+    }), content_type='application/json')
+    client.delete('/api/tasks/1237')
+
+def test_route_queries_use_indexes(app):
+    """Test no statement issued by the routes scans the tasks table."""
+    client = app.test_client()
+    statements = record_statements(app, lambda: exercise_routes(client))
+    
+    assert len(statements) >= 10
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for statement, parameters in statements:
+                scans = table_scans(connection, statement, parameters)
+                assert not scans, f'{statement!r} is not served by an index: {scans}'
+
+def test_deep_keyset_page_seeks(app):
+    """Test a deep keyset page seeks into the index instead of walking from the start."""
+    client = app.test_client()
+    
+    with app.app_context():
+        last = db.session.scalars(db.select(Task).order_by(Task.created_at.desc(), Task.id.desc())
+                                  .offset(100)).first()
+        cursor = encode_cursor(last)
+    
+    statements = record_statements(app, lambda: client.get(f'/api/tasks?limit=50&cursor={cursor}'))
+    with app.app_context():
+        with db.engine.begin() as connection:
+            statement, parameters = statements[0]
+            if connection.dialect.name == 'sqlite':
+                plan = [row[-1] for row in connection.exec_driver_sql(
+                    'EXPLAIN QUERY PLAN ' + statement, parameters)]
+                assert any(step.startswith('SEARCH tasks USING INDEX') and 'created_at>' in step
+                           for step in plan), plan
+            else:
+                plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).scalars().all()
+                assert any('Index Cond' in step for step in plan), plan
@@ -0,0 +1,130 @@
+import pytest
+import json
+from app import create_app
+from app.models import db, Task
+from config.config import TestingConfig
+
+def make_app(monkeypatch, tmp_path, replica_urls, cache=False):
+    """Create an app on a temporary primary with the given replica URLs."""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATABASE_REPLICA_URLS', replica_urls)
+    # Unless under test, cached responses would hide which database served a read
+    monkeypatch.setattr(TestingConfig, 'TASK_CACHE_ENABLED', cache)
+    return create_app('testing')
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """Create an app with one primary and two replica SQLite files."""
+    app = make_app(monkeypatch, tmp_path, [
+        f'sqlite:///{tmp_path / "replica_0.db"}',
+        f'sqlite:///{tmp_path / "replica_1.db"}'
+    ])
+
+    # Requests push their own app context, so each gets a fresh session
+    with app.app_context():
+        db.create_all()
+        for engine in app.extensions['replica_router'].engines:
+            db.metadata.create_all(engine)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+        for engine in app.extensions['replica_router'].engines:
+            engine.dispose()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def add_task(engine, title):
+    """Insert a task straight into one database."""
+    with engine.begin() as connection:
+        connection.execute(Task.__table__.insert().values(title=title, status='active'))
+
+def titles(response):
+    return sorted(task['title'] for task in json.loads(response.data)['tasks'])
+
+def test_reads_round_robin_over_replicas(client, app):
+    """Test GET requests alternate between the replicas."""
+    replica_0, replica_1 = app.extensions['replica_router'].engines
+    add_task(replica_0, 'From replica 0')
+    add_task(replica_1, 'From replica 1')
+    with app.app_context():
+        add_task(db.engine, 'From primary')
+
+    seen = [titles(client.get('/api/tasks')) for _ in range(4)]
+
+    assert ['From replica 0'] in seen
+    assert ['From replica 1'] in seen
+    assert ['From primary'] not in seen
+
+def test_writes_go_to_primary_and_stick(client, app):
+    """Test a client reads its own writes from the primary after writing."""
+    response = client.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Written'}),
+        content_type='application/json'
+    )
+    assert response.status_code == 201
+    assert 'db_primary_until' in response.headers['Set-Cookie']
+    task_id = json.loads(response.data)['task']['id']
+
+    with app.app_context(), db.engine.connect() as connection:
+        assert connection.execute(db.select(Task.title)).scalars().all() == ['Written']
+
+    # The writer reads from the primary while the cookie is fresh
+    assert titles(client.get('/api/tasks')) == ['Written']
+    assert client.get(f'/api/tasks/{task_id}').status_code == 200
+
+    # Other clients still read from the (lagging) replicas
+    other = app.test_client()
+    assert titles(other.get('/api/tasks')) == []
+
+def test_cache_never_serves_replica_reads_to_primary_readers(monkeypatch, tmp_path):
+    """Test cached replica reads reach neither sticky clients nor reads that fell back."""
+    app = make_app(monkeypatch, tmp_path, [f'sqlite:///{tmp_path / "replica.db"}'], cache=True)
+    router = app.extensions['replica_router']
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(router.engines[0])
+    writer = app.test_client()
+    reader = app.test_client()
+    
+    writer.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Written'}),
+        content_type='application/json'
+    )
+    # Cached from the replica, which has not seen the write
+    assert titles(reader.get('/api/tasks')) == []
+    assert titles(reader.get('/api/tasks')) == []
+    
+    # The writer's sticky reads bypass the cache
+    assert titles(writer.get('/api/tasks')) == ['Written']
+    
+    # With the replica down, reads fall back to the primary and miss the replica's entry
+    router._down_until[router.engines[0]] = float('inf')
+    assert titles(reader.get('/api/tasks')) == ['Written']
+    with app.app_context():
+        db.engine.dispose()
+    router.engines[0].dispose()
+
+def test_unavailable_replica_falls_back(monkeypatch, tmp_path):
+    """Test reads skip an unreachable replica and fall back to the primary."""
+    app = make_app(monkeypatch, tmp_path, [f'sqlite:///{tmp_path / "missing" / "replica.db"}'])
+
+    with app.app_context():
+        db.create_all()
+        add_task(db.engine, 'From primary')
+    client = app.test_client()
+
+    assert titles(client.get('/api/tasks')) == ['From primary']
+    assert titles(client.get('/api/tasks')) == ['From primary']
+    with app.app_context():
+        db.engine.dispose()
+
+def test_no_replicas_by_default():
+    """Test apps without replica URLs route everything to the primary."""
+    app = create_app('testing')
+
+    assert 'replica_router' not in app.extensions
@@ -1,7 +1,14 @@
 import pytest
 import json
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.testclient import TestClient
+from werkzeug.wrappers import Response
 from app import create_app
-from app.models import db, Task
+from app.async_api import create_asgi_app
+from app.models import db, Task, TASK_FIELDS
+from app.writes import archive_tasks
 
 @pytest.fixture
 def app():
@@ -15,9 +22,46 @@ def app():
         db.session.remove()
         db.drop_all()
 
-@pytest.fixture
-def client(app):
-    """A test client for the app."""
+class AsgiClient:
+    """Drives the ASGI app with the Flask test client's interface.
+
+    Responses are wrapped as werkzeug responses so the same assertions
+    run against both stacks.
+    """
+    
+    def __init__(self, app):
+        self.application = app
+        self._client = TestClient(create_asgi_app(flask_app=app))
+    
+    def open(self, method, url, data=None, content_type=None, headers=None, query_string=None):
+        headers = dict(headers or {})
+        if content_type:
+            headers['Content-Type'] = content_type
+        response = self._client.request(method, url, content=data, headers=headers,
+                                        params=query_string)
+        return Response(response.content, status=response.status_code,
+                        headers=list(response.headers.multi_items()))
+    
+    def get(self, url, **kwargs):
+        return self.open('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.open('POST', url, **kwargs)
+    
+    def put(self, url, **kwargs):
+        return self.open('PUT', url, **kwargs)
+    
+    def patch(self, url, **kwargs):
+        return self.open('PATCH', url, **kwargs)
+    
+    def delete(self, url, **kwargs):
+        return self.open('DELETE', url, **kwargs)
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def client(app, request):
+    """A test client for the Flask app or for the asyncio API."""
+    if request.param == 'asgi':
+        return AsgiClient(app)
     return app.test_client()
 
 @pytest.fixture
@@ -204,4 +248,391 @@ def test_delete_nonexistent_task(client):
     response = client.delete('/api/tasks/999')
     
     # Assertions
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404 
+
+def test_patch_task_in_one_statement(client, sample_task):
+    """Test PATCH /api/tasks/{id} updates with UPDATE ... RETURNING and no prior SELECT."""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        response = client.patch(
+            f'/api/tasks/{sample_task}',
+            data=json.dumps({'status': 'completed'}),
+            content_type='application/json'
+        )
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    data = json.loads(response.data)
+    
+    assert response.status_code == 200
+    assert data['task']['status'] == 'completed'
+    assert data['task']['title'] == 'Test Task'
+    assert response.headers['ETag']
+    assert not [s for s in statements if s.startswith('SELECT') and 'FROM tasks' in s]
+    assert any(s.startswith('UPDATE tasks') and 'RETURNING' in s for s in statements)
+
+def test_writes_honour_if_match(client, sample_task):
+    """Test If-Match makes updates and deletes conditional on the task's ETag."""
+    etag = client.get(f'/api/tasks/{sample_task}').headers['ETag']
+    
+    response = client.put(
+        f'/api/tasks/{sample_task}',
+        data=json.dumps({'title': 'First'}),
+        content_type='application/json',
+        headers={'If-Match': etag}
+    )
+    assert response.status_code == 200
+    new_etag = response.headers['ETag']
+    assert new_etag != etag
+    
+    # The copy the client based its change on is gone
+    response = client.put(
+        f'/api/tasks/{sample_task}',
+        data=json.dumps({'title': 'Second'}),
+        content_type='application/json',
+        headers={'If-Match': etag}
+    )
+    assert response.status_code == 412
+    assert client.delete(f'/api/tasks/{sample_task}', headers={'If-Match': etag}).status_code == 412
+    # Weak tags of compressed responses name the same version
+    weak = {'If-Match': f'W/{new_etag}'}
+    assert client.delete(f'/api/tasks/{sample_task}', headers=weak).status_code == 200
+    assert client.delete(f'/api/tasks/{sample_task}', headers=weak).status_code == 404
+    assert client.put('/api/tasks/999', data=json.dumps({'title': 'x'}),
+                      content_type='application/json', headers={'If-Match': '*'}).status_code == 404
+
+def test_writes_without_returning_support(app, sample_task, monkeypatch):
+    """Test dialects without RETURNING load the task first and still check If-Match."""
+    client = app.test_client()
+    monkeypatch.setattr(db.engine.dialect, 'update_returning', False)
+    monkeypatch.setattr(db.engine.dialect, 'delete_returning', False)
+    etag = client.get(f'/api/tasks/{sample_task}').headers['ETag']
+    
+    response = client.patch(f'/api/tasks/{sample_task}', json={'title': 'Loaded'},
+                            headers={'If-Match': etag})
+    assert response.status_code == 200
+    assert json.loads(response.data)['task']['title'] == 'Loaded'
+    assert client.patch(f'/api/tasks/{sample_task}', json={'title': 'Stale'},
+                        headers={'If-Match': etag}).status_code == 412
+    assert client.delete(f'/api/tasks/{sample_task}', headers={'If-Match': etag}).status_code == 412
+    assert client.delete(f'/api/tasks/{sample_task}').status_code == 200
+    assert client.delete(f'/api/tasks/{sample_task}').status_code == 404
+
+def test_include_archived_reads(client, app):
+    """Test archived tasks are only read with include_archived=1, in keyset order."""
+    with app.app_context():
+        start = datetime.utcnow() - timedelta(days=90)
+        for i in range(4):
+            db.session.add(Task(title=f'Task {i+1}', status='completed',
+                                created_at=start + timedelta(days=i)))
+        db.session.commit()
+        archived = archive_tasks(db.session, start + timedelta(days=1.5), 10)
+        db.session.commit()
+    assert len(archived) == 2
+    
+    assert client.get(f'/api/tasks/{archived[0]}').status_code == 404
+    response = client.get(f'/api/tasks/{archived[0]}?include_archived=1')
+    assert response.status_code == 200
+    assert json.loads(response.data)['task']['title'] == 'Task 1'
+    assert set(json.loads(response.data)['task']) == set(TASK_FIELDS)
+    assert client.get(f'/api/tasks/{archived[0]}?include_archived=1',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    response = client.get(f'/api/tasks/{archived[1]}?include_archived=1&fields=title')
+    assert json.loads(response.data)['task'] == {'title': 'Task 2'}
+    
+    data = json.loads(client.get('/api/tasks').data)
+    assert [task['title'] for task in data['tasks']] == ['Task 3', 'Task 4']
+    titles, cursor = [], ''
+    while cursor is not None:
+        data = json.loads(client.get(f'/api/tasks?include_archived=1&limit=3&cursor={cursor}').data)
+        titles += [task['title'] for task in data['tasks']]
+        cursor = data['next_cursor']
+    assert titles == ['Task 1', 'Task 2', 'Task 3', 'Task 4']
+
+def test_get_tasks_keyset_pagination(client):
+    """Test GET /api/tasks pages through results with limit and cursor."""
+    with client.application.app_context():
+        for i in range(5):
+            db.session.add(Task(title=f'Task {i+1}'))
+        db.session.commit()
+    
+    titles = []
+    cursor = None
+    pages = 0
+    while True:
+        url = '/api/tasks?limit=2'
+        if cursor:
+            url += f'&cursor={cursor}'
+        response = client.get(url)
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert len(data['tasks']) <= 2
+        titles.extend(task['title'] for task in data['tasks'])
+        pages += 1
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    
+    # Assertions
+    assert pages == 3
+    assert titles == [f'Task {i+1}' for i in range(5)]
+
+def test_get_tasks_pagination_with_status_filter(client):
+    """Test GET /api/tasks pagination combined with a status filter."""
+    with client.application.app_context():
+        for i in range(4):
+            db.session.add(Task(title=f'Task {i+1}', status='completed' if i % 2 else 'active'))
+        db.session.commit()
+    
+    response = client.get('/api/tasks?status=completed&limit=1')
+    data = json.loads(response.data)
+    assert [task['title'] for task in data['tasks']] == ['Task 2']
+    
+    response = client.get(f"/api/tasks?status=completed&limit=1&cursor={data['next_cursor']}")
+    data = json.loads(response.data)
+    assert [task['title'] for task in data['tasks']] == ['Task 4']
+    assert data['next_cursor'] is None
+
+def test_get_tasks_invalid_pagination(client):
+    """Test GET /api/tasks rejects malformed limit and cursor values."""
+    for query in ['limit=0', 'limit=abc', 'cursor=not-a-cursor']:
+        response = client.get(f'/api/tasks?{query}')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 400
+        assert data['success'] is False
+        assert 'error' in data
+
+def test_get_tasks_ndjson_stream(client):
+    """Test GET /api/tasks streams NDJSON when requested."""
+    with client.application.app_context():
+        db.session.add(Task(title='Task 1', status='active'))
+        db.session.add(Task(title='Task 2', status='completed'))
+        db.session.add(Task(title='Task 3', status='completed'))
+        db.session.commit()
+    
+    for url, headers in [('/api/tasks?status=completed&stream=1', {}),
+                         ('/api/tasks?status=completed', {'Accept': 'application/x-ndjson'})]:
+        response = client.get(url, headers=headers)
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        tasks = [json.loads(line) for line in lines]
+        assert [task['title'] for task in tasks] == ['Task 2', 'Task 3']
+
+def test_get_tasks_sparse_fields(client):
+    """Test GET /api/tasks returns only the requested fields."""
+    with client.application.app_context():
+        db.session.add(Task(title='Task 1', description='Long description'))
+        db.session.add(Task(title='Task 2', description='Long description'))
+        db.session.commit()
+    
+    response = client.get('/api/tasks?fields=id,title,status&limit=1')
+    data = json.loads(response.data)
+    
+    # Assertions
+    assert response.status_code == 200
+    assert len(data['tasks']) == 1
+    assert set(data['tasks'][0]) == {'id', 'title', 'status'}
+    assert data['tasks'][0]['title'] == 'Task 1'
+    
+    # The cursor still works when the keyset columns were not requested
+    response = client.get(f"/api/tasks?fields=title&limit=1&cursor={data['next_cursor']}")
+    data = json.loads(response.data)
+    assert data['tasks'] == [{'title': 'Task 2'}]
+
+def test_get_single_task_sparse_fields(client, sample_task):
+    """Test GET /api/tasks/{id} returns only the requested fields."""
+    response = client.get(f'/api/tasks/{sample_task}?fields=title,created_at')
+    data = json.loads(response.data)
+    
+    # Assertions
+    assert response.status_code == 200
+    assert set(data['task']) == {'title', 'created_at'}
+    assert data['task']['title'] == 'Test Task'
+    
+    assert client.get('/api/tasks/999?fields=title').status_code == 404
+
+def test_sparse_fields_unknown_field(client, sample_task):
+    """Test unknown fields are rejected on list and detail endpoints."""
+    for url in ['/api/tasks?fields=title,secret', f'/api/tasks/{sample_task}?fields=secret']:
+        response = client.get(url)
+        data = json.loads(response.data)
+        
+        assert response.status_code == 400
+        assert data['success'] is False
+
+def test_bulk_tasks(client):
+    """Test POST /api/tasks/bulk applies creates, updates and deletes together."""
+    with client.application.app_context():
+        keep = Task(title='Keep', description='Unchanged')
+        rename = Task(title='Rename')
+        remove = Task(title='Remove')
+        db.session.add_all([keep, rename, remove])
+        db.session.commit()
+        keep_id, rename_id, remove_id = keep.id, rename.id, remove.id
+    
+    bulk_data = {
+        'create': [{'title': 'New 1'}, {'title': 'New 2', 'description': 'Second'}],
+        'update': [{'id': rename_id, 'title': 'Renamed'},
+                   {'id': keep_id, 'status': 'completed'}],
+        'delete': [remove_id]
+    }
+    response = client.post(
+        '/api/tasks/bulk',
+        data=json.dumps(bulk_data),
+        content_type='application/json'
+    )
+    data = json.loads(response.data)
+    
+    # Assertions
+    assert response.status_code == 200
+    assert data['success'] is True
+    assert [r['task']['title'] for r in data['results']['create']] == ['New 1', 'New 2']
+    assert data['results']['create'][1]['task']['description'] == 'Second'
+    assert data['results']['update'][0]['task']['title'] == 'Renamed'
+    assert data['results']['update'][1]['task']['status'] == 'completed'
+    assert data['results']['update'][1]['task']['description'] == 'Unchanged'
+    assert data['results']['delete'] == [{'success': True, 'id': remove_id}]
+    
+    with client.application.app_context():
+        assert db.session.get(Task, remove_id) is None
+        assert db.session.get(Task, rename_id).updated_at is not None
+        assert Task.query.count() == 4
+
+def test_bulk_tasks_invalid_items(client, sample_task):
+    """Test POST /api/tasks/bulk applies nothing when any item is invalid."""
+    bulk_data = {
+        'create': [{'title': 'Valid'}, {'description': 'No title'}],
+        'delete': [sample_task, 999]
+    }
+    response = client.post(
+        '/api/tasks/bulk',
+        data=json.dumps(bulk_data),
+        content_type='application/json'
+    )
+    data = json.loads(response.data)
+    
+    # Assertions
+    assert response.status_code == 400
+    assert data['success'] is False
+    assert data['results']['create'][0] == {'success': True}
+    assert data['results']['create'][1]['success'] is False
+    assert data['results']['delete'][0] == {'success': True}
+    assert 'not found' in data['results']['delete'][1]['error']
+    
+    with client.application.app_context():
+        assert Task.query.count() == 1
+        assert db.session.get(Task, sample_task) is not None
+
+def test_get_single_task_conditional(client, sample_task):
+    """Test GET /api/tasks/{id} answers If-None-Match with 304 until the task changes."""
+    response = client.get(f'/api/tasks/{sample_task}')
+    etag = response.headers['ETag']
+    
+    response = client.get(f'/api/tasks/{sample_task}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    
+    # A sparse representation has its own ETag
+    response = client.get(f'/api/tasks/{sample_task}?fields=title', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    
+    client.put(
+        f'/api/tasks/{sample_task}',
+        data=json.dumps({'title': 'Changed'}),
+        content_type='application/json'
+    )
+    response = client.get(f'/api/tasks/{sample_task}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert json.loads(response.data)['task']['title'] == 'Changed'
+
+def test_get_tasks_conditional(client, sample_task):
+    """Test GET /api/tasks answers If-None-Match with 304 until a write goes through the API."""
+    response = client.get('/api/tasks?status=active')
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/tasks?status=active', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    
+    # Other queries have their own ETag
+    response = client.get('/api/tasks?status=completed', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    
+    client.post(
+        '/api/tasks',
+        data=json.dumps({'title': 'Another Task'}),
+        content_type='application/json'
+    )
+    response = client.get('/api/tasks?status=active', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(json.loads(response.data)['tasks']) == 2
+
+def test_search_tasks(client):
+    """Test GET /api/tasks/search returns ranked matches kept in sync with writes."""
+    for title, description in [('Buy groceries', 'Milk and eggs'),
+                               ('Call the plumber', 'Kitchen sink leaks'),
+                               ('Clean kitchen', 'Before the groceries arrive')]:
+        client.post(
+            '/api/tasks',
+            data=json.dumps({'title': title, 'description': description}),
+            content_type='application/json'
+        )
+    
+    response = client.get('/api/tasks/search?q=groceries')
+    data = json.loads(response.data)
+    
+    # Assertions: title matches rank above description matches
+    assert response.status_code == 200
+    assert [task['title'] for task in data['tasks']] == ['Buy groceries', 'Clean kitchen']
+    
+    # Prefix matching on the last word and pagination
+    response = client.get('/api/tasks/search?q=kitch&limit=1&fields=title')
+    data = json.loads(response.data)
+    assert data['tasks'] == [{'title': 'Clean kitchen'}]
+    response = client.get(f"/api/tasks/search?q=kitch&limit=1&cursor={data['next_cursor']}")
+    data = json.loads(response.data)
+    assert [task['title'] for task in data['tasks']] == ['Call the plumber']
+    assert data['next_cursor'] is None
+    
+    # Updates and deletes are reflected in the index
+    task_id = data['tasks'][0]['id']
+    client.put(
+        f'/api/tasks/{task_id}',
+        data=json.dumps({'description': 'Bathroom tap'}),
+        content_type='application/json'
+    )
+    data = json.loads(client.get('/api/tasks/search?q=kitchen').data)
+    assert [task['title'] for task in data['tasks']] == ['Clean kitchen']
+    client.delete(f"/api/tasks/{data['tasks'][0]['id']}")
+    data = json.loads(client.get('/api/tasks/search?q=kitchen').data)
+    assert data['tasks'] == []
+
+def test_search_tasks_query_syntax(client, sample_task):
+    """Test search input is treated as plain words, never as query syntax."""
+    for q in ['"Test', 'Test AND OR', 'task*) NEAR(']:
+        response = client.get('/api/tasks/search', query_string={'q': q})
+        assert response.status_code == 200
+    
+    response = client.get('/api/tasks/search?q=')
+    assert response.status_code == 400
+    response = client.get('/api/tasks/search', query_string={'q': '!!!'})
+    assert json.loads(response.data)['tasks'] == []
+
+def test_asgi_app_uses_async_engine(app):
+    """Test the ASGI app answers /api itself and passes other paths to Flask."""
+    asgi_app = create_asgi_app(flask_app=app)
+    client = TestClient(asgi_app)
+    
+    assert asgi_app.state.api.engine.dialect.is_async
+    assert client.get('/api/tasks').status_code == 200
+    assert client.get('/ping').text == 'Pong 🏓'
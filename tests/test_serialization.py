@@ -0,0 +1,70 @@
+import pytest
+import json
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.models import db, Task, TASK_FIELDS
+from app.serialization import row_encoder, OrjsonProvider, orjson
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+    
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_row_encoder_matches_to_dict(app):
+    """Test encoding a Core row gives the same dict as Task.to_dict."""
+    with app.app_context():
+        task = Task(title='Encoded', description='Same output',
+                    updated_at=datetime(2024, 5, 1, 12, 30, 15, 250))
+        db.session.add(task)
+        db.session.add(Task(title='Never updated'))
+        db.session.commit()
+        
+        table = Task.__table__
+        rows = db.session.execute(
+            db.select(*[table.c[name] for name in TASK_FIELDS]).order_by(table.c.id)
+        ).all()
+        tasks = Task.query.order_by(Task.id).all()
+        
+        encode = row_encoder(TASK_FIELDS)
+        assert [encode(row) for row in rows] == [task.to_dict() for task in tasks]
+        
+        encode = row_encoder(('updated_at', 'title'))
+        assert encode((None, 'x')) == {'updated_at': None, 'title': 'x'}
+        assert row_encoder(('updated_at', 'title')) is encode
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_orjson_provider_matches_default(app):
+    """Test the orjson provider produces the same documents as Flask's default."""
+    assert isinstance(app.json, OrjsonProvider)
+    
+    default = DefaultJSONProvider(app)
+    document = {'b': [1, 2.5, None, True], 'a': {'when': datetime(2024, 1, 2, 3, 4, 5)},
+                'text': 'café ✓'}
+    assert json.loads(app.json.dumps(document)) == json.loads(default.dumps(document))
+    assert list(json.loads(app.json.dumps(document))) == ['a', 'b', 'text']
+    
+    with app.test_request_context():
+        response = app.json.response(document)
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.data) == json.loads(default.dumps(document))
+    
+    assert app.json.loads(b'{"x": [1, 2]}') == {'x': [1, 2]}
+
+def test_fast_json_can_be_disabled():
+    """Test FAST_JSON keeps the default provider."""
+    from config.config import TestingConfig
+    original = TestingConfig.FAST_JSON
+    TestingConfig.FAST_JSON = False
+    try:
+        app = create_app('testing')
+    finally:
+        TestingConfig.FAST_JSON = original
+    assert not isinstance(app.json, OrjsonProvider)
@@ -0,0 +1,121 @@
+import pytest
+import json
+from app import create_app
+from app.models import db, Task
+from app.slow_queries import normalize, SlowQueryLog
+from config.config import TestingConfig
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """Create an app logging every statement as slow."""
+    monkeypatch.setattr(TestingConfig, 'SLOW_QUERY_LOG_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    monkeypatch.setattr(TestingConfig, 'SLOW_QUERY_LOG_FILE', str(tmp_path / 'slow.jsonl'))
+    monkeypatch.setattr(TestingConfig, 'ADMIN_TOKEN', 'secret')
+    # Cached responses would skip the statements under test
+    monkeypatch.setattr(TestingConfig, 'TASK_CACHE_ENABLED', False)
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        db.session.add(Task(title='Private title'))
+        db.session.commit()
+        app.extensions['slow_query_log'].clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def test_normalize():
+    """Test literals, placeholders and lists collapse to one statement shape."""
+    assert normalize("SELECT * FROM tasks WHERE id IN (?, ?, ?) AND title = 'x'\n  LIMIT 5") == \
+        'SELECT * FROM tasks WHERE id IN (?) AND title = ? LIMIT ?'
+    assert normalize('SELECT id FROM tasks WHERE id = %(id_1)s') == \
+        normalize('SELECT id FROM tasks WHERE id = ?')
+    assert normalize('INSERT INTO t (a, b) VALUES (?, ?), (?, ?)') == 'INSERT INTO t (a, b) VALUES (?)'
+    assert normalize("SELECT data::text FROM t") == 'SELECT data::text FROM t'
+
+def test_ring_buffer_is_bounded(tmp_path):
+    """Test the log keeps only the most recent entries, in memory and in the file."""
+    for path in (None, str(tmp_path / 'ring.jsonl')):
+        log = SlowQueryLog(threshold_ms=0, size=3, path=path)
+        for i in range(5):
+            log.record(f'SELECT {i}', (), 0.5)
+
+        assert [entry['parameters'] for entry in log.entries()] == [[], [], []]
+        assert len(log.entries()) == 3
+        assert log.entries(limit=1)[0]['time'] >= log.entries()[-1]['time']
+
+def test_slow_statements_are_logged_with_route_and_plan(client, app):
+    """Test statements record their route, redacted parameters and the first plan."""
+    client.get('/api/tasks?status=active')
+    client.get('/api/tasks?status=completed')
+
+    with app.app_context():
+        entries = app.extensions['slow_query_log'].entries()
+    listed = [entry for entry in entries
+              if entry['route'] == 'GET /api/tasks' and 'FROM tasks' in entry['statement']]
+
+    assert len(listed) == 2
+    assert listed[0]['fingerprint'] == listed[1]['fingerprint']
+    assert '?' in listed[0]['statement'] and 'active' not in listed[0]['statement']
+    assert '<str>' in json.dumps(listed[0]['parameters'])
+    assert listed[0]['plan'] and any('tasks' in line for line in listed[0]['plan'])
+
+    # Only the first occurrence ran EXPLAIN
+    with open(app.config['SLOW_QUERY_LOG_FILE']) as f:
+        raw = [json.loads(line) for line in f]
+    assert sum(1 for entry in raw
+               if entry['fingerprint'] == listed[0]['fingerprint'] and entry['plan']) == 1
+
+def test_parameters_can_be_kept(client, app):
+    """Test SLOW_QUERY_REDACT_PARAMS off records the actual values."""
+    app.extensions['slow_query_log'].redact_params = False
+
+    client.get('/api/tasks/search?q=Private')
+
+    with app.app_context():
+        entries = app.extensions['slow_query_log'].entries()
+    assert any('Private' in json.dumps(entry['parameters']) for entry in entries)
+
+def test_admin_endpoint_requires_token(client):
+    """Test /admin/slow-queries only answers with the admin token."""
+    client.get('/api/tasks')
+
+    assert client.get('/admin/slow-queries').status_code == 401
+    assert client.get('/admin/slow-queries',
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/admin/slow-queries?limit=2', headers={'Authorization': 'Bearer secret'})
+    data = json.loads(response.data)
+    assert response.status_code == 200
+    assert len(data['queries']) == 2
+
+def test_admin_endpoint_disabled_without_token(app):
+    """Test the endpoint does not exist when no admin token is configured."""
+    app.config['ADMIN_TOKEN'] = None
+
+    assert app.test_client().get('/admin/slow-queries').status_code == 404
+
+def test_cli_reads_the_shared_log(client, app):
+    """Test the CLI command prints what the request handlers recorded."""
+    client.get('/api/tasks')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['tasks', 'slow-queries', '--limit', '50'])
+
+    assert result.exit_code == 0
+    assert 'GET /api/tasks' in result.output
+    assert 'plan:' in result.output
+
+    result = runner.invoke(args=['tasks', 'slow-queries', '--json', '--clear'])
+    assert result.exit_code == 0
+    assert json.loads(result.output.splitlines()[0])['fingerprint']
+    with app.app_context():
+        assert app.extensions['slow_query_log'].entries() == []
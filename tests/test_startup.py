@@ -0,0 +1,86 @@
+import pytest
+import json
+import os
+import subprocess
+import sys
+from app import create_app
+from app.cache import read_source
+from app.models import db, Task, TableVersion
+from app.warmup import warm_up
+from config.config import TestingConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Import and create_app of a fresh interpreter, best of three runs
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 1.5))
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app('testing')
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'modules': [name for name in ('alembic', 'flask_migrate') if name in sys.modules]
+}))
+"""
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def test_create_app_within_startup_budget():
+    """Test a worker's import and create_app stay within the startup budget."""
+    runs = [json.loads(subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT,
+                                      capture_output=True, text=True, check=True).stdout)
+            for _ in range(3)]
+
+    assert runs[0]['modules'] == []
+    assert min(run['seconds'] for run in runs) < STARTUP_BUDGET_SECONDS
+
+def test_migration_commands_load_on_demand(app):
+    """Test "flask db" still works with Flask-Migrate loaded lazily."""
+    result = app.test_cli_runner().invoke(args=['db', 'heads'])
+
+    assert result.exit_code == 0, result.output
+    assert '(head)' in result.output
+    assert 'migrate' in app.extensions
+
+def test_migrations_match_the_models(monkeypatch, tmp_path):
+    """Test "flask db check" finds nothing to change after upgrading, search index included."""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "migrated.db"}')
+    runner = create_app('testing').test_cli_runner()
+
+    upgrade = runner.invoke(args=['db', 'upgrade'])
+    assert upgrade.exit_code == 0, upgrade.output
+    check = runner.invoke(args=['db', 'check'])
+    assert check.exit_code == 0, check.output
+
+def test_warm_up_connects_compiles_and_caches(app):
+    """Test warm-up fills the pool, compiles the index template and fills the task cache."""
+    page_size = app.config['TASKS_INDEX_PAGE_SIZE']
+    with app.app_context():
+        engine = db.engine
+        # More tasks than a page, so warming an unbounded list would show
+        db.session.execute(db.insert(Task), [{'title': f'Task {i}'} for i in range(page_size * 3)])
+        db.session.commit()
+
+    warm_up(app)
+
+    assert engine.pool.checkedin() == engine.pool.size()
+    assert any(name == 'index.html' for _, name in app.jinja_env.cache.keys())
+    # The index page and the first task page
+    cache = app.extensions['task_cache']
+    assert cache.stats()['entries'] == 2
+    with app.app_context():
+        tag = (read_source(), TableVersion.current('tasks'))
+        body = cache.get(('list', None, page_size, None, None, False), tag)
+    assert len(json.loads(body)['tasks']) == page_size
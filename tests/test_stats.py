@@ -0,0 +1,94 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from app import create_app
+from app.models import db, Task, TaskStatusCount
+from app.stats import rebuild_stats, stats_differences
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+    
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def test_stats_follow_writes(client, app):
+    """Test GET /api/tasks/stats reflects creates, updates and deletes."""
+    ids = []
+    for title in ['One', 'Two', 'Three']:
+        response = client.post(
+            '/api/tasks',
+            data=json.dumps({'title': title}),
+            content_type='application/json'
+        )
+        ids.append(json.loads(response.data)['task']['id'])
+    client.put(
+        f'/api/tasks/{ids[0]}',
+        data=json.dumps({'status': 'completed'}),
+        content_type='application/json'
+    )
+    client.post(
+        '/api/tasks/bulk',
+        data=json.dumps({'update': [{'id': ids[1], 'status': 'completed'}], 'delete': [ids[2]]}),
+        content_type='application/json'
+    )
+    
+    response = client.get('/api/tasks/stats')
+    data = json.loads(response.data)
+    
+    # Assertions
+    assert response.status_code == 200
+    assert data['stats']['total'] == 2
+    assert data['stats']['by_status'] == {'active': 0, 'completed': 2}
+    assert data['stats']['completion_rate'] == 1.0
+    today = datetime.utcnow().date().isoformat()
+    assert data['stats']['created_per_day'] == [{'date': today, 'count': 2}]
+    
+    with app.app_context():
+        assert stats_differences() == []
+
+def test_stats_day_window(client, app):
+    """Test created_per_day only covers the requested number of days."""
+    with app.app_context():
+        db.session.add(Task(title='Old', created_at=datetime.utcnow() - timedelta(days=10)))
+        db.session.add(Task(title='New'))
+        db.session.commit()
+    
+    data = json.loads(client.get('/api/tasks/stats?days=5').data)
+    assert len(data['stats']['created_per_day']) == 1
+    assert data['stats']['total'] == 2
+    data = json.loads(client.get('/api/tasks/stats?days=11').data)
+    assert len(data['stats']['created_per_day']) == 2
+    
+    assert client.get('/api/tasks/stats?days=0').status_code == 400
+
+def test_check_and_rebuild_commands(app):
+    """Test check-stats detects drift and rebuild-stats repairs it."""
+    with app.app_context():
+        db.session.add_all([Task(title='A'), Task(title='B', status='completed')])
+        db.session.commit()
+        db.session.get(TaskStatusCount, 'active').task_count = 7
+        db.session.commit()
+    
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['tasks', 'check-stats'])
+    assert result.exit_code != 0
+    assert 'status active: stored 7, actual 1' in result.output
+    
+    result = runner.invoke(args=['tasks', 'rebuild-stats'])
+    assert result.exit_code == 0
+    result = runner.invoke(args=['tasks', 'check-stats'])
+    assert result.exit_code == 0
+    
+    with app.app_context():
+        assert rebuild_stats()[0] == {'active': 1, 'completed': 1}
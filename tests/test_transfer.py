@@ -0,0 +1,148 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from app import create_app
+from app.models import db, Task, TaskEvent
+from app.stats import stats_differences
+from app.transfer import Checkpoint, export_tasks
+from app.writes import archive_tasks
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    # Create all tables in the test database
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def _add_tasks(app, count):
+    start = datetime(2026, 1, 1)
+    with app.app_context():
+        db.session.add_all([
+            Task(title=f'Task {i}', description='' if i % 2 else f'About "{i}", with commas',
+                 status='completed' if i % 3 else 'active', created_at=start + timedelta(hours=i),
+                 updated_at=start + timedelta(days=1) if i % 4 else None)
+            for i in range(count)
+        ])
+        db.session.commit()
+
+def _all_tasks(app):
+    with app.app_context():
+        return [task.to_dict() for task in db.session.scalars(db.select(Task).order_by(Task.id))]
+
+def _clear_tasks(app):
+    with app.app_context():
+        db.session.execute(db.delete(Task))
+        db.session.commit()
+
+@pytest.mark.parametrize('extension', ['csv', 'ndjson'])
+def test_export_import_round_trip(app, tmp_path, extension):
+    """Test an export imports back into the same tasks, with statistics and search intact."""
+    _add_tasks(app, 25)
+    tasks = _all_tasks(app)
+    path = str(tmp_path / f'tasks.{extension}')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['tasks', 'export', path, '--batch-size', '10'])
+    assert result.exit_code == 0, result.output
+    assert 'Exported 25 tasks' in result.output
+    _clear_tasks(app)
+    result = runner.invoke(args=['tasks', 'import', path, '--batch-size', '10',
+                                 '--commit-rows', '20'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Imported 25 tasks' in result.output
+    assert 'rows/s' in result.output
+    assert _all_tasks(app) == tasks
+    with app.app_context():
+        assert stats_differences() == []
+        kinds = db.session.scalars(db.select(TaskEvent.kind).order_by(TaskEvent.id)).all()
+        assert kinds == ['reset', 'reset']
+    client = app.test_client()
+    assert len(json.loads(client.get('/api/tasks/search?q=commas').data)['tasks']) == 13
+    # The insert triggers are back in place
+    client.post('/api/tasks', json={'title': 'Later commas'})
+    with app.app_context():
+        assert stats_differences() == []
+    assert len(json.loads(client.get('/api/tasks/search?q=commas').data)['tasks']) == 14
+
+def test_export_includes_archived_on_request(app, tmp_path):
+    """Test --include-archived adds the archived tasks to an export."""
+    _add_tasks(app, 6)
+    with app.app_context():
+        archive_tasks(db.session, datetime.utcnow(), 2)
+        db.session.commit()
+    runner = app.test_cli_runner()
+
+    runner.invoke(args=['tasks', 'export', str(tmp_path / 'live.ndjson')])
+    runner.invoke(args=['tasks', 'export', str(tmp_path / 'all.ndjson'), '--include-archived'])
+
+    assert len((tmp_path / 'live.ndjson').read_text().splitlines()) == 4
+    assert len((tmp_path / 'all.ndjson').read_text().splitlines()) == 6
+
+def test_import_assigns_ids_and_resumes_after_an_invalid_row(app, tmp_path):
+    """Test items without ids get new ones and --resume skips what was committed."""
+    path = tmp_path / 'tasks.ndjson'
+    items = [{'title': f'Task {i}'} for i in range(5)]
+    items[3] = {'title': 'Bad', 'status': 'unknown'}
+    path.write_text(''.join(json.dumps(item) + '\n' for item in items))
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['tasks', 'import', str(path), '--batch-size', '2',
+                                 '--commit-rows', '2'])
+
+    assert result.exit_code != 0
+    assert "Row 4: Invalid status 'unknown'" in result.output
+    assert 'The first 2 rows are imported' in result.output
+    assert [task['title'] for task in _all_tasks(app)] == ['Task 0', 'Task 1']
+
+    items[3] = {'title': 'Fixed'}
+    path.write_text(''.join(json.dumps(item) + '\n' for item in items))
+    result = runner.invoke(args=['tasks', 'import', str(path), '--resume'])
+
+    assert result.exit_code == 0, result.output
+    tasks = _all_tasks(app)
+    assert [task['title'] for task in tasks] == ['Task 0', 'Task 1', 'Task 2', 'Fixed', 'Task 4']
+    assert [task['id'] for task in tasks] == [1, 2, 3, 4, 5]
+    assert not (tmp_path / 'tasks.ndjson.checkpoint').exists()
+    with app.app_context():
+        assert stats_differences() == []
+
+def test_import_rejects_existing_ids(app, tmp_path):
+    """Test importing a task whose id is taken fails without a partial transaction."""
+    _add_tasks(app, 1)
+    path = tmp_path / 'tasks.csv'
+    path.write_text('id,title\n2,New\n1,Taken\n')
+
+    result = app.test_cli_runner().invoke(args=['tasks', 'import', str(path)])
+
+    assert result.exit_code != 0
+    assert 'UNIQUE constraint failed' in result.output
+    assert 'No tasks were imported.' in result.output
+    assert [task['title'] for task in _all_tasks(app)] == ['Task 0']
+
+def test_export_resumes_from_checkpoint(app, tmp_path):
+    """Test an interrupted export continues after its last written batch."""
+    _add_tasks(app, 7)
+    path = tmp_path / 'tasks.csv'
+    runner = app.test_cli_runner()
+    runner.invoke(args=['tasks', 'export', str(tmp_path / 'full.csv')])
+
+    def interrupt(rows):
+        # A partial batch written after the checkpoint is discarded on resume
+        out.write(b'partial')
+        raise KeyboardInterrupt
+    with app.app_context(), open(path, 'wb') as out:
+        with pytest.raises(KeyboardInterrupt):
+            export_tasks(db.session, out, 'csv', batch_size=3,
+                         checkpoint=Checkpoint(str(path)), progress=interrupt)
+    result = runner.invoke(args=['tasks', 'export', str(path), '--resume', '--batch-size', '3'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Exported 4 tasks' in result.output
+    assert path.read_bytes() == (tmp_path / 'full.csv').read_bytes()